@@ -7,7 +7,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import komponen
 from components.sidebar import create_sidebar
+from components.job_status import sync_jobs
 from utils.session_state import initialize_session_state
+from config import AI_WARM_UP_ON_START
 
 # Set konfigurasi halaman
 st.set_page_config(
@@ -128,10 +130,25 @@ def load_css():
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource(show_spinner=False)
+def warm_up_ai_client():
+    """
+    Siapkan backend AI sekali per proses (berjalan di background)
+    """
+    from utils.ai_backend import get_backend
+    return get_backend().warm_up(background=True)
+
 def main():
+    # Siapkan client AI saat aplikasi pertama kali dijalankan
+    if AI_WARM_UP_ON_START:
+        warm_up_ai_client()
+    
     # Inisialisasi session state
     initialize_session_state()
     
+    # Simpan hasil pekerjaan latar belakang yang sudah selesai
+    sync_jobs()
+    
     # Load CSS
     load_css()
     
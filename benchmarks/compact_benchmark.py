@@ -0,0 +1,71 @@
+"""
+Benchmark of pre-upload audio compaction with the fake AI backend
+
+Uploads a 44.1 kHz stereo WAV recording (like the ESP32 uploader's) through
+the Gemini upload registry as-is and with compaction, and prints the bytes
+uploaded, the upload time and the registry's savings report. A second
+compacted upload of the same recording shows the cached copy being reused.
+
+Usage:
+    python benchmarks/compact_benchmark.py --minutes 30 --upload-mb-per-second 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_recording(path, minutes, sample_rate=44100, channels=2):
+    """
+    Write a stereo WAV of speech-like noise bursts separated by short pauses
+    """
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for _ in range(int(minutes * 60 / 10)):
+            speech = rng.normal(0, 3000, int(sample_rate * 9)).astype(np.int16)
+            pause = np.zeros(sample_rate, dtype=np.int16)
+            wav.writeframes(np.repeat(np.concatenate([speech, pause]), channels).tobytes())
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30, help="length of the test recording")
+    parser.add_argument("--upload-mb-per-second", type=float, default=5, help="simulated upload bandwidth")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["CACHE_FOLDER"] = os.path.join(folder, "cache")
+        os.environ["DATABASE_PATH"] = os.path.join(folder, "store.db")
+        from utils.ai_backend import set_backend
+        from utils.fake_backend import FakeBackend
+        from utils.gemini_files import UploadRegistry
+
+        set_backend(FakeBackend(latency_seconds=0, upload_mb_per_second=args.upload_mb_per_second))
+        audio_path = os.path.join(folder, "lecture.wav")
+        write_recording(audio_path, args.minutes)
+        size_mb = os.path.getsize(audio_path) / 1024 / 1024
+        print(f"Recording: {args.minutes:g} min, 44.1 kHz stereo, {size_mb:.1f} MB; "
+              f"upload bandwidth {args.upload_mb_per_second:g} MB/s")
+
+        for label, compact in (("original", False), ("compacted", True), ("compacted (cached)", True)):
+            registry = UploadRegistry(compact=compact)
+            start = time.perf_counter()
+            remote_file = registry.acquire(audio_path)
+            elapsed = time.perf_counter() - start
+            registry.release(remote_file)
+            stats = registry.stats()
+            print(f"  {label:<20} {elapsed:6.2f} s  uploaded {stats['bytes_uploaded'] / 1024 / 1024:7.2f} MB  "
+                  f"audio {remote_file.duration_seconds / 60:.1f} min")
+            if compact:
+                print(f"    saved {stats['compact_bytes_saved'] / 1024 / 1024:.2f} MB and "
+                      f"{stats['compact_seconds_saved']:.2f} s (compacting took {stats['compact_seconds']:.2f} s)")
+
+if __name__ == "__main__":
+    main()
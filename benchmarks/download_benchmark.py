@@ -0,0 +1,68 @@
+"""
+Benchmark and check of server downloads against the local stand-in server
+
+1. Single-stream vs parallel Range download of a large file (with a
+   per-connection bandwidth limit, like a remote server)
+2. Resume: the first responses drop the connection part-way
+3. Skip: downloading a file that is already present and verified
+
+Usage:
+    python benchmarks/download_benchmark.py --size-mb 64 --mb-per-second 20 --segments 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import start_server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=64)
+    parser.add_argument("--mb-per-second", type=float, default=20, help="bandwidth limit per connection")
+    parser.add_argument("--segments", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as server_folder, tempfile.TemporaryDirectory() as local_folder:
+        filename = "lecture.wav"
+        with open(os.path.join(server_folder, filename), "wb") as f:
+            f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+
+        server, base_url = start_server(server_folder, mb_per_second=args.mb_per_second)
+        # flask_client reads the server URL from config at import time
+        os.environ["FLASK_SERVER_URL"] = base_url
+        from utils import flask_client
+
+        print(f"File: {args.size_mb:g} MB, bandwidth limit {args.mb_per_second:g} MB/s per connection")
+        for segments in (1, args.segments):
+            save_path = os.path.join(local_folder, f"{segments}_{filename}")
+            start = time.perf_counter()
+            assert flask_client.download_file(filename, save_path, segments=segments) == save_path
+            elapsed = time.perf_counter() - start
+            print(f"  {segments} segment(s): {elapsed:6.2f} s  {args.size_mb / elapsed:6.1f} MB/s")
+
+        start = time.perf_counter()
+        assert flask_client.download_file(filename, save_path, segments=args.segments) == save_path
+        print(f"  already present:  {time.perf_counter() - start:6.2f} s (verified by checksum, not downloaded)")
+        server.shutdown()
+
+        # Resume after dropped connections (no bandwidth limit)
+        drop_after = int(args.size_mb * 1024 * 1024 / (args.segments * 3))
+        server, base_url = start_server(server_folder, drop_after_bytes=drop_after, drops=args.segments * 2)
+        flask_client.FLASK_SERVER_URL = base_url
+        save_path = os.path.join(local_folder, f"resumed_{filename}")
+        start = time.perf_counter()
+        assert flask_client.download_file(filename, save_path, segments=args.segments) == save_path
+        print(f"  with {args.segments * 2} dropped connections: {time.perf_counter() - start:6.2f} s (resumed, checksum verified)")
+        server.shutdown()
+
+        print("\nHTTP latency per endpoint:")
+        for endpoint, stats in flask_client.get_http_stats().items():
+            print(f"  {endpoint:<22} calls={stats['calls']:<4} errors={stats['errors']:<3} "
+                  f"p50={stats['p50_seconds'] * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
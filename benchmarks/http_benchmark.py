@@ -0,0 +1,66 @@
+"""
+Benchmark of connection reuse for the Flask server calls
+
+Runs repeated listing and download calls against the local stand-in server,
+once with a new connection per call (bare requests.get, the previous
+behaviour) and once through the pooled keep-alive session, and prints the
+time per call and the per-endpoint latency stats.
+
+Usage:
+    python benchmarks/http_benchmark.py --calls 200 --file-kb 256
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import start_server
+from utils.http_session import PooledSession
+
+def run(label, get, url, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        response = get(url)
+        response.content
+        response.close()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:7.3f} s  {elapsed / calls * 1000:7.2f} ms/call")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200, help="calls per endpoint and mode")
+    parser.add_argument("--files", type=int, default=50, help="number of files on the server")
+    parser.add_argument("--file-kb", type=int, default=256, help="size of the downloaded file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        for i in range(args.files):
+            with open(os.path.join(folder, f"recording_{i:03d}.wav"), "wb") as f:
+                f.write(os.urandom(args.file_kb * 1024 if i == 0 else 1024))
+
+        server, base_url = start_server(folder)
+        pooled = PooledSession()
+
+        for endpoint, url in (("GET /files", f"{base_url}/files"),
+                              ("GET /uploads/<file>", f"{base_url}/uploads/recording_000.wav")):
+            print(f"{endpoint} x {args.calls}")
+            bare = run("new connection per call", lambda u: requests.get(u, timeout=30), url, args.calls)
+            reused = run("pooled keep-alive session", lambda u: pooled.get(u, endpoint), url, args.calls)
+            print(f"  speedup: {bare / reused:.2f}x\n")
+
+        print("Pooled session latency per endpoint:")
+        for endpoint, stats in pooled.stats().items():
+            print(f"  {endpoint:<22} calls={stats['calls']:<5} errors={stats['errors']:<3} "
+                  f"p50={stats['p50_seconds'] * 1000:.2f} ms p95={stats['p95_seconds'] * 1000:.2f} ms")
+
+        pooled.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark of large-file ingest into the audio store
+
+1. Browser upload: the previous one-shot write of the whole upload
+   (f.write(uploaded_file.getbuffer()), which needs the recording in memory)
+   vs save_uploaded_file, which streams it into the store in
+   INGEST_CHUNK_KB blocks
+2. Server download: download_file + save_downloaded_file against the local
+   stand-in server
+
+Peak Python memory is measured with tracemalloc; the upload is read from
+disk so the recording itself is not counted as resident.
+
+Usage:
+    python benchmarks/ingest_benchmark.py --size-mb 500
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import start_server
+
+class DiskUploadedFile:
+    """Stand-in for Streamlit's UploadedFile, backed by a file on disk"""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._file.seek(offset, whence)
+
+    def getbuffer(self):
+        self._file.seek(0)
+        return memoryview(self._file.read())
+
+    def close(self):
+        self._file.close()
+
+def measure(label, size_mb, func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<34} {elapsed:6.2f} s  {size_mb / elapsed:7.1f} MB/s  peak memory {peak / 1024 / 1024:8.1f} MB")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_folder:
+        # The store reads its locations from config at import time
+        os.environ["AUDIO_STORE_FOLDER"] = os.path.join(work_folder, "audio")
+        os.environ["DATABASE_PATH"] = os.path.join(work_folder, "store.db")
+        server_folder = os.path.join(work_folder, "server")
+        os.makedirs(server_folder)
+
+        source = os.path.join(server_folder, "full_day.wav")
+        with open(source, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        server, base_url = start_server(server_folder)
+        os.environ["FLASK_SERVER_URL"] = base_url
+        from utils import flask_client
+        from utils.audio_processor import save_uploaded_file, save_downloaded_file
+        from utils.audio_store import audio_store
+
+        print(f"Recording: {args.size_mb} MB")
+
+        def one_shot():
+            uploaded = DiskUploadedFile(source)
+            with open(os.path.join(work_folder, "one_shot.wav"), "wb") as f:
+                f.write(uploaded.getbuffer())
+            uploaded.close()
+
+        def streamed():
+            uploaded = DiskUploadedFile(source)
+            try:
+                return save_uploaded_file(uploaded, owner="benchmark")
+            finally:
+                uploaded.close()
+
+        measure("upload, one-shot getbuffer()", args.size_mb, one_shot)
+        path, file_info = measure("upload, streamed into store", args.size_mb, streamed)
+        assert path and file_info["size"] == f"{args.size_mb * 1024:.1f} KB"
+
+        # Start the download from an empty store so the file is stored again
+        audio_store.release(file_info["id"], "benchmark")
+
+        def download():
+            download_path = flask_client.download_file("full_day.wav", os.path.join(work_folder, "dl", "full_day.wav"),
+                                                       segments=1)
+            return save_downloaded_file(download_path, "full_day.wav", owner="benchmark")
+
+        path, downloaded_info = measure("download + move into store", args.size_mb, download)
+        assert downloaded_info["id"] == file_info["id"]
+        print(f"  stored once as {os.path.basename(path)}")
+        server.shutdown()
+        shutil.rmtree(os.path.join(work_folder, "dl"), ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
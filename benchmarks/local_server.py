@@ -0,0 +1,320 @@
+"""
+Local stand-in for the Flask recording server
+
+Serves the endpoints used by utils/flask_client from a folder, with HTTP/1.1
+keep-alive so connection reuse can be measured:
+
+    GET    /status
+    GET    /files               JSON listing, with ETag / If-None-Match
+    GET    /uploads/<name>      file download with Range / If-Range support
+    HEAD   /uploads/<name>      size, ETag, X-Checksum-SHA256, Accept-Ranges
+    POST   /upload              multipart/form-data with one "file" part
+    DELETE /uploads/<name>
+
+--drop-after-bytes makes the first --drops file responses close the
+connection early, to exercise resumed downloads. --mb-per-second limits
+the bandwidth of each connection (both directions), like a remote server.
+
+Usage:
+    python benchmarks/local_server.py --folder uploads --port 5000
+"""
+import argparse
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+class LocalServerHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive
+    # responses stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    # Set by start_server
+    folder = "."
+    latency = 0.0
+    drop_after_bytes = 0
+    mb_per_second = 0.0  # per-connection bandwidth limit (0 = unlimited)
+    drops = None  # shared {"remaining": n}
+    lock = None
+    checksums = None  # (path, mtime, size) -> sha256
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _file_path(self):
+        name = os.path.basename(unquote(self.path[len("/uploads/"):]))
+        return os.path.join(self.folder, name)
+
+    def _listing(self):
+        files = []
+        for name in sorted(os.listdir(self.folder)):
+            path = os.path.join(self.folder, name)
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                files.append({
+                    "filename": name,
+                    "size": f"{stat.st_size / 1024:.1f} KB",
+                    "modified": datetime.fromtimestamp(stat.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
+                })
+        return files
+
+    def do_GET(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.path == "/status":
+            self._send_json(200, {"status": "online"})
+
+        elif self.path == "/files":
+            files = self._listing()
+            etag = '"' + hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()[:16] + '"'
+            if self.headers.get("If-None-Match") == etag:
+                self._send_empty(304, {"ETag": etag})
+            else:
+                self._send_json(200, files, {"ETag": etag})
+
+        elif self.path.startswith("/uploads/"):
+            path = self._file_path()
+            if not os.path.isfile(path):
+                self._send_json(404, {"error": "not found"})
+                return
+            self._send_file(path)
+
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _file_headers(self, path):
+        stat = os.stat(path)
+        key = (path, stat.st_mtime, stat.st_size)
+        with self.lock:
+            checksum = self.checksums.get(key)
+        if checksum is None:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            checksum = digest.hexdigest()
+            with self.lock:
+                self.checksums[key] = checksum
+        return {
+            "ETag": f'"{stat.st_size:x}-{int(stat.st_mtime * 1000):x}"',
+            "X-Checksum-SHA256": checksum,
+            "Accept-Ranges": "bytes"
+        }
+
+    def _parse_range(self, size, headers):
+        """Return (start, end) of a single "bytes=" range, None for the whole file, or "invalid" """
+        value = self.headers.get("Range")
+        if not value or not value.startswith("bytes=") or "," in value:
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range != headers["ETag"]:
+            return None
+
+        start, _, end = value[len("bytes="):].partition("-")
+        try:
+            if start == "":
+                start, end = max(0, size - int(end)), size - 1
+            else:
+                start, end = int(start), min(int(end), size - 1) if end else size - 1
+        except ValueError:
+            return None
+        if start > end or start >= size:
+            return "invalid"
+        return start, end
+
+    def do_HEAD(self):
+        path = self._file_path()
+        if not self.path.startswith("/uploads/") or not os.path.isfile(path):
+            self._send_empty(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        for name, value in self._file_headers(path).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _send_file(self, path):
+        size = os.path.getsize(path)
+        headers = self._file_headers(path)
+        byte_range = self._parse_range(size, headers)
+
+        if byte_range == "invalid":
+            self._send_empty(416, {"Content-Range": f"bytes */{size}"})
+            return
+
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1
+        self.send_response(206 if byte_range else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(length))
+        if byte_range:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        # Simulate a dropped connection for the first few responses
+        limit = length
+        with self.lock:
+            if self.drop_after_bytes and self.drops["remaining"] > 0:
+                self.drops["remaining"] -= 1
+                limit = min(length, self.drop_after_bytes)
+
+        block = 64 * 1024
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = limit
+            while remaining > 0:
+                chunk = f.read(min(block, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+                if self.mb_per_second:
+                    time.sleep(len(chunk) / (self.mb_per_second * 1024 * 1024))
+
+        if limit < length:
+            self.close_connection = True
+            self.wfile.flush()
+            self.connection.shutdown(socket.SHUT_RDWR)
+
+    def do_POST(self):
+        if self.path != "/upload":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        # Stream the single file part to disk: the part ends right before the closing boundary
+        content_type = self.headers.get("Content-Type", "")
+        if "boundary=" not in content_type:
+            self._send_json(400, {"error": "expected multipart/form-data"})
+            return
+        boundary = content_type.split("boundary=", 1)[1].strip('"')
+        remaining = int(self.headers.get("Content-Length", 0))
+
+        filename = None
+        while True:
+            line = self.rfile.readline(65536)
+            remaining -= len(line)
+            if line in (b"\r\n", b""):
+                break
+            if b"filename=" in line:
+                filename = line.decode("utf-8").split('filename="', 1)[1].split('"', 1)[0]
+
+        epilogue = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        file_size = remaining - len(epilogue)
+        if not filename or file_size < 0:
+            self._send_json(400, {"error": "no file part"})
+            return
+
+        path = os.path.join(self.folder, os.path.basename(filename))
+        with open(path, "wb") as f:
+            left = file_size
+            while left > 0:
+                chunk = self.rfile.read(min(64 * 1024, left))
+                if not chunk:
+                    break
+                f.write(chunk)
+                left -= len(chunk)
+                if self.mb_per_second:
+                    time.sleep(len(chunk) / (self.mb_per_second * 1024 * 1024))
+
+        if self.rfile.read(len(epilogue)) != epilogue:
+            os.remove(path)
+            self._send_json(400, {"error": "malformed multipart body"})
+            return
+
+        self._send_json(200, {"filename": os.path.basename(filename), "size": file_size})
+
+    def do_DELETE(self):
+        path = self._file_path()
+        if not self.path.startswith("/uploads/") or not os.path.isfile(path):
+            self._send_json(404, {"error": "not found"})
+            return
+        os.remove(path)
+        self._send_json(200, {"deleted": os.path.basename(path)})
+
+def start_server(folder, port=0, latency=0.0, drop_after_bytes=0, drops=0, mb_per_second=0.0):
+    """
+    Start the server in a background thread
+
+    Parameters:
+    ----------
+    folder : str
+        Folder whose files are served
+    port : int
+        Port (0 picks a free port)
+    latency : float
+        Seconds added to every GET, to simulate a remote server
+    drop_after_bytes : int
+        Close the connection after this many body bytes ...
+    drops : int
+        ... for this many file responses (0 disables dropping)
+    mb_per_second : float
+        Bandwidth limit per connection (0 = unlimited)
+
+    Returns:
+    -------
+    tuple
+        (server, base URL); call server.shutdown() to stop it
+    """
+    handler = type("Handler", (LocalServerHandler,), {
+        "folder": folder,
+        "latency": latency,
+        "drop_after_bytes": drop_after_bytes if drops else 0,
+        "drops": {"remaining": drops},
+        "mb_per_second": mb_per_second,
+        "lock": threading.Lock(),
+        "checksums": {}
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--folder", default="uploads")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--drop-after-bytes", type=int, default=0)
+    parser.add_argument("--drops", type=int, default=0)
+    parser.add_argument("--mb-per-second", type=float, default=0.0, help="bandwidth limit per connection")
+    args = parser.parse_args()
+
+    os.makedirs(args.folder, exist_ok=True)
+    server, url = start_server(args.folder, args.port, args.latency, args.drop_after_bytes, args.drops,
+                              args.mb_per_second)
+    print(f"Serving {args.folder} at {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
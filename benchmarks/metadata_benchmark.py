@@ -0,0 +1,131 @@
+"""
+Benchmark of the header-only audio metadata probe
+
+Builds large WAV, MP3 (CBR and VBR), M4A (moov after the audio data) and Ogg
+Vorbis/Opus files with known durations, probes each one with
+utils.audio_metadata.probe_audio and prints the probe time and what was
+read. The audio payload is left sparse (zeros), since the probe never reads
+it, so the files are quick to create even at several GB.
+
+Usage:
+    python benchmarks/metadata_benchmark.py --size-mb 2048
+"""
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_wav(path, size, sample_rate=44100, channels=2):
+    data_size = size - 44
+    byte_rate = sample_rate * channels * 2
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", size - 8) + b"WAVE")
+        f.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sample_rate, byte_rate, channels * 2, 16))
+        f.write(b"data" + struct.pack("<I", data_size))
+        f.truncate(size)
+    return data_size / byte_rate
+
+def write_mp3(path, size, vbr=False):
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+    header = b"\xff\xfb\x90\x00"
+    frame = header + bytes(413)
+    frames = (size - 10) // len(frame)
+    with open(path, "wb") as f:
+        f.write(b"ID3\x03\x00\x00\x00\x00\x00\x00")
+        first = bytearray(frame)
+        if vbr:
+            first[36:48] = b"Xing" + struct.pack(">II", 1, frames)
+        f.write(bytes(first) + frame * 100)
+        f.truncate(10 + frames * len(frame))
+    # Without a frame count, a CBR duration follows from the byte size and bitrate
+    return frames * 1152 / 44100 if vbr else frames * len(frame) * 8 / 128000
+
+def _box(box_type, payload):
+    return struct.pack(">I", 8 + len(payload)) + box_type + payload
+
+def write_m4a(path, size, sample_rate=44100, channels=2):
+    duration = 3 * 3600 + 0.5
+    mvhd = _box(b"mvhd", b"\x00\x00\x00\x00" + struct.pack(">IIII", 0, 0, 1000, int(duration * 1000)) + bytes(80))
+    mdhd = _box(b"mdhd", b"\x00\x00\x00\x00" + struct.pack(">IIII", 0, 0, sample_rate, int(duration * sample_rate)) + bytes(4))
+    hdlr = _box(b"hdlr", bytes(8) + b"soun" + bytes(13))
+    entry = _box(b"mp4a", bytes(6) + struct.pack(">H", 1) + bytes(8)
+                 + struct.pack(">HHHHI", channels, 16, 0, 0, sample_rate << 16))
+    stsd = _box(b"stsd", struct.pack(">II", 0, 1) + entry)
+    trak = _box(b"trak", _box(b"tkhd", bytes(84)) + _box(b"mdia", mdhd + hdlr + _box(b"minf", _box(b"stbl", stsd))))
+    moov = _box(b"moov", mvhd + trak)
+    ftyp = _box(b"ftyp", b"M4A \x00\x00\x00\x00M4A isom")
+
+    mdat_size = size - len(ftyp) - len(moov)
+    with open(path, "wb") as f:
+        f.write(ftyp)
+        # 64-bit box size, as used for mdat boxes over 4 GB
+        f.write(struct.pack(">I", 1) + b"mdat" + struct.pack(">Q", mdat_size))
+        f.seek(len(ftyp) + mdat_size)
+        f.write(moov)
+    return duration
+
+def _ogg_page(granule, serial, sequence, packet):
+    segments = [255] * (len(packet) // 255) + [len(packet) % 255]
+    return (b"OggS" + struct.pack("<BBqIII", 0, 0, granule, serial, sequence, 0)
+            + bytes([len(segments)]) + bytes(segments) + packet)
+
+def write_ogg(path, size, codec):
+    if codec == "vorbis":
+        sample_rate, granule_rate, pre_skip = 44100, 44100, 0
+        head = b"\x01vorbis" + struct.pack("<IBIiii", 0, 2, sample_rate, 0, 96000, 0) + b"\xb8\x01"
+    else:
+        sample_rate, granule_rate, pre_skip = 48000, 48000, 312
+        head = b"OpusHead" + struct.pack("<BBHIhB", 1, 2, pre_skip, 48000, 0, 0)
+    duration = 2 * 3600 + 15.25
+    granule = int(duration * granule_rate) + pre_skip
+
+    last = _ogg_page(granule, 1234, 99999, bytes(200))
+    with open(path, "wb") as f:
+        f.write(_ogg_page(0, 1234, 0, head))
+        f.seek(size - len(last))
+        f.write(last)
+    return duration
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=2048)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["DATABASE_PATH"] = os.path.join(folder, "store.db")
+        os.environ["AUDIO_STORE_FOLDER"] = os.path.join(folder, "audio")
+        from utils.audio_metadata import probe_audio
+
+        size = args.size_mb * 1024 * 1024
+        files = [
+            ("lecture.wav", lambda path: write_wav(path, size)),
+            ("lecture_cbr.mp3", lambda path: write_mp3(path, size)),
+            ("lecture_vbr.mp3", lambda path: write_mp3(path, size, vbr=True)),
+            ("lecture.m4a", lambda path: write_m4a(path, size)),
+            ("lecture_vorbis.ogg", lambda path: write_ogg(path, size, "vorbis")),
+            ("lecture_opus.ogg", lambda path: write_ogg(path, size, "opus"))
+        ]
+
+        print(f"Files of {args.size_mb} MB, probe time is the median of {args.repeat} runs")
+        for name, build in files:
+            path = os.path.join(folder, name)
+            expected = build(path)
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                metadata = probe_audio(path)
+                times.append(time.perf_counter() - start)
+            times.sort()
+            assert metadata is not None and abs(metadata["duration_seconds"] - expected) < 0.05, (name, metadata, expected)
+            print(f"  {name:<20} {times[len(times) // 2] * 1000:6.2f} ms  {metadata['codec']:<10} "
+                  f"{metadata['duration_seconds']:10.2f} s  {metadata['sample_rate']} Hz  "
+                  f"{metadata['channels']} ch  {metadata['bitrate_kbps']} kbps")
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
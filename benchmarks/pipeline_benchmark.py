@@ -0,0 +1,99 @@
+"""
+Offline benchmark of the generation pipeline with the fake AI backend
+
+Runs transcript -> summary, module and quiz (in parallel, like pages/gen.py)
+on a generated recording and prints the wall time per stage and the call
+metrics. No network access is needed.
+
+Usage:
+    python benchmarks/pipeline_benchmark.py --minutes 30 --latency 0.5 --tokens-per-second 200
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_backend import set_backend
+from utils.fake_backend import FakeBackend
+from utils import ai_generator
+
+def write_test_recording(path, minutes, sample_rate=16000):
+    """
+    Write a mono WAV of speech-like noise bursts separated by short pauses
+    """
+    rng = np.random.default_rng(0)
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        for _ in range(int(minutes * 60 / 10)):
+            speech = rng.normal(0, 3000, int(sample_rate * 9)).astype(np.int16)
+            pause = np.zeros(sample_rate, dtype=np.int16)
+            wav.writeframes(speech.tobytes() + pause.tobytes())
+
+def timed(label, results, fn, *args, **kwargs):
+    start = time.perf_counter()
+    value = fn(*args, **kwargs)
+    results[label] = time.perf_counter() - start
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30, help="length of the test recording")
+    parser.add_argument("--latency", type=float, default=0.5, help="simulated time to first byte (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="simulated output throughput")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="simulated retryable error rate (0-1)")
+    parser.add_argument("--questions", type=int, default=10, help="number of quiz questions")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    backend = FakeBackend(
+        latency_seconds=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        seed=args.seed
+    )
+    set_backend(backend)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as folder:
+        audio_path = os.path.join(folder, "lecture.wav")
+        write_test_recording(audio_path, args.minutes)
+
+        start = time.perf_counter()
+        transcript = timed("transcript", timings, ai_generator.generate_transcript, audio_path, use_cache=False)
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = [
+                executor.submit(timed, "summary", timings, ai_generator.generate_summary, transcript, use_cache=False),
+                executor.submit(timed, "module", timings, ai_generator.generate_module, transcript, use_cache=False),
+                executor.submit(timed, "quiz", timings, ai_generator.generate_quiz, transcript,
+                                num_questions=args.questions, use_cache=False)
+            ]
+            for future in futures:
+                future.result()
+        timings["total"] = time.perf_counter() - start
+
+    print(f"Recording: {args.minutes:g} min, transcript: {len(transcript.split())} words")
+    for label, seconds in timings.items():
+        print(f"  {label:<12} {seconds:8.2f} s")
+
+    print("\nCalls per output type:")
+    for (output_type, input_kind), stats in ai_generator.summarize_call_metrics().items():
+        print(f"  {output_type:<12} {input_kind:<10} calls={stats['calls']:<3} errors={stats['errors']:<3} "
+              f"tokens={stats['total_tokens']:<8} p50={stats['p50_latency_seconds'] or 0:.2f}s "
+              f"p95={stats['p95_latency_seconds'] or 0:.2f}s")
+
+    print(f"\nBackend: {backend.stats()}")
+    print(f"Rate limiter: {ai_generator.get_rate_limit_stats()}")
+    print(f"Uploads: {ai_generator.get_upload_stats()}")
+
+if __name__ == "__main__":
+    main()
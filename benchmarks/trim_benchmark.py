@@ -0,0 +1,97 @@
+"""
+Benchmark of silence trimming before AI calls, with the fake AI backend
+
+Generates a classroom-like recording (speech bursts separated by pauses of
+up to --max-pause seconds of low room noise), then:
+
+1. Times trim_silence (energy VAD + writing the trimmed copy) and a cached call
+2. Checks that every speech burst survives and maps back to its original time
+3. Uploads the recording through the Gemini upload registry with and
+   without trimming, and prints the audio seconds, bytes and time uploaded
+
+Usage:
+    python benchmarks/trim_benchmark.py --minutes 60 --max-pause 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_classroom_recording(path, minutes, max_pause, sample_rate=16000):
+    """
+    Write a mono WAV of speech-like bursts and quiet pauses; returns the speech spans in seconds
+    """
+    rng = np.random.default_rng(0)
+    spans = []
+    position = 0.0
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        while position < minutes * 60:
+            pause = rng.uniform(0.3, max_pause)
+            speech = rng.uniform(2, 15)
+            wav.writeframes(rng.normal(0, 30, int(pause * sample_rate)).astype(np.int16).tobytes())
+            wav.writeframes(rng.normal(0, 3000, int(speech * sample_rate)).astype(np.int16).tobytes())
+            start = position + int(pause * sample_rate) / sample_rate
+            position = start + int(speech * sample_rate) / sample_rate
+            spans.append((start, position))
+    return spans
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60, help="length of the test recording")
+    parser.add_argument("--max-pause", type=float, default=20, help="longest pause between speech bursts (s)")
+    parser.add_argument("--upload-mb-per-second", type=float, default=5, help="simulated upload bandwidth")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        os.environ["CACHE_FOLDER"] = os.path.join(folder, "cache")
+        os.environ["DATABASE_PATH"] = os.path.join(folder, "store.db")
+        from utils.ai_backend import set_backend
+        from utils.fake_backend import FakeBackend
+        from utils.gemini_files import UploadRegistry
+        from utils.audio_processor import trim_silence, to_original_time
+
+        audio_path = os.path.join(folder, "lecture.wav")
+        speech_spans = write_classroom_recording(audio_path, args.minutes, args.max_pause)
+
+        report = trim_silence(audio_path)
+        cached = trim_silence(audio_path)
+        print(f"Recording: {report['original_seconds'] / 60:.1f} min, {len(speech_spans)} speech bursts")
+        print(f"  trimmed to {report['trimmed_seconds'] / 60:.1f} min: {report['removed_percent']:.1f}% removed, "
+              f"{report['seconds_saved']:.0f} s of audio saved")
+        print(f"  trim_silence: {report['seconds']:.2f} s "
+              f"({report['original_seconds'] / report['seconds']:.0f}x real time), cached {cached['seconds'] * 1000:.1f} ms")
+
+        # Every burst must lie inside one kept span, and map back exactly
+        offset_map = report["offset_map"]
+        for start, end in speech_spans:
+            span = next(span for span in offset_map
+                        if span["original_start"] <= start + 0.01 and end - 0.01 <= span["original_start"] + span["duration"])
+            trimmed_start = span["start"] + start - span["original_start"]
+            assert abs(to_original_time(offset_map, trimmed_start) - start) < 1e-6
+        print("  all speech kept and mapped back to its original time")
+
+        set_backend(FakeBackend(latency_seconds=0, upload_mb_per_second=args.upload_mb_per_second))
+        for label, trim in (("as recorded", False), ("silence trimmed", True)):
+            registry = UploadRegistry(trim=trim)
+            start = time.perf_counter()
+            remote_file = registry.acquire(audio_path)
+            elapsed = time.perf_counter() - start
+            registry.release(remote_file)
+            stats = registry.stats()
+            print(f"  upload {label:<16} {elapsed:6.2f} s  {stats['bytes_uploaded'] / 1024 / 1024:7.2f} MB  "
+                  f"audio {remote_file.duration_seconds / 60:.1f} min")
+            if trim:
+                print(f"    registry report: {stats['trim_removed_percent']:.1f}% removed, "
+                      f"{stats['trim_audio_seconds_removed']:.0f} s of audio saved")
+
+if __name__ == "__main__":
+    main()
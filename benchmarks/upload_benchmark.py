@@ -0,0 +1,75 @@
+"""
+Benchmark of server uploads against the local stand-in server
+
+Uploads a batch of recordings one at a time with requests' standard
+multipart handling (the previous behaviour, which builds the whole body in
+memory) and then with flask_client.upload_files (streamed bodies, sent
+concurrently over the pooled session), and prints the throughput in MB/s.
+
+Usage:
+    python benchmarks/upload_benchmark.py --files 8 --size-mb 16 --mb-per-second 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import start_server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mb", type=float, default=16)
+    parser.add_argument("--mb-per-second", type=float, default=20, help="bandwidth limit per connection")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as server_folder, tempfile.TemporaryDirectory() as local_folder:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(local_folder, f"recording_{i:02d}.wav")
+            with open(path, "wb") as f:
+                f.write(os.urandom(int(args.size_mb * 1024 * 1024)))
+            paths.append(path)
+        total_mb = args.files * args.size_mb
+
+        server, base_url = start_server(server_folder, mb_per_second=args.mb_per_second)
+        # flask_client reads the server URL from config at import time
+        os.environ["FLASK_SERVER_URL"] = base_url
+        from utils import flask_client
+
+        print(f"{args.files} files x {args.size_mb:g} MB, bandwidth limit {args.mb_per_second:g} MB/s per connection")
+
+        start = time.perf_counter()
+        for path in paths:
+            with open(path, "rb") as f:
+                response = requests.post(f"{base_url}/upload", files={"file": (os.path.basename(path), f)}, timeout=300)
+            assert response.status_code == 200
+        elapsed = time.perf_counter() - start
+        print(f"  sequential, buffered body:  {elapsed:6.2f} s  {total_mb / elapsed:6.1f} MB/s")
+
+        for name in os.listdir(server_folder):
+            os.remove(os.path.join(server_folder, name))
+
+        start = time.perf_counter()
+        results = flask_client.upload_files(paths, max_workers=args.workers)
+        elapsed = time.perf_counter() - start
+        assert all(result["ok"] for result in results), results
+        print(f"  batch of {args.workers}, streamed body: {elapsed:6.2f} s  {total_mb / elapsed:6.1f} MB/s")
+
+        for result in results[:3]:
+            print(f"    {result['filename']}: {result['bytes'] / 1024 / 1024:.1f} MB in {result['seconds']:.2f} s")
+
+        for path in paths:
+            with open(path, "rb") as local, open(os.path.join(server_folder, os.path.basename(path)), "rb") as remote:
+                assert local.read() == remote.read()
+        print("  all uploaded files match the originals")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
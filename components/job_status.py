@@ -0,0 +1,156 @@
+import streamlit as st
+from utils.jobs import job_runner, DONE, FAILED, INTERRUPTED, ACTIVE_STATES
+from utils.session_state import store_output
+from utils.store import store
+from components.stream_view import STREAM_CURSOR
+
+# Nama tampilan jenis output
+OUTPUT_LABELS = {
+    "summary": "Ringkasan",
+    "module": "Modul Pembelajaran",
+    "quiz": "Quiz"
+}
+
+def track_job(job_id):
+    """
+    Ikuti pekerjaan latar belakang di sesi ini
+
+    ID pekerjaan juga disimpan di URL (?job=...), sehingga setelah browser
+    di-refresh atau tersambung ulang hasilnya tetap bisa diambil.
+
+    Parameters:
+    ----------
+    job_id : str
+        ID pekerjaan
+    """
+    if job_id not in st.session_state.jobs:
+        st.session_state.jobs.append(job_id)
+    _save_query_params()
+
+def _save_query_params():
+    if st.session_state.jobs:
+        st.query_params["job"] = ",".join(st.session_state.jobs)
+    elif "job" in st.query_params:
+        del st.query_params["job"]
+
+def apply_job_result(job):
+    """
+    Simpan hasil pekerjaan yang selesai ke session state (sekali per sesi)
+
+    Parameters:
+    ----------
+    job : dict
+        Pekerjaan dari job_runner.get
+
+    Returns:
+    -------
+    bool
+        True jika hasil baru saja disimpan
+    """
+    if job is None or job["status"] != DONE or job["id"] in st.session_state.applied_jobs:
+        return False
+
+    params = job["params"]
+
+    if job["kind"] == "transcription":
+        # Transkrip disimpan untuk audionya, dan dipakai di sesi ini jika audio itu masih dipilih
+        audio_id = job["meta"].get("audio_id")
+        if audio_id and store.get_audio(audio_id) is not None and store.get_transcript(audio_id) is None:
+            store.save_transcript(audio_id, job["result"])
+        
+        audio_info = store.get_audio(st.session_state.selected_audio)
+        if audio_info is None or audio_info["path"] != params["audio_path"]:
+            return False
+        st.session_state.original_transcript = job["result"]
+        st.session_state.edited_transcript = job["result"]
+
+    elif job["kind"] == "generation":
+        source = {
+            "content": params["content"],
+            "is_audio": params["is_audio"],
+            "audio_path": params["audio_path"],
+            "audio_id": job["meta"].get("audio_id"),
+            "filename": job["meta"].get("filename")
+        }
+        for output_type, result in job["result"]["results"].items():
+            store_output(output_type, result, source, params["num_questions"], params["difficulty"])
+
+    st.session_state.applied_jobs.add(job["id"])
+    return True
+
+def sync_jobs():
+    """
+    Ambil hasil pekerjaan yang sudah selesai dan berhenti mengikuti pekerjaan
+    yang tidak aktif lagi; dipanggil sekali di setiap rerun
+    """
+    # Sesi baru (refresh/sambung ulang): lanjutkan pekerjaan dari URL
+    if not st.session_state.jobs and st.query_params.get("job"):
+        st.session_state.jobs = [job_id for job_id in st.query_params["job"].split(",") if job_id]
+
+    tracked = []
+    for job_id in st.session_state.jobs:
+        job = job_runner.get(job_id)
+        if job is None:
+            continue
+
+        if job["status"] in ACTIVE_STATES:
+            tracked.append(job_id)
+        elif job["status"] == DONE:
+            if apply_job_result(job):
+                st.toast(f"✅ {job_title(job)} selesai")
+            elif job["id"] not in st.session_state.applied_jobs:
+                # Hasil belum bisa dipakai (mis. audio lain dipilih), tetap diikuti
+                tracked.append(job_id)
+        else:
+            st.toast(f"❌ {job_title(job)} gagal: {job['error']}")
+
+    if tracked != st.session_state.jobs:
+        st.session_state.jobs = tracked
+        _save_query_params()
+
+def job_title(job):
+    """
+    Judul singkat pekerjaan untuk notifikasi
+    """
+    if job["kind"] == "transcription":
+        return "Transkripsi"
+    output_types = job["params"].get("output_types", [])
+    return "Pembuatan " + ", ".join(OUTPUT_LABELS.get(output_type, output_type) for output_type in output_types)
+
+def is_job_finished(job):
+    """
+    Apakah pekerjaan sudah berhenti (selesai, gagal atau terputus)
+    """
+    return job is not None and job["status"] in (DONE, FAILED, INTERRUPTED)
+
+def render_job_progress(job, show_outputs=True):
+    """
+    Tampilkan progres pekerjaan dan pratinjau output yang sedang dibuat
+
+    Parameters:
+    ----------
+    job : dict
+        Pekerjaan dari job_runner.get
+    show_outputs : bool
+        Tampilkan status dan pratinjau per output (pekerjaan generate)
+    """
+    st.progress(job["progress"])
+    if job["message"]:
+        st.caption(job["message"])
+
+    if not show_outputs:
+        return
+
+    for output_type, output in job["partial"].get("outputs", {}).items():
+        label = OUTPUT_LABELS.get(output_type, output_type)
+
+        if output["status"] == "done":
+            st.success(f"✅ {label} selesai")
+        elif output["status"] == "failed":
+            st.error(f"❌ {label} gagal dibuat: {output['error']}")
+        else:
+            st.info(f"⏳ Memproses {label}...")
+
+        if output["text"] and output["status"] == "running":
+            with st.expander(f"Pratinjau {label}", expanded=True):
+                st.markdown(output["text"] + STREAM_CURSOR)
@@ -0,0 +1,47 @@
+import streamlit as st
+import time
+
+STREAM_CURSOR = "▌"
+
+def render_markdown_stream(chunks, placeholder=None, min_interval=0.1):
+    """
+    Render markdown progressively while text chunks arrive
+
+    Parameters:
+    ----------
+    chunks : iterable
+        Iterable of text chunks (e.g. from stream_module)
+    placeholder : streamlit element
+        Placeholder to render into (if None, a new one is created)
+    min_interval : float
+        Minimum seconds between re-renders, to avoid redrawing on every chunk
+
+    Returns:
+    -------
+    str
+        Full text
+    dict
+        Timings in seconds: "ttft" (time to first token) and "total"
+    """
+    if placeholder is None:
+        placeholder = st.empty()
+
+    start = time.perf_counter()
+    ttft = None
+    last_render = 0
+    parts = []
+
+    for chunk in chunks:
+        if ttft is None:
+            ttft = time.perf_counter() - start
+        parts.append(chunk)
+
+        now = time.perf_counter()
+        if now - last_render >= min_interval:
+            placeholder.markdown("".join(parts) + STREAM_CURSOR)
+            last_render = now
+
+    text = "".join(parts)
+    placeholder.markdown(text)
+
+    return text, {"ttft": ttft, "total": time.perf_counter() - start}
@@ -10,6 +10,27 @@ GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 # Flask server URL
 FLASK_SERVER_URL = os.getenv("FLASK_SERVER_URL", "http://localhost:5000")
 
+# HTTP client settings for the Flask server (pooled keep-alive session)
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+
+# Server downloads: Range segments for large files, resumed from a .part file after failures
+DOWNLOAD_CHUNK_MIN_KB = int(os.getenv("DOWNLOAD_CHUNK_MIN_KB", "64"))
+DOWNLOAD_CHUNK_MAX_KB = int(os.getenv("DOWNLOAD_CHUNK_MAX_KB", "4096"))
+DOWNLOAD_PARALLEL_MIN_MB = float(os.getenv("DOWNLOAD_PARALLEL_MIN_MB", "8"))
+DOWNLOAD_SEGMENTS = int(os.getenv("DOWNLOAD_SEGMENTS", "4"))
+DOWNLOAD_MAX_ATTEMPTS = int(os.getenv("DOWNLOAD_MAX_ATTEMPTS", "5"))
+
+# Server uploads: streamed multipart bodies, batches sent concurrently over the pooled session
+UPLOAD_CHUNK_KB = int(os.getenv("UPLOAD_CHUNK_KB", "256"))
+UPLOAD_MAX_WORKERS = int(os.getenv("UPLOAD_MAX_WORKERS", "4"))
+
+# Seconds the server file listing (and server status) is reused before asking the server again
+FILE_LIST_TTL_SECONDS = float(os.getenv("FILE_LIST_TTL_SECONDS", "30"))
+
 # Gemini model configuration
 GEMINI_MODEL = "gemini-2.0-flash-thinking-exp-01-21"
 GEMINI_CONFIG_SUMMARY = {
@@ -31,19 +52,159 @@ GEMINI_CONFIG_MODULE = {
     'top_k': 0
 }
 
+# Structure the quiz response must follow (structured JSON output)
+QUIZ_RESPONSE_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'quiz': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'question': {'type': 'STRING'},
+                    'options': {
+                        'type': 'OBJECT',
+                        'properties': {
+                            'a': {'type': 'STRING'},
+                            'b': {'type': 'STRING'},
+                            'c': {'type': 'STRING'},
+                            'd': {'type': 'STRING'}
+                        },
+                        'required': ['a', 'b', 'c', 'd']
+                    },
+                    'correct_answer': {'type': 'STRING', 'format': 'enum', 'enum': ['a', 'b', 'c', 'd']},
+                    'correct_text': {'type': 'STRING'},
+                    'explanation': {'type': 'STRING'}
+                },
+                'required': ['question', 'options', 'correct_answer', 'correct_text', 'explanation']
+            }
+        }
+    },
+    'required': ['quiz']
+}
+
 GEMINI_CONFIG_QUIZ = {
     'temperature': 0.05,
-    'max_output_tokens': 100000
+    'max_output_tokens': 100000,
+    'response_mime_type': 'application/json',
+    'response_schema': QUIZ_RESPONSE_SCHEMA
+}
+
+# Used when summary, module and quiz are requested in a single combined call
+GEMINI_CONFIG_COMBINED = {
+    'max_output_tokens': 300000,
+    'temperature': 0.1,
+    'top_p': 1.0,
+    'top_k': 0
 }
 
+# Generation backend: "gemini", or "fake" for offline runs and benchmarks
+AI_BACKEND = os.getenv("AI_BACKEND", "gemini").lower()
+
+# Simulated behaviour of the fake backend
+FAKE_AI_LATENCY_SECONDS = float(os.getenv("FAKE_AI_LATENCY_SECONDS", "0.5"))
+FAKE_AI_TOKENS_PER_SECOND = float(os.getenv("FAKE_AI_TOKENS_PER_SECOND", "200"))
+FAKE_AI_ERROR_RATE = float(os.getenv("FAKE_AI_ERROR_RATE", "0"))
+FAKE_AI_UPLOAD_MB_PER_SECOND = float(os.getenv("FAKE_AI_UPLOAD_MB_PER_SECOND", "20"))
+FAKE_AI_SEED = int(os.getenv("FAKE_AI_SEED", "0"))
+
+# Build pooled Gemini models and open the connection when the app starts
+AI_WARM_UP_ON_START = os.getenv("AI_WARM_UP_ON_START", "true").lower() == "true"
+
+# Maximum number of outputs (summary, module, quiz) generated at the same time
+GENERATION_MAX_WORKERS = int(os.getenv("GENERATION_MAX_WORKERS", "3"))
+
+# Long recordings are transcribed in overlapping segments cut at silences
+TRANSCRIBE_SEGMENT_SECONDS = int(os.getenv("TRANSCRIBE_SEGMENT_SECONDS", "300"))
+TRANSCRIBE_OVERLAP_SECONDS = float(os.getenv("TRANSCRIBE_OVERLAP_SECONDS", "3"))
+TRANSCRIBE_SILENCE_SEARCH_SECONDS = float(os.getenv("TRANSCRIBE_SILENCE_SEARCH_SECONDS", "20"))
+TRANSCRIBE_MAX_WORKERS = int(os.getenv("TRANSCRIBE_MAX_WORKERS", "4"))
+TRANSCRIBE_SEGMENT_RETRIES = int(os.getenv("TRANSCRIBE_SEGMENT_RETRIES", "2"))
+
+# Transcripts above the token budget are summarized chunk by chunk (map-reduce)
+TRANSCRIPT_TOKEN_BUDGET = int(os.getenv("TRANSCRIPT_TOKEN_BUDGET", "32000"))
+TRANSCRIPT_CHUNK_TOKENS = int(os.getenv("TRANSCRIPT_CHUNK_TOKENS", "8000"))
+MAP_MAX_WORKERS = int(os.getenv("MAP_MAX_WORKERS", "4"))
+
+# Maximum in-flight requests for the async API, shared by all sessions
+ASYNC_MAX_CONCURRENCY = int(os.getenv("ASYNC_MAX_CONCURRENCY", "8"))
+
+# Follow-up calls that regenerate only the invalid quiz questions
+QUIZ_REPAIR_ATTEMPTS = int(os.getenv("QUIZ_REPAIR_ATTEMPTS", "2"))
+
+# Large quizzes are generated in parallel batches over slices of the source
+QUIZ_BATCH_SIZE = int(os.getenv("QUIZ_BATCH_SIZE", "5"))
+QUIZ_MAX_WORKERS = int(os.getenv("QUIZ_MAX_WORKERS", "4"))
+QUIZ_DUPLICATE_THRESHOLD = float(os.getenv("QUIZ_DUPLICATE_THRESHOLD", "0.85"))
+
+# Process-wide Gemini quota (requests and tokens per minute) and retry policy
+GEMINI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+GEMINI_TOKENS_PER_MINUTE = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "5"))
+GEMINI_RETRY_BASE_DELAY = float(os.getenv("GEMINI_RETRY_BASE_DELAY", "1"))
+GEMINI_RETRY_MAX_DELAY = float(os.getenv("GEMINI_RETRY_MAX_DELAY", "60"))
+# File uploads are limited separately from generate requests
+GEMINI_UPLOADS_PER_MINUTE = int(os.getenv("GEMINI_UPLOADS_PER_MINUTE", "60"))
+
+# Per-call token and latency records (METRICS_LOG_FILE appends every record as a JSON line)
+METRICS_MAX_RECORDS = int(os.getenv("METRICS_MAX_RECORDS", "10000"))
+METRICS_LOG_FILE = os.getenv("METRICS_LOG_FILE") or None
+# Also count prompt tokens with the API before each call (one extra request per call)
+METRICS_COUNT_TOKENS = os.getenv("METRICS_COUNT_TOKENS", "false").lower() == "true"
+
+# Gemini file upload reuse (seconds an unreferenced remote file is kept)
+UPLOAD_IDLE_TTL_SECONDS = int(os.getenv("UPLOAD_IDLE_TTL_SECONDS", "3600"))
+
+# Compact audio before uploading it to Gemini: mono, resampled to a speech
+# sample rate, and encoded as Opus when ffmpeg is installed (16-bit PCM WAV otherwise).
+# Opus supports 8000, 12000, 16000, 24000 and 48000 Hz
+AUDIO_COMPACT_ENABLED = os.getenv("AUDIO_COMPACT_ENABLED", "true").lower() == "true"
+AUDIO_COMPACT_SAMPLE_RATE = int(os.getenv("AUDIO_COMPACT_SAMPLE_RATE", "16000"))
+AUDIO_COMPACT_BITRATE_KBPS = int(os.getenv("AUDIO_COMPACT_BITRATE_KBPS", "24"))
+
+# Silence trimming before AI calls: windows quieter than the threshold (dB
+# above the recording's noise floor, and never below the absolute floor) are
+# silence; silences longer than MIN_SILENCE are shortened to KEEP_SILENCE,
+# leaving PAD of audio around speech
+SILENCE_TRIM_ENABLED = os.getenv("SILENCE_TRIM_ENABLED", "true").lower() == "true"
+SILENCE_TRIM_WINDOW_SECONDS = float(os.getenv("SILENCE_TRIM_WINDOW_SECONDS", "0.03"))
+SILENCE_TRIM_THRESHOLD_DB = float(os.getenv("SILENCE_TRIM_THRESHOLD_DB", "10"))
+SILENCE_TRIM_FLOOR_DBFS = float(os.getenv("SILENCE_TRIM_FLOOR_DBFS", "-55"))
+SILENCE_TRIM_MIN_SILENCE_SECONDS = float(os.getenv("SILENCE_TRIM_MIN_SILENCE_SECONDS", "1.0"))
+SILENCE_TRIM_KEEP_SILENCE_SECONDS = float(os.getenv("SILENCE_TRIM_KEEP_SILENCE_SECONDS", "0.4"))
+SILENCE_TRIM_PAD_SECONDS = float(os.getenv("SILENCE_TRIM_PAD_SECONDS", "0.2"))
+
 # File upload settings
 ALLOWED_AUDIO_EXTENSIONS = {"wav", "mp3", "m4a", "ogg"}
-MAX_UPLOAD_SIZE_MB = 50
+# Full-day recordings are several hundred MB; also raise server.maxUploadSize
+# in .streamlit/config.toml when changing this
+MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", "2048"))
+# Block size for streaming uploads and downloads into the audio store
+INGEST_CHUNK_KB = int(os.getenv("INGEST_CHUNK_KB", "1024"))
+
+# Background jobs (transcription and generation run outside the page script)
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_RETENTION_HOURS = int(os.getenv("JOB_RETENTION_HOURS", "24"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
 
 # Paths
 UPLOAD_FOLDER = "uploads"
+# Content-addressed audio store (one file per unique recording)
+AUDIO_STORE_FOLDER = os.getenv("AUDIO_STORE_FOLDER", os.path.join(UPLOAD_FOLDER, "audio"))
 TEMP_FOLDER = "temp"
+CACHE_FOLDER = os.getenv("CACHE_FOLDER", "cache")
+DATA_FOLDER = os.getenv("DATA_FOLDER", "data")
+
+# Persistent store (audio, transcripts, results, quizzes)
+DATABASE_PATH = os.getenv("DATABASE_PATH", os.path.join(DATA_FOLDER, "smart_classroom.db"))
+
+# AI result cache settings
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MAX_MB = int(os.getenv("RESULT_CACHE_MAX_MB", "200"))
 
 # Ensure directories exist
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(TEMP_FOLDER, exist_ok=True)
\ No newline at end of file
+os.makedirs(AUDIO_STORE_FOLDER, exist_ok=True)
+os.makedirs(TEMP_FOLDER, exist_ok=True)
+os.makedirs(CACHE_FOLDER, exist_ok=True)
+os.makedirs(DATA_FOLDER, exist_ok=True)
\ No newline at end of file
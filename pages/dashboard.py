@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 import random
 from utils.session_state import change_page
+from utils.store import store
 
 def render_dashboard():
     """
@@ -56,18 +57,18 @@ def render_teacher_dashboard():
     st.markdown("Dashboard ini menampilkan ringkasan aktivitas dan materi pembelajaran Anda.")
     
     # Quick Stats
+    audio_count = store.count_audio()
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.info(f"**🎙️ Audio**\n\n{len(st.session_state.audio_files)} file")
+        st.info(f"**🎙️ Audio**\n\n{audio_count} file")
     
     with col2:
-        quiz_count = len(st.session_state.quizzes)
+        quiz_count = store.count_quizzes()
         st.success(f"**❓ Quiz**\n\n{quiz_count} quiz aktif")
     
     with col3:
-        # Sample data for module count
-        module_count = sum(1 for _ in st.session_state.audio_files)
+        module_count = store.count_results("module")
         st.warning(f"**📚 Modul**\n\n{module_count} modul")
     
     st.markdown('</div>', unsafe_allow_html=True)
@@ -77,7 +78,7 @@ def render_teacher_dashboard():
     st.markdown("## 📊 Aktivitas Terbaru")
     
     # Create some sample activity data if none exists
-    if len(st.session_state.audio_files) == 0:
+    if audio_count == 0:
         # Sample data
         sample_data = [
             {"activity": "Upload audio", "item": "materi_biologi.mp3", "date": (datetime.now() - timedelta(days=2)).strftime("%d/%m/%Y %H:%M")},
@@ -87,27 +88,8 @@ def render_teacher_dashboard():
         
         activity_df = pd.DataFrame(sample_data)
     else:
-        # Convert actual activity from session state
-        activities = []
-        for audio_id, audio_info in st.session_state.audio_files.items():
-            activities.append({
-                "activity": "Upload audio", 
-                "item": audio_info.get("filename", f"audio_{audio_id}"),
-                "date": audio_info.get("timestamp", datetime.now().strftime("%d/%m/%Y %H:%M"))
-            })
-            
-        for quiz_id, quiz_info in st.session_state.quizzes.items():
-            activities.append({
-                "activity": "Create Quiz",
-                "item": f"Quiz {quiz_id}",
-                "date": quiz_info.get("created_at", datetime.now().strftime("%d/%m/%Y %H:%M"))
-            })
-            
-        activity_df = pd.DataFrame(activities)
-        
-        # Sort by date (newest first)
-        if not activity_df.empty and "date" in activity_df.columns:
-            activity_df = activity_df.sort_values(by="date", ascending=False)
+        # Newest activity from the store (already sorted by date, newest first)
+        activity_df = pd.DataFrame(store.recent_activity(limit=20))
     
     # Display activity table
     if not activity_df.empty:
@@ -130,7 +112,7 @@ def render_teacher_dashboard():
     
     with col2:
         if st.button("❓ Buat Quiz Baru", use_container_width=True):
-            if not st.session_state.audio_files:
+            if audio_count == 0:
                 st.error("Anda perlu mengupload audio terlebih dahulu untuk membuat quiz.")
             else:
                 change_page("upload")  # Start the wizard process
@@ -151,7 +133,7 @@ def render_student_dashboard():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        available_quiz = len(st.session_state.quizzes)
+        available_quiz = store.count_quizzes()
         st.info(f"**❓ Quiz Tersedia**\n\n{available_quiz} quiz")
     
     with col2:
@@ -170,8 +152,11 @@ def render_student_dashboard():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("## ❓ Quiz Tersedia")
     
-    if st.session_state.quizzes:
-        for quiz_id, quiz_info in st.session_state.quizzes.items():
+    quizzes = store.list_quizzes()
+    
+    if quizzes:
+        for quiz_info in quizzes:
+            quiz_id = quiz_info["id"]
             col1, col2 = st.columns([3, 1])
             
             with col1:
@@ -194,7 +179,9 @@ def render_student_dashboard():
     st.markdown("## 📚 Materi Pembelajaran")
     
     # Sample data for learning materials
-    if not st.session_state.audio_files:
+    audio_files = store.list_audio()
+    
+    if not audio_files:
         materials = [
             {"title": "Biologi Dasar - Struktur Sel", "type": "Module", "date": "12/04/2025"},
             {"title": "Fisika - Hukum Newton", "type": "Summary", "date": "15/04/2025"},
@@ -205,11 +192,11 @@ def render_student_dashboard():
         st.table(materials_df)
     else:
         materials = []
-        for audio_id, audio_info in st.session_state.audio_files.items():
+        for audio_info in audio_files:
             materials.append({
-                "title": audio_info.get("filename", f"Material {audio_id}").replace(".mp3", "").replace(".wav", ""),
+                "title": audio_info["filename"].replace(".mp3", "").replace(".wav", ""),
                 "type": "Audio Material",
-                "date": audio_info.get("timestamp", datetime.now().strftime("%d/%m/%Y"))
+                "date": audio_info.get("timestamp") or datetime.now().strftime("%d/%m/%Y")
             })
             
         materials_df = pd.DataFrame(materials)
@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from utils.store import store
+from utils.ai_generator import stream_module
+from components.stream_view import render_markdown_stream
 
 def render_module():
     """
@@ -11,11 +14,23 @@ def render_module():
     # Module card
     st.markdown('<div class="card">', unsafe_allow_html=True)
     
-    if not st.session_state.module_result:
+    # Show this session's module, or the newest one saved
+    module = store.get_result(st.session_state.module_id or store.latest_result_id("module"))
+    
+    if module is None:
         st.info("Belum ada modul yang dibuat. Silakan buat modul terlebih dahulu melalui proses upload audio.")
     else:
-        # Display the module
-        st.markdown(st.session_state.module_result)
+        # Display the module (streamed progressively when regenerating)
+        module_placeholder = st.empty()
+        module_placeholder.markdown(module["content"])
+        
+        timings = st.session_state.generation_timings.get("module")
+        if timings and timings.get("ttft") is not None:
+            st.caption(f"Token pertama: {timings['ttft']:.1f} dtk | Total: {timings.get('total', 0):.1f} dtk")
+        
+        if st.session_state.user_type == "teacher" and module["source"]:
+            if st.button("🔄 Buat Ulang Modul", key="regenerate_module"):
+                regenerate_module(module, module_placeholder)
         
         # Download buttons
         col1, col2 = st.columns(2)
@@ -23,7 +38,7 @@ def render_module():
         with col1:
             st.download_button(
                 label="📥 Download Modul (MD)",
-                data=st.session_state.module_result,
+                data=module["content"],
                 file_name=f"modul_{datetime.now().strftime('%Y%m%d_%H%M')}.md",
                 mime="text/markdown"
             )
@@ -39,6 +54,30 @@ def render_module():
     if st.session_state.user_type == "teacher":
         render_module_history()
 
+def regenerate_module(module, placeholder):
+    """
+    Regenerate a module from its source, rendering the markdown as it streams in
+    """
+    source = module["source"]
+    
+    try:
+        chunks = stream_module(
+            source["content"],
+            is_audio=source["is_audio"],
+            audio_file_path=source["audio_path"],
+            use_cache=False
+        )
+        module_text, timings = render_markdown_stream(chunks, placeholder)
+    except Exception as e:
+        st.error(f"Terjadi kesalahan saat membuat ulang modul: {str(e)}")
+        return
+    
+    st.session_state.module_id = store.add_result(
+        "module", module_text, audio_id=module["audio_id"], title=module["title"], source=source
+    )
+    st.session_state.generation_timings["module"] = timings
+    st.rerun()
+
 def render_module_history():
     """
     Render history of previously generated modules
@@ -46,28 +85,20 @@ def render_module_history():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("## Riwayat Modul")
     
-    # In a real app, this would be stored in a database
-    # For demo, we'll create sample data
+    history = store.list_results("module")
     
-    # If we have actual data in session state, use that
-    if len(st.session_state.audio_files) > 0:
-        history_data = []
-        
-        for audio_id, audio_info in st.session_state.audio_files.items():
-            # Only show entries that would have modules (in a real app)
-            if "module" in st.session_state.output_types:
-                history_data.append({
-                    "title": audio_info.get("filename", "").replace(".mp3", "").replace(".wav", ""),
-                    "tanggal": audio_info.get("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M")),
-                    "panjang": "~1500 kata",  # In a real app, calculate this
-                    "id": audio_id
-                })
-        
-        if history_data:
-            df = pd.DataFrame(history_data)
-            st.dataframe(df[["title", "tanggal", "panjang"]], use_container_width=True)
-        else:
-            st.info("Belum ada riwayat modul.")
+    if history:
+        df = pd.DataFrame([
+            {
+                "title": (row["title"] or "").replace(".mp3", "").replace(".wav", ""),
+                "tanggal": row["created_at"],
+                "panjang": f"{row['word_count']} kata"
+            }
+            for row in history
+        ])
+        st.dataframe(df, use_container_width=True)
+    elif store.count_audio() > 0:
+        st.info("Belum ada riwayat modul.")
     else:
         # Sample data for demonstration
         sample_data = [
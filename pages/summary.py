@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from utils.store import store
 
 def render_summary():
     """
@@ -11,11 +12,14 @@ def render_summary():
     # Summary card
     st.markdown('<div class="card">', unsafe_allow_html=True)
     
-    if not st.session_state.summary_result:
+    # Show this session's summary, or the newest one saved
+    summary = store.get_result(st.session_state.summary_id or store.latest_result_id("summary"))
+    
+    if summary is None:
         st.info("Belum ada ringkasan yang dibuat. Silakan buat ringkasan terlebih dahulu melalui proses upload audio.")
     else:
         # Display the summary
-        st.markdown(st.session_state.summary_result)
+        st.markdown(summary["content"])
         
         # Download buttons
         col1, col2 = st.columns(2)
@@ -23,7 +27,7 @@ def render_summary():
         with col1:
             st.download_button(
                 label="📥 Download Ringkasan (MD)",
-                data=st.session_state.summary_result,
+                data=summary["content"],
                 file_name=f"ringkasan_{datetime.now().strftime('%Y%m%d_%H%M')}.md",
                 mime="text/markdown"
             )
@@ -46,28 +50,20 @@ def render_summary_history():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("## Riwayat Ringkasan")
     
-    # In a real app, this would be stored in a database
-    # For demo, we'll create sample data
+    history = store.list_results("summary")
     
-    # If we have actual data in session state, use that
-    if len(st.session_state.audio_files) > 0:
-        history_data = []
-        
-        for audio_id, audio_info in st.session_state.audio_files.items():
-            # Only show entries that would have summaries (in a real app)
-            if "summary" in st.session_state.output_types:
-                history_data.append({
-                    "title": audio_info.get("filename", "").replace(".mp3", "").replace(".wav", ""),
-                    "date": audio_info.get("timestamp", datetime.now().strftime("%Y-%m-%d %H:%M")),
-                    "words": "~500 kata",  # In a real app, calculate this
-                    "id": audio_id
-                })
-        
-        if history_data:
-            df = pd.DataFrame(history_data)
-            st.dataframe(df[["title", "date", "words"]], use_container_width=True)
-        else:
-            st.info("Belum ada riwayat ringkasan.")
+    if history:
+        df = pd.DataFrame([
+            {
+                "title": (row["title"] or "").replace(".mp3", "").replace(".wav", ""),
+                "date": row["created_at"],
+                "words": f"{row['word_count']} kata"
+            }
+            for row in history
+        ])
+        st.dataframe(df, use_container_width=True)
+    elif store.count_audio() > 0:
+        st.info("Belum ada riwayat ringkasan.")
     else:
         # Sample data for demonstration
         sample_data = [
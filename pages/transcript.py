@@ -1,7 +1,11 @@
 import streamlit as st
 import time
+from config import JOB_POLL_SECONDS
 from utils.session_state import change_page
-from utils.ai_generator import generate_transcript
+from utils.store import store
+from utils.jobs import job_runner, DONE
+from utils.generation_jobs import submit_transcription
+from components.job_status import track_job, apply_job_result, is_job_finished, render_job_progress
 from utils.text_processor import compare_texts, generate_highlighted_html, count_words
 from components.wizard_progress import render_wizard_progress, render_wizard_nav_buttons
 
@@ -18,7 +22,8 @@ def render_transcript():
         return
     
     # Ensure we have a selected audio
-    if not st.session_state.selected_audio or st.session_state.selected_audio not in st.session_state.audio_files:
+    audio_info = store.get_audio(st.session_state.selected_audio)
+    if audio_info is None:
         st.error("Tidak ada file audio yang dipilih. Silakan pilih file audio terlebih dahulu.")
         st.button("Kembali ke Upload", on_click=lambda: change_page("upload"))
         return
@@ -31,9 +36,6 @@ def render_transcript():
         step_titles=step_titles
     )
     
-    # Get selected audio info
-    audio_info = st.session_state.audio_files[st.session_state.selected_audio]
-    
     # Display audio information
     st.markdown('<div class="card">', unsafe_allow_html=True)
     col1, col2 = st.columns([3, 1])
@@ -51,54 +53,42 @@ def render_transcript():
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown("### Transkripsi Audio")
     
+    # Reuse a transcript saved earlier for this audio
+    if not st.session_state.original_transcript:
+        saved = store.get_transcript(audio_info['id'])
+        if saved is not None:
+            st.session_state.original_transcript = saved['original']
+            st.session_state.edited_transcript = saved['edited']
+            st.session_state.transcript_stats, _ = compare_texts(saved['original'], saved['edited'])
+    
     # If we don't have a transcript yet, generate it
     if not st.session_state.original_transcript:
+        job = job_runner.get(st.session_state.transcript_job_id) if st.session_state.transcript_job_id else None
+        
+        if job is not None and not is_job_finished(job):
+            # Transcription runs in the background; poll it until it finishes
+            st.info("Mentranskripsikan audio... Ini mungkin memerlukan waktu beberapa menit. "
+                    "Anda boleh berpindah halaman, transkrip akan disimpan otomatis setelah selesai.")
+            render_job_progress(job, show_outputs=False)
+            time.sleep(JOB_POLL_SECONDS)
+            st.rerun()
+        
+        elif job is not None:
+            st.session_state.transcript_job_id = None
+            if job["status"] == DONE and apply_job_result(job):
+                st.rerun()
+            elif job["status"] != DONE:
+                st.error(f"Terjadi kesalahan saat mentranskripsikan audio: {job['error']}")
+        
         if st.button("Mulai Transkripsi", key="start_transcript"):
-            with st.spinner("Mentranskripsikan audio... Ini mungkin memerlukan waktu beberapa menit."):
-                try:
-                    # In a real app, we would call the Gemini API here
-                    # For this demo, simulate a delay and use sample text
-                    # transcript = generate_transcript(audio_info['path'])
-                    
-                    # Simulate API call
-                    progress_bar = st.progress(0)
-                    for i in range(100):
-                        time.sleep(0.05)
-                        progress_bar.progress(i + 1)
-                    
-                    # Sample transcript (in real app, this would come from the API)
-                    transcript = """
-                    Selamat datang di pelajaran tentang Fotosintesis. Fotosintesis adalah proses pembuatan makanan oleh tumbuhan hijau dengan bantuan cahaya matahari.
-
-                    Proses ini terjadi di organel sel tumbuhan yang disebut kloroplas, yang mengandung pigmen hijau yang kita kenal sebagai klorofil. Klorofil inilah yang memberikan warna hijau pada tumbuhan dan berperan penting dalam menangkap energi cahaya matahari.
-
-                    Dalam fotosintesis, tumbuhan mengambil karbon dioksida (CO2) dari udara melalui stomata pada daun dan air (H2O) dari tanah melalui akar. Dengan bantuan energi cahaya matahari, tumbuhan mengubah CO2 dan H2O menjadi glukosa (C6H12O6) dan melepaskan oksigen (O2) sebagai produk sampingan.
-
-                    Fotosintesis dapat dirangkum dalam persamaan kimia berikut:
-                    6 CO2 + 6 H2O + Energi Cahaya → C6H12O6 + 6 O2
-
-                    Proses fotosintesis terdiri dari dua tahap utama:
-                    1. Reaksi terang: Terjadi ketika ada cahaya matahari. Pada tahap ini, energi dari matahari diubah menjadi energi kimia dalam bentuk ATP dan NADPH.
-                    2. Reaksi gelap atau siklus Calvin: Tidak memerlukan cahaya langsung. Pada tahap ini, CO2 diubah menjadi glukosa menggunakan ATP dan NADPH yang dihasilkan dari reaksi terang.
-
-                    Fotosintesis sangat penting bagi kehidupan di Bumi karena:
-                    - Menyediakan makanan bagi tumbuhan dan secara tidak langsung bagi semua organisme lain
-                    - Menghasilkan oksigen yang diperlukan untuk respirasi sebagian besar organisme
-                    - Mengurangi kadar CO2 di atmosfer, yang membantu mengurangi efek rumah kaca
-                    
-                    Faktor-faktor yang memengaruhi laju fotosintesis antara lain:
-                    - Intensitas cahaya
-                    - Konsentrasi CO2
-                    - Suhu
-                    - Ketersediaan air
-                    - Jumlah klorofil
-                    """
-                    
-                    st.session_state.original_transcript = transcript
-                    st.session_state.edited_transcript = transcript
-                    st.rerun()
-                except Exception as e:
-                    st.error(f"Terjadi kesalahan saat mentranskripsikan audio: {str(e)}")
+            try:
+                job_id = submit_transcription(audio_info['path'], meta={"audio_id": audio_info['id'], "filename": audio_info['filename']})
+                
+                st.session_state.transcript_job_id = job_id
+                track_job(job_id)
+                st.rerun()
+            except Exception as e:
+                st.error(f"Terjadi kesalahan saat mentranskripsikan audio: {str(e)}")
     else:
         # Show both original and edited transcript
         tab1, tab2 = st.tabs(["Edit Transkrip", "Bandingkan Perubahan"])
@@ -112,6 +102,7 @@ def render_transcript():
             
             if edited_transcript != st.session_state.edited_transcript:
                 st.session_state.edited_transcript = edited_transcript
+                store.update_transcript(audio_info['id'], edited_transcript)
                 
                 # Calculate statistics
                 stats, diff = compare_texts(st.session_state.original_transcript, edited_transcript)
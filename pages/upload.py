@@ -1,10 +1,10 @@
 import streamlit as st
-import os
-from utils.audio_processor import save_uploaded_file, is_valid_audio_file
-from utils.flask_client import get_file_list, download_file, check_server_status
-from utils.session_state import change_page
+from config import MAX_UPLOAD_SIZE_MB
+from utils.audio_processor import save_uploaded_file, fetch_server_file, is_valid_audio_file
+from utils.flask_client import get_file_list, check_server_status
+from utils.session_state import change_page, select_audio
+from utils.store import store
 from components.wizard_progress import render_wizard_progress, render_wizard_nav_buttons
-from datetime import datetime
 
 def render_upload():
     """
@@ -35,7 +35,7 @@ def render_upload():
     st.markdown('</div>', unsafe_allow_html=True)
     
     # If we have audio files, show next step options
-    if st.session_state.audio_files and st.session_state.wizard_step == 1:
+    if st.session_state.selected_audio and st.session_state.wizard_step == 1:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Pilih Jalur Pemrosesan")
         
@@ -85,15 +85,21 @@ def render_local_upload():
     """
     st.subheader("Upload File Audio")
     
-    st.markdown("""
+    st.markdown(f"""
     Upload file audio dari perangkat Anda.
     
     **Format yang didukung:** WAV, MP3, M4A, OGG
-    **Ukuran maksimum:** 50 MB
+    **Ukuran maksimum:** {MAX_UPLOAD_SIZE_MB} MB
     """)
     
     uploaded_file = st.file_uploader("Pilih file audio", type=["wav", "mp3", "m4a", "ogg"])
     
+    # The uploader keeps its file across reruns; save each upload only once
+    if uploaded_file is not None and uploaded_file.file_id == st.session_state.get("saved_upload_id"):
+        st.success(f"File {uploaded_file.name} berhasil diupload!")
+        st.audio(uploaded_file)
+        return
+    
     if uploaded_file is not None:
         # Check if file is valid
         if not is_valid_audio_file(uploaded_file):
@@ -102,24 +108,33 @@ def render_local_upload():
         
         # Save uploaded file
         with st.spinner("Menyimpan file..."):
-            file_path, file_info = save_uploaded_file(uploaded_file)
+            file_path, file_info = save_uploaded_file(uploaded_file, owner=st.session_state.session_id)
             
             if file_path and file_info:
-                # Add to session state
-                st.session_state.audio_files[file_info["id"]] = file_info
-                st.session_state.selected_audio = file_info["id"]
+                # Save to the store
+                select_audio(store.add_audio(file_info))
+                st.session_state.saved_upload_id = uploaded_file.file_id
                 
                 st.success(f"File {uploaded_file.name} berhasil diupload!")
+                if file_info["is_duplicate"]:
+                    st.info("Rekaman ini sudah pernah diupload; salinan dan hasil yang sudah ada akan digunakan.")
                 st.audio(file_path)
 
 def render_server_files():
     """
     Render interface for files available on the Flask server
     """
-    st.subheader("Audio dari Server")
+    col1, col2 = st.columns([0.8, 0.2])
+    
+    with col1:
+        st.subheader("Audio dari Server")
+    
+    with col2:
+        # The listing is cached between reruns; this asks the server again
+        refresh = st.button("🔄 Muat Ulang", key="refresh_server_files")
     
     # Check server connectivity
-    server_online = check_server_status()
+    server_online = check_server_status(use_cache=not refresh)
     
     if not server_online:
         st.error("Tidak dapat terhubung ke server. Pastikan server berjalan dan dapat diakses.")
@@ -127,7 +142,7 @@ def render_server_files():
     
     # Get list of files from server
     with st.spinner("Mengambil daftar file dari server..."):
-        files = get_file_list()
+        files = get_file_list(force_refresh=refresh)
     
     if not files:
         st.info("Tidak ada file audio di server. Upload file melalui ESP32 atau tab Upload dari Perangkat.")
@@ -153,26 +168,12 @@ def render_server_files():
         with col3:
             if st.button("Pilih", key=f"select_server_{i}"):
                 with st.spinner(f"Mengunduh {filename}..."):
-                    # Download the file
-                    temp_path = os.path.join("temp", filename)
-                    download_path = download_file(filename, temp_path)
+                    # Download the file (skipped if the store already has it)
+                    download_path, file_info = fetch_server_file(filename, owner=st.session_state.session_id)
                     
                     if download_path:
-                        # Create file info
-                        file_id = f"server_{i}"
-                        file_info = {
-                            "id": file_id,
-                            "filename": filename,
-                            "path": download_path,
-                            "size": size,
-                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "duration": "Unknown",  # In a real app, extract this from audio metadata
-                            "source": "server"
-                        }
-                        
-                        # Add to session state
-                        st.session_state.audio_files[file_id] = file_info
-                        st.session_state.selected_audio = file_id
+                        # Save to the store
+                        select_audio(store.add_audio(file_info))
                         
                         st.success(f"File {filename} berhasil diunduh!")
                         st.audio(download_path)
@@ -0,0 +1,355 @@
+import asyncio
+import tempfile
+import threading
+import weakref
+from config import (
+    GEMINI_MODEL,
+    GEMINI_CONFIG_SUMMARY,
+    GEMINI_CONFIG_TRANSCRIBE,
+    GEMINI_CONFIG_MODULE,
+    GEMINI_CONFIG_QUIZ,
+    ASYNC_MAX_CONCURRENCY,
+    TEMP_FOLDER,
+    TRANSCRIBE_SEGMENT_SECONDS,
+    TRANSCRIBE_OVERLAP_SECONDS,
+    TRANSCRIBE_SILENCE_SEARCH_SECONDS,
+    TRANSCRIBE_SEGMENT_RETRIES,
+    TRANSCRIPT_CHUNK_TOKENS,
+    TRANSCRIPT_TOKEN_BUDGET
+)
+from utils.ai_generator import (
+    result_cache,
+    upload_registry,
+    call_metrics,
+    TRANSCRIBE_PROMPT,
+    SUMMARY_PROMPT_AUDIO,
+    SUMMARY_PROMPT_TEXT,
+    SUMMARY_MAP_PROMPT,
+    MODULE_PROMPT,
+    MODULE_MAP_PROMPT,
+    QUIZ_PROMPT_TEMPLATE,
+    _result_cache_key,
+    _record_usage,
+    _start_call,
+    _complete_quiz,
+    _plan_quiz_batches,
+    _merge_quiz_batches,
+    _needs_segmenting,
+    _trim_for_upload,
+    _use_hierarchical
+)
+from utils.ai_backend import get_model
+from utils.rate_limiter import gemini_limiter
+from utils.audio_processor import split_audio_on_silence
+from utils.text_processor import merge_overlapping_text, chunk_text, estimate_tokens
+from utils.quiz_parser import parse_quiz_response
+
+# One event loop shared by every session; started on first use
+_loop = None
+_loop_lock = threading.Lock()
+
+# In-flight request limit, one semaphore per event loop (normally just the shared loop)
+_semaphores = weakref.WeakKeyDictionary()
+
+def get_event_loop():
+    """
+    Get the process-wide event loop used for AI requests
+
+    The loop runs forever in a daemon thread, so any Streamlit session
+    thread can submit coroutines to it.
+
+    Returns:
+    -------
+    asyncio.AbstractEventLoop
+        Shared event loop
+    """
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_loop.run_forever, name="ai-event-loop", daemon=True)
+            thread.start()
+        return _loop
+
+def _get_semaphore():
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(ASYNC_MAX_CONCURRENCY)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+def run_async(coro, timeout=None):
+    """
+    Run a coroutine on the shared event loop and wait for its result
+
+    Parameters:
+    ----------
+    coro : coroutine
+        Coroutine to run
+    timeout : float
+        Seconds to wait (None = no limit)
+
+    Returns:
+    -------
+    any
+        Result of the coroutine
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    return future.result(timeout)
+
+async def _agenerate(output_type, prompt, config, content=None, audio_file_path=None, trim=None):
+    """
+    Send one request with generate_content_async under the concurrency limit
+
+    Returns:
+    -------
+    str
+        Response text
+    """
+    response = await _agenerate_response(output_type, prompt, config, content, audio_file_path, trim)
+    return response.text
+
+async def _agenerate_response(output_type, prompt, config, content=None, audio_file_path=None, trim=None):
+    """
+    Like _agenerate, but return the response object (text and usage metadata)
+
+    Upload time, token usage and latency are recorded in call_metrics.
+    trim=False uploads audio the caller has already trimmed as it is.
+    """
+    model = get_model(GEMINI_MODEL, config)
+    timer = call_metrics.start(output_type, "audio" if audio_file_path else "transcript", model.model_name)
+    audio_file = None
+
+    try:
+        if audio_file_path:
+            # Upload runs in a worker thread; the registry shares it between callers
+            audio_file = await asyncio.to_thread(upload_registry.acquire, audio_file_path, trim)
+            timer.uploaded()
+
+        # Token counting (if enabled) is a blocking request
+        contents, estimated_tokens = await asyncio.to_thread(_start_call, model, prompt,
+                                                             audio_file or content, timer)
+        async with _get_semaphore():
+            response = await gemini_limiter.call_async(model.generate_content_async, contents,
+                                                       tokens=estimated_tokens)
+        timer.first_byte()
+    except Exception as e:
+        timer.finish(error=e)
+        raise e
+    finally:
+        if audio_file is not None:
+            upload_registry.release(audio_file)
+
+    usage = getattr(response, "usage_metadata", None)
+    gemini_limiter.settle(estimated_tokens, getattr(usage, "prompt_token_count", 0) or 0)
+    _record_usage("separate", output_type, response)
+    timer.finish(usage=usage)
+    return response
+
+async def _acached(output_type, prompt, config, content=None, audio_file_path=None, use_cache=True, trim=None,
+                   **params):
+    """
+    Serve a text result from the result cache or generate and cache it
+    """
+    # Hashing a large audio file is blocking work
+    cache_key = await asyncio.to_thread(_result_cache_key, output_type, prompt, config,
+                                        content, audio_file_path, **params)
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    text = await _agenerate(output_type, prompt, config, content, audio_file_path, trim)
+    result_cache.set(cache_key, text)
+    return text
+
+async def _acondense_text(content, map_prompt, use_cache=True):
+    """
+    Async map step of hierarchical generation (see ai_generator._condense_text)
+    """
+    while True:
+        chunks = chunk_text(content, TRANSCRIPT_CHUNK_TOKENS)
+        partials = await asyncio.gather(*[
+            _acached("map", map_prompt, GEMINI_CONFIG_SUMMARY, content=chunk, use_cache=use_cache)
+            for chunk in chunks
+        ])
+        condensed = "\n\n".join(partials)
+
+        if estimate_tokens(condensed) >= estimate_tokens(content):
+            return content
+
+        content = condensed
+        if estimate_tokens(content) <= TRANSCRIPT_TOKEN_BUDGET:
+            return content
+
+async def agenerate_transcript(audio_file_path, use_cache=True):
+    """
+    Async counterpart of generate_transcript
+
+    Parameters:
+    ----------
+    audio_file_path : str
+        Path to the audio file
+    use_cache : bool
+        Whether to reuse a cached transcript of the same audio
+
+    Returns:
+    -------
+    str
+        Transcripted text
+    """
+    if await asyncio.to_thread(_needs_segmenting, audio_file_path):
+        # Long silences are trimmed once here and the segments uploaded as
+        # they are, like in generate_transcript_segments
+        trimmed = await asyncio.to_thread(_trim_for_upload, audio_file_path)
+        # Segment files live only as long as this call
+        with tempfile.TemporaryDirectory(prefix="segments_", dir=TEMP_FOLDER) as segment_folder:
+            segments = await asyncio.to_thread(
+                split_audio_on_silence,
+                trimmed["path"] if trimmed else audio_file_path,
+                segment_seconds=TRANSCRIBE_SEGMENT_SECONDS,
+                overlap_seconds=TRANSCRIBE_OVERLAP_SECONDS,
+                search_seconds=TRANSCRIBE_SILENCE_SEARCH_SECONDS,
+                output_folder=segment_folder
+            )
+            if segments:
+                async def transcribe_segment(segment):
+                    for attempt in range(TRANSCRIBE_SEGMENT_RETRIES + 1):
+                        try:
+                            return await _acached("transcript", TRANSCRIBE_PROMPT, GEMINI_CONFIG_TRANSCRIBE,
+                                                  audio_file_path=segment["path"], use_cache=use_cache,
+                                                  trim=False)
+                        except Exception as e:
+                            if attempt == TRANSCRIBE_SEGMENT_RETRIES:
+                                raise e
+                            await asyncio.sleep(2 ** attempt)
+
+                texts = await asyncio.gather(*[transcribe_segment(segment) for segment in segments])
+
+                text = texts[0]
+                for segment_text in texts[1:]:
+                    text = merge_overlapping_text(text, segment_text)
+                return text
+
+    # The registry trims the upload, shared with summary, module and quiz calls
+    return await _acached("transcript", TRANSCRIBE_PROMPT, GEMINI_CONFIG_TRANSCRIBE,
+                          audio_file_path=audio_file_path, use_cache=use_cache)
+
+async def agenerate_summary(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
+    """
+    Async counterpart of generate_summary
+
+    Returns:
+    -------
+    str
+        Summary text
+    """
+    if is_audio:
+        return await _acached("summary", SUMMARY_PROMPT_AUDIO, GEMINI_CONFIG_SUMMARY,
+                              audio_file_path=audio_file_path, use_cache=use_cache)
+
+    if _use_hierarchical(content, hierarchical):
+        content = await _acondense_text(content, SUMMARY_MAP_PROMPT, use_cache)
+
+    return await _acached("summary", SUMMARY_PROMPT_TEXT, GEMINI_CONFIG_SUMMARY,
+                          content=content, use_cache=use_cache)
+
+async def agenerate_module(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
+    """
+    Async counterpart of generate_module
+
+    Returns:
+    -------
+    str
+        Module text in markdown format
+    """
+    if is_audio:
+        return await _acached("module", MODULE_PROMPT, GEMINI_CONFIG_MODULE,
+                              audio_file_path=audio_file_path, use_cache=use_cache)
+
+    if _use_hierarchical(content, hierarchical):
+        content = await _acondense_text(content, MODULE_MAP_PROMPT, use_cache)
+
+    return await _acached("module", MODULE_PROMPT, GEMINI_CONFIG_MODULE,
+                          content=content, use_cache=use_cache)
+
+async def agenerate_quiz(content, difficulty="Medium", num_questions=5, is_audio=False, audio_file_path=None,
+                         use_cache=True):
+    """
+    Async counterpart of generate_quiz
+
+    Returns:
+    -------
+    dict
+        Quiz data in JSON format
+    """
+    audio_file_path = audio_file_path if is_audio else None
+    cache_key = await asyncio.to_thread(_result_cache_key, "quiz", QUIZ_PROMPT_TEMPLATE, GEMINI_CONFIG_QUIZ,
+                                        content, audio_file_path,
+                                        difficulty=difficulty, num_questions=num_questions)
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    async def run_batch(prompt, batch_content, count):
+        try:
+            response = await _agenerate_response("quiz", prompt, GEMINI_CONFIG_QUIZ, batch_content, audio_file_path)
+        except Exception as e:
+            # The missing questions are topped up afterwards
+            print(f"Error generating quiz batch: {str(e)}")
+            return [], [str(e)], 0
+        usage = getattr(response, "usage_metadata", None)
+        batch_questions, batch_rejected = parse_quiz_response(response.text)
+        return batch_questions[:count], batch_rejected, getattr(usage, "total_token_count", 0) or 0
+
+    # Large quizzes run as concurrent batches over slices of the source
+    batches = _plan_quiz_batches(content, difficulty, num_questions, audio_file_path)
+    questions, rejected, total_tokens = _merge_quiz_batches(
+        await asyncio.gather(*[run_batch(*batch) for batch in batches])
+    )
+
+    # Keep the valid, unique questions; missing ones are regenerated in a small follow-up call
+    questions = await asyncio.to_thread(_complete_quiz, questions, rejected, content, difficulty,
+                                        num_questions, audio_file_path, total_tokens)
+    quiz_data = {"quiz": questions}
+
+    # Only complete, validated quizzes are cached
+    if len(questions) >= num_questions:
+        result_cache.set(cache_key, quiz_data)
+    return quiz_data
+
+ASYNC_GENERATORS = {
+    "transcript": agenerate_transcript,
+    "summary": agenerate_summary,
+    "module": agenerate_module,
+    "quiz": agenerate_quiz
+}
+
+def gather_generations(requests, timeout=None):
+    """
+    Run several generations (possibly for several sessions) on the shared loop
+
+    Parameters:
+    ----------
+    requests : list
+        List of (output_type, kwargs) tuples, e.g.
+        ("summary", {"content": text}) or ("quiz", {"content": text, "num_questions": 10})
+    timeout : float
+        Seconds to wait for all results (None = no limit)
+
+    Returns:
+    -------
+    list
+        One entry per request, in order: the result, or the exception raised
+        by that generation
+    """
+    async def run_all():
+        return await asyncio.gather(
+            *[ASYNC_GENERATORS[output_type](**kwargs) for output_type, kwargs in requests],
+            return_exceptions=True
+        )
+
+    return run_async(run_all(), timeout)
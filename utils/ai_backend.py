@@ -0,0 +1,125 @@
+import threading
+import google.generativeai as genai
+from config import AI_BACKEND, GEMINI_MODEL
+from utils import gemini_client
+
+class GenerationBackend:
+    """
+    Interface between ai_generator and a generation service
+
+    A backend provides models with the GenerativeModel methods used by the
+    generators (generate_content, generate_content_async, count_tokens,
+    model_name) and the file upload calls used by the upload registry.
+    """
+
+    name = "base"
+
+    def get_model(self, model_name=GEMINI_MODEL, generation_config=None):
+        """
+        Get a model for a model name and generation config
+
+        Returns:
+        -------
+        object
+            Model with the GenerativeModel interface
+        """
+        raise NotImplementedError
+
+    def upload_file(self, path):
+        """
+        Upload a local file
+
+        Returns:
+        -------
+        object
+            Remote file handle (name, size_bytes, expiration_time)
+        """
+        raise NotImplementedError
+
+    def delete_file(self, name):
+        """
+        Delete an uploaded file by its remote name
+        """
+        raise NotImplementedError
+
+    def warm_up(self, background=True):
+        """
+        Prepare the backend before the first request (optional)
+        """
+        return None
+
+class GeminiBackend(GenerationBackend):
+    """
+    Google Gemini backend (pooled models, see gemini_client)
+    """
+
+    name = "gemini"
+
+    def get_model(self, model_name=GEMINI_MODEL, generation_config=None):
+        return gemini_client.get_model(model_name, generation_config)
+
+    def upload_file(self, path):
+        gemini_client.configure_client()
+        return genai.upload_file(path=path)
+
+    def delete_file(self, name):
+        gemini_client.configure_client()
+        genai.delete_file(name)
+
+    def warm_up(self, background=True):
+        return gemini_client.warm_up(background)
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def _create_backend(name):
+    if name == "gemini":
+        return GeminiBackend()
+    if name == "fake":
+        # Imported lazily, the fake is only needed for offline runs and benchmarks
+        from utils.fake_backend import FakeBackend
+        return FakeBackend.from_config()
+    raise ValueError(f"Unknown AI backend: {name}")
+
+def get_backend():
+    """
+    Get the active generation backend (AI_BACKEND: "gemini" or "fake")
+
+    Returns:
+    -------
+    GenerationBackend
+        Active backend
+    """
+    global _backend
+
+    with _backend_lock:
+        if _backend is None:
+            _backend = _create_backend(AI_BACKEND)
+        return _backend
+
+def set_backend(backend):
+    """
+    Replace the active generation backend (e.g. a FakeBackend for benchmarks)
+
+    Parameters:
+    ----------
+    backend : GenerationBackend or str
+        Backend instance, or its name ("gemini" or "fake")
+    """
+    global _backend
+
+    if isinstance(backend, str):
+        backend = _create_backend(backend)
+    with _backend_lock:
+        _backend = backend
+
+def get_model(model_name=GEMINI_MODEL, generation_config=None):
+    """
+    Get a model from the active backend
+
+    Returns:
+    -------
+    object
+        Model with the GenerativeModel interface
+    """
+    return get_backend().get_model(model_name, generation_config)
@@ -1,27 +1,478 @@
-import google.generativeai as genai
 import re
 import json
 import os
+import threading
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from config import (
-    GOOGLE_API_KEY, 
     GEMINI_MODEL, 
     GEMINI_CONFIG_SUMMARY, 
     GEMINI_CONFIG_TRANSCRIBE,
     GEMINI_CONFIG_MODULE,
-    GEMINI_CONFIG_QUIZ
+    GEMINI_CONFIG_QUIZ,
+    GEMINI_CONFIG_COMBINED,
+    CACHE_FOLDER,
+    TEMP_FOLDER,
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_MAX_MB,
+    UPLOAD_IDLE_TTL_SECONDS,
+    AUDIO_COMPACT_ENABLED,
+    AUDIO_COMPACT_SAMPLE_RATE,
+    AUDIO_COMPACT_BITRATE_KBPS,
+    SILENCE_TRIM_ENABLED,
+    SILENCE_TRIM_WINDOW_SECONDS,
+    SILENCE_TRIM_THRESHOLD_DB,
+    SILENCE_TRIM_FLOOR_DBFS,
+    SILENCE_TRIM_MIN_SILENCE_SECONDS,
+    SILENCE_TRIM_KEEP_SILENCE_SECONDS,
+    SILENCE_TRIM_PAD_SECONDS,
+    TRANSCRIBE_SEGMENT_SECONDS,
+    TRANSCRIBE_OVERLAP_SECONDS,
+    TRANSCRIBE_SILENCE_SEARCH_SECONDS,
+    TRANSCRIBE_MAX_WORKERS,
+    TRANSCRIBE_SEGMENT_RETRIES,
+    TRANSCRIPT_TOKEN_BUDGET,
+    TRANSCRIPT_CHUNK_TOKENS,
+    MAP_MAX_WORKERS,
+    QUIZ_REPAIR_ATTEMPTS,
+    QUIZ_BATCH_SIZE,
+    QUIZ_MAX_WORKERS,
+    QUIZ_DUPLICATE_THRESHOLD,
+    METRICS_MAX_RECORDS,
+    METRICS_LOG_FILE,
+    METRICS_COUNT_TOKENS
 )
+from utils.result_cache import ResultCache, hash_text, make_cache_key
+from utils.audio_store import audio_hash
+from utils.gemini_files import UploadRegistry
+from utils.ai_backend import get_model
+from utils.rate_limiter import gemini_limiter
+from utils.metrics import CallMetrics
+from utils.audio_processor import split_audio_on_silence, trim_silence, to_original_time
+from utils.audio_metadata import get_audio_metadata
+from utils.text_processor import merge_overlapping_text, chunk_text, estimate_tokens
+from utils.quiz_parser import parse_quiz_response, remove_duplicate_questions
 
-# Configure Google Gemini API
-genai.configure(api_key=GOOGLE_API_KEY)
+# Persistent cache of generated results, shared by all sessions
+result_cache = ResultCache(
+    folder=os.path.join(CACHE_FOLDER, "results"),
+    max_size_mb=RESULT_CACHE_MAX_MB,
+    enabled=RESULT_CACHE_ENABLED
+)
+
+# Remote audio uploads shared by transcript, summary, module and quiz calls
+upload_registry = UploadRegistry(idle_ttl=UPLOAD_IDLE_TTL_SECONDS, compact=AUDIO_COMPACT_ENABLED,
+                                 trim=SILENCE_TRIM_ENABLED)
+
+# Settings that change the audio actually sent to the model (part of audio result cache keys)
+AUDIO_UPLOAD_SETTINGS = {
+    "trim": [SILENCE_TRIM_WINDOW_SECONDS, SILENCE_TRIM_THRESHOLD_DB, SILENCE_TRIM_FLOOR_DBFS,
+             SILENCE_TRIM_MIN_SILENCE_SECONDS, SILENCE_TRIM_KEEP_SILENCE_SECONDS,
+             SILENCE_TRIM_PAD_SECONDS] if SILENCE_TRIM_ENABLED else None,
+    "compact": [AUDIO_COMPACT_SAMPLE_RATE, AUDIO_COMPACT_BITRATE_KBPS] if AUDIO_COMPACT_ENABLED else None
+}
+
+# Token and latency record of every AI call
+call_metrics = CallMetrics(max_records=METRICS_MAX_RECORDS, log_file=METRICS_LOG_FILE)
+
+# Prompt templates (part of the cache key, so editing a prompt invalidates old results)
+TRANSCRIBE_PROMPT = "Transkripsi audio ini kata per kata dengan akurat"
+
+SUMMARY_PROMPT_AUDIO = "Ringkas audio ini dan berikan poin-poin penting yang harus diketahui dalam format markdown rapi"
+
+SUMMARY_PROMPT_TEXT = "Ringkas teks berikut dan berikan poin-poin penting yang harus diketahui dalam format markdown rapi"
+
+MODULE_PROMPT = """
+        Buatkan modul pelajaran yang lengkap dan terstruktur berdasarkan teks atau audio berikut.
+
+        Kriteria:
+        - Gunakan gaya bahasa buku pelajaran yang formal namun mudah dipahami
+        - Sertakan struktur:
+          1. Pendahuluan
+          2. Tujuan Pembelajaran
+          3. Materi
+             3.1 Sub-bab 1
+             3.2 Sub-bab 2
+             ...
+          4. Rangkuman
+          5. Latihan (tanpa jawaban)
+        - Gunakan paragraf panjang dan penjelasan mendalam
+        - Format dalam markdown yang rapi
+        - Langsung mulai dengan heading utama modul (tanpa kalimat pembuka)
+        """
+
+# Map step prompts for transcripts that exceed the token budget
+SUMMARY_MAP_PROMPT = "Ringkas bagian transkrip pelajaran berikut dan pertahankan semua poin penting, istilah, dan contoh dalam format markdown rapi"
+
+MODULE_MAP_PROMPT = """
+        Buat catatan materi yang rinci dari bagian transkrip pelajaran berikut.
+        Pertahankan semua konsep, definisi, penjelasan, contoh, dan urutan pembahasan.
+        Gunakan poin-poin dalam format markdown, tanpa kalimat pembuka.
+        """
 
-def generate_transcript(audio_file_path):
+QUIZ_PROMPT_TEMPLATE = """
+        Buat {num_questions} soal kuis pilihan ganda berdasarkan konten berikut:
+
+        *Format Output (HARUS JSON):*
+        {{
+            "quiz": [
+                {{
+                    "question": "pertanyaan",
+                    "options": {{
+                        "a": "teks opsi a",
+                        "b": "teks opsi b", 
+                        "c": "teks opsi c",
+                        "d": "teks opsi d"
+                    }},
+                    "correct_answer": "a",  # Pilih dari a/b/c/d
+                    "correct_text": "teks opsi a",  # Teks jawaban benar yang sesuai dengan salah satu opsi
+                    "explanation": "penjelasan terkait jawaban benar"
+                }}
+            ]
+        }}
+        
+        *Aturan:*
+        1. Tingkat kesulitan: {difficulty}
+        2. Pastikan 'correct_text' sama persis dengan salah satu opsi
+        3. Format output HARUS JSON dan valid, tanpa komentar atau teks tambahan
+        4. Hindari pertanyaan trivial atau terlalu umum
+        5. Gunakan pertanyaan yang menguji pemahaman konsep
+        """
+
+# Appended to the quiz prompt when only the rejected questions are regenerated
+QUIZ_REPAIR_PROMPT_SUFFIX = """
+        6. Jangan mengulang pertanyaan yang sudah ada berikut ini:
+{existing_questions}
+        """
+
+# Appended to the quiz prompt of each batch of a sharded quiz
+QUIZ_SHARD_PROMPT_SUFFIX = """
+        6. Konten ini adalah bagian {part} dari {parts} materi; buat soal hanya dari bagian ini
+        """
+
+QUIZ_AUDIO_SHARD_PROMPT_SUFFIX = """
+        6. Bagi durasi audio menjadi {parts} bagian yang sama panjang dan buat soal hanya dari bagian ke-{part}
+        """
+
+def _result_cache_key(output_type, prompt, config, content=None, audio_file_path=None, **params):
+    """
+    Build the result cache key for one generation request
+
+    The key covers the input content (transcript text, or audio bytes and
+    the trim and compact settings applied before upload), the prompt
+    template, the generation config, the model and any extra parameters
+    such as quiz difficulty and number of questions.
+    """
+    if audio_file_path:
+        source = ("audio", audio_hash(audio_file_path), AUDIO_UPLOAD_SETTINGS)
+    else:
+        source = ("text", hash_text(content))
+
+    return make_cache_key(output_type, source, prompt, config, GEMINI_MODEL, params)
+
+@contextmanager
+def _uploaded_audio(audio_file_path, trim=None):
+    """
+    Context manager yielding the Gemini file handle of a local audio file
+
+    The file is uploaded only once per recording; later calls reuse the
+    remote handle until it expires. trim=False uploads audio the caller has
+    already trimmed as it is.
+    """
+    audio_file = upload_registry.acquire(audio_file_path, trim=trim)
+    try:
+        yield audio_file
+    finally:
+        upload_registry.release(audio_file)
+
+def get_upload_stats():
+    """
+    Get statistics of the Gemini upload registry
+
+    Returns:
+    -------
+    dict
+        Upload/reuse counters and bytes saved
+    """
+    return upload_registry.stats()
+
+# Gemini counts audio at about 32 tokens per second; compressed uploads are
+# assumed to be 128 kbps when estimating a request's size
+AUDIO_TOKENS_PER_BYTE = 32 / (128 * 1000 / 8)
+
+def _estimate_request_tokens(contents):
+    """
+    Estimate the prompt tokens of a request before sending it
+    """
+    tokens = 0
+    for message in contents:
+        for part in message["parts"]:
+            if isinstance(part, str):
+                tokens += estimate_tokens(part)
+            else:
+                tokens += int((getattr(part, "size_bytes", 0) or 0) * AUDIO_TOKENS_PER_BYTE)
+    return tokens
+
+@contextmanager
+def _request_source(content=None, audio_file_path=None, trim=None):
+    """
+    Context manager yielding the request input: the uploaded audio file or the text
+    """
+    if audio_file_path:
+        # Upload audio file (reused if already uploaded)
+        with _uploaded_audio(audio_file_path, trim) as audio_file:
+            yield audio_file
+    else:
+        yield content
+
+def _count_tokens(model, contents):
+    """
+    Count the prompt tokens of a request with the API (only if METRICS_COUNT_TOKENS)
+    """
+    if not METRICS_COUNT_TOKENS:
+        return None
+    try:
+        return model.count_tokens(contents).total_tokens
+    except Exception as e:
+        print(f"Error counting tokens: {str(e)}")
+        return None
+
+def _start_call(model, prompt, source, timer):
+    """
+    Build the request contents and mark the call as sent
+
+    Returns:
+    -------
+    tuple
+        (contents, estimated prompt tokens)
+    """
+    contents = [
+        {"role": "user", "parts": [prompt]},
+        {"role": "user", "parts": [source]}
+    ]
+    estimated_tokens = _estimate_request_tokens(contents)
+    timer.sent(estimated_tokens, _count_tokens(model, contents))
+    return contents, estimated_tokens
+
+def _generate_content(model, prompt, output_type, content=None, audio_file_path=None, mode="separate", trim=None):
+    """
+    Send one request for text content or an audio file and record its metrics
+
+    The call goes through the process-wide rate limiter, so transient errors
+    (429, 5xx, timeouts) are retried with backoff. Token usage, upload time
+    and latency are added to call_metrics.
+    
+    Parameters:
+    ----------
+    model : genai.GenerativeModel
+        Pooled model
+    prompt : str
+        Prompt text
+    output_type : str
+        Output type the call is recorded under
+    content : str
+        Text input (when audio_file_path is not set)
+    audio_file_path : str
+        Audio input
+    mode : str
+        Generation mode ("separate" or "combined")
+    trim : bool
+        Whether the upload trims long silences (None: SILENCE_TRIM_ENABLED)
+        
+    Returns:
+    -------
+    GenerateContentResponse
+        Model response
+    """
+    timer = call_metrics.start(output_type, "audio" if audio_file_path else "transcript",
+                               model.model_name, mode)
+    try:
+        with _request_source(content, audio_file_path, trim) as source:
+            if audio_file_path:
+                timer.uploaded()
+            contents, estimated_tokens = _start_call(model, prompt, source, timer)
+            response = gemini_limiter.call(model.generate_content, contents, tokens=estimated_tokens)
+        timer.first_byte()
+    except Exception as e:
+        timer.finish(error=e)
+        raise e
+    
+    usage = getattr(response, "usage_metadata", None)
+    gemini_limiter.settle(estimated_tokens, getattr(usage, "prompt_token_count", 0) or 0)
+    _record_usage(mode, output_type, response)
+    timer.finish(usage=usage)
+    return response
+
+def _stream_content(model, prompt, output_type, content=None, audio_file_path=None):
+    """
+    Stream one request, yielding text chunks, and record its metrics
+    
+    Time to first byte is measured at the first streamed chunk.
+    
+    Returns:
+    -------
+    str
+        Full response text (generator return value)
+    """
+    timer = call_metrics.start(output_type, "audio" if audio_file_path else "transcript",
+                               model.model_name, streamed=True)
+    parts = []
+    try:
+        with _request_source(content, audio_file_path) as source:
+            if audio_file_path:
+                timer.uploaded()
+            contents, estimated_tokens = _start_call(model, prompt, source, timer)
+            response = gemini_limiter.call(model.generate_content, contents, stream=True,
+                                           tokens=estimated_tokens)
+            
+            for chunk in response:
+                timer.first_byte()
+                text = chunk.text
+                if text:
+                    parts.append(text)
+                    yield text
+    except GeneratorExit:
+        timer.finish(error="cancelled")
+        raise
+    except Exception as e:
+        timer.finish(error=e)
+        raise e
+    
+    usage = getattr(response, "usage_metadata", None)
+    gemini_limiter.settle(estimated_tokens, getattr(usage, "prompt_token_count", 0) or 0)
+    _record_usage("separate", output_type, response)
+    timer.finish(usage=usage)
+    return "".join(parts)
+
+def get_rate_limit_stats():
+    """
+    Get statistics of the Gemini rate limiter
+
+    Returns:
+    -------
+    dict
+        Call/retry counters, queue depth and wait times
+    """
+    return gemini_limiter.stats()
+
+# Token usage per generation mode ("separate" or "combined")
+_usage_lock = threading.Lock()
+_usage_stats = {}
+
+def _response_tokens(response):
+    """
+    Get the total token count of a response
+    """
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    return getattr(usage, "total_token_count", 0) or (prompt_tokens + output_tokens)
+
+def _record_usage(mode, output_type, response):
+    """
+    Add the token usage of a response to the per-mode statistics
+    """
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    total_tokens = _response_tokens(response)
+    
+    with _usage_lock:
+        stats = _usage_stats.setdefault(mode, {})
+        entry = stats.setdefault(output_type, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "output_tokens": 0,
+            "total_tokens": 0
+        })
+        entry["calls"] += 1
+        entry["prompt_tokens"] += prompt_tokens
+        entry["output_tokens"] += output_tokens
+        entry["total_tokens"] += total_tokens
+
+def get_usage_stats():
+    """
+    Get token usage recorded per generation mode and output type
+    
+    Returns:
+    -------
+    dict
+        {mode: {output_type: {"calls", "prompt_tokens", "output_tokens", "total_tokens"}}}
+    """
+    with _usage_lock:
+        return {mode: {k: dict(v) for k, v in stats.items()} for mode, stats in _usage_stats.items()}
+
+def get_call_metrics(since=None, **filters):
+    """
+    Get the token and latency records of AI calls
+    
+    Parameters:
+    ----------
+    since : float
+        Only calls started at or after this timestamp
+    **filters :
+        Field values to match, e.g. output_type="summary", input_kind="audio", model=...
+        
+    Returns:
+    -------
+    list
+        Call records (tokens before/after, upload time, TTFB, latency, error)
+    """
+    return call_metrics.query(since=since, **filters)
+
+def summarize_call_metrics(group_by=("output_type", "input_kind"), since=None, **filters):
+    """
+    Get token totals and latency percentiles of AI calls per group
+    
+    Returns:
+    -------
+    dict
+        {group key tuple: aggregated metrics} (see CallMetrics.summarize)
+    """
+    return call_metrics.summarize(group_by=group_by, since=since, **filters)
+
+def export_call_metrics(path, since=None, **filters):
+    """
+    Export AI call records as JSON lines
+    
+    Parameters:
+    ----------
+    path : str
+        Output file path
+        
+    Returns:
+    -------
+    int
+        Number of records written
+    """
+    return call_metrics.export_jsonl(path, since=since, **filters)
+
+def get_cache_stats():
+    """
+    Get statistics of the AI result cache
+
+    Returns:
+    -------
+    dict
+        Hit/miss counters and cache size
+    """
+    return result_cache.stats()
+
+def generate_transcript(audio_file_path, use_cache=True):
     """
     Generate transcript from audio file using Gemini AI
     
+    Long recordings are split at silences and transcribed in parallel
+    segments (see generate_transcript_segments).
+    
     Parameters:
     ----------
     audio_file_path : str
         Path to the audio file
+    use_cache : bool
+        Whether to reuse a cached transcript of the same audio
         
     Returns:
     -------
@@ -33,28 +484,240 @@ def generate_transcript(audio_file_path):
         if not os.path.exists(audio_file_path):
             raise FileNotFoundError(f"File not found: {audio_file_path}")
         
-        # Upload the audio file to Gemini
-        audio_file = genai.upload_file(path=audio_file_path)
-        
-        # Initialize model with appropriate configuration
-        model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            generation_config=GEMINI_CONFIG_TRANSCRIBE
-        )
-        
-        # Generate transcript
-        response = model.generate_content([
-            {"role": "user", "parts": ["Transkripsi audio ini kata per kata dengan akurat"]},
-            {"role": "user", "parts": [audio_file]}
-        ])
+        if _needs_segmenting(audio_file_path):
+            result = generate_transcript_segments(audio_file_path, use_cache=use_cache)
+            if result is not None:
+                return result["text"]
         
-        return response.text
+        return _transcribe_whole(audio_file_path, use_cache)["text"]
     
     except Exception as e:
         print(f"Error generating transcript: {str(e)}")
         raise e
 
-def generate_summary(content, is_audio=False, audio_file_path=None):
+def _transcribe_audio(audio_file_path, use_cache=True, trim=None):
+    """
+    Transcribe one audio file with a single request
+    
+    trim=False sends audio the caller has already trimmed (or segmented) as it is.
+    """
+    # Return cached transcript if this audio was already transcribed
+    cache_key = _result_cache_key("transcript", TRANSCRIBE_PROMPT, GEMINI_CONFIG_TRANSCRIBE,
+                                  audio_file_path=audio_file_path)
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    # Get pooled model with appropriate configuration
+    model = get_model(GEMINI_MODEL, GEMINI_CONFIG_TRANSCRIBE)
+    
+    # Generate transcript (the audio upload is reused if already uploaded)
+    response = _generate_content(model, TRANSCRIBE_PROMPT, "transcript", audio_file_path=audio_file_path, trim=trim)
+    
+    result_cache.set(cache_key, response.text)
+    return response.text
+
+def _trim_for_upload(audio_file_path):
+    """
+    Trim report of the copy the upload registry sends for a recording (None if trimming is off)
+    
+    trim_silence is cached by content hash, so this only reads the cached
+    report once the registry (or an earlier call) has trimmed the audio.
+    """
+    if not SILENCE_TRIM_ENABLED:
+        return None
+    return trim_silence(audio_file_path, sha256=audio_hash(audio_file_path))
+
+def _trim_report(trimmed):
+    """
+    Silence trimming report returned with a transcript; offset_map maps
+    times in the trimmed audio back to the original (see to_original_time)
+    """
+    if not trimmed:
+        return None
+    return {key: trimmed[key] for key in ("original_seconds", "trimmed_seconds", "removed_percent",
+                                          "seconds_saved", "offset_map")}
+
+def _transcribe_whole(audio_file_path, use_cache=True):
+    """
+    Transcribe a recording with a single request
+    
+    The recording is uploaded through the registry with silences trimmed,
+    so summary, module and quiz calls on the same audio reuse the upload.
+    
+    Returns:
+    -------
+    dict
+        {"text": transcript, "trim": silence trimming report or None}
+    """
+    trimmed = _trim_for_upload(audio_file_path)
+    return {"text": _transcribe_audio(audio_file_path, use_cache), "trim": _trim_report(trimmed)}
+
+def _needs_segmenting(audio_file_path):
+    """
+    Check whether a recording is long enough to be transcribed in segments
+    """
+    threshold = TRANSCRIBE_SEGMENT_SECONDS * 1.5
+    
+    metadata = get_audio_metadata(audio_file_path)
+    if metadata and metadata["duration_seconds"] is not None:
+        return metadata["duration_seconds"] > threshold
+    
+    # Unreadable headers: estimate the duration assuming 128 kbps
+    return os.path.getsize(audio_file_path) / (128 * 1000 / 8) > threshold
+
+def generate_transcript_segments(audio_file_path, max_workers=TRANSCRIBE_MAX_WORKERS,
+                                 retries=TRANSCRIBE_SEGMENT_RETRIES, use_cache=True):
+    """
+    Transcribe a long recording in overlapping segments processed concurrently
+    
+    Long silences are trimmed first (SILENCE_TRIM_ENABLED). Segments are
+    cut at silences, transcribed in parallel (each one cached and retried on
+    its own) and stitched back together with the words repeated in the
+    overlaps removed.
+    
+    Parameters:
+    ----------
+    audio_file_path : str
+        Path to the audio file
+    max_workers : int
+        Number of segments transcribed at the same time
+    retries : int
+        Extra attempts for a segment that fails
+    use_cache : bool
+        Whether to reuse cached segment transcripts
+        
+    Returns:
+    -------
+    dict
+        {"text": full transcript, "segments": [{"index", "start", "end", "text"}],
+        "trim": silence trimming report (with its offset map) or None} with
+        start/end in seconds of the original audio, or None if the audio
+        cannot be split
+    """
+    trimmed = _trim_for_upload(audio_file_path)
+    # Segment files live only as long as this call; finished segment
+    # transcripts are kept in the result cache
+    with tempfile.TemporaryDirectory(prefix="segments_", dir=TEMP_FOLDER) as segment_folder:
+        segments = split_audio_on_silence(
+            trimmed["path"] if trimmed else audio_file_path,
+            segment_seconds=TRANSCRIBE_SEGMENT_SECONDS,
+            overlap_seconds=TRANSCRIBE_OVERLAP_SECONDS,
+            search_seconds=TRANSCRIBE_SILENCE_SEARCH_SECONDS,
+            output_folder=segment_folder
+        )
+        if not segments:
+            return None
+        
+        def transcribe_segment(segment):
+            for attempt in range(retries + 1):
+                try:
+                    # The recording is trimmed above; segments are uploaded as they are
+                    return _transcribe_audio(segment["path"], use_cache, trim=False)
+                except Exception as e:
+                    if attempt == retries:
+                        raise e
+                    print(f"Retrying segment {segment['index']} after error: {str(e)}")
+                    time.sleep(2 ** attempt)
+        
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(transcribe_segment, segment): segment for segment in segments}
+            for future in as_completed(futures):
+                segment = futures[future]
+                try:
+                    segment["text"] = future.result()
+                except Exception as e:
+                    failed[segment["index"]] = str(e)
+        
+        if failed:
+            # Finished segments are cached, so a retry only redoes the failed ones
+            raise RuntimeError(f"Transkripsi gagal untuk segmen {sorted(failed)}: {list(failed.values())[0]}")
+        
+        text = segments[0]["text"]
+        for segment in segments[1:]:
+            text = merge_overlapping_text(text, segment["text"])
+        
+    if trimmed:
+        # Segment times refer to the trimmed audio
+        for segment in segments:
+            segment["start"] = to_original_time(trimmed["offset_map"], segment["start"])
+            segment["end"] = to_original_time(trimmed["offset_map"], segment["end"])
+    
+    return {
+        "text": text,
+        "segments": [
+            {key: segment[key] for key in ("index", "start", "end", "text")}
+            for segment in segments
+        ],
+        "trim": _trim_report(trimmed)
+    }
+
+def _use_hierarchical(content, hierarchical):
+    """
+    Decide whether a transcript should go through the map-reduce path
+    """
+    if hierarchical is None:
+        return estimate_tokens(content) > TRANSCRIPT_TOKEN_BUDGET
+    return hierarchical
+
+def _generate_chunk(prompt, chunk, use_cache=True):
+    """
+    Run the map prompt on one transcript chunk (cached per chunk content)
+    """
+    cache_key = _result_cache_key("map", prompt, GEMINI_CONFIG_SUMMARY, content=chunk)
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    model = get_model(GEMINI_MODEL, GEMINI_CONFIG_SUMMARY)
+    response = _generate_content(model, prompt, "map", content=chunk)
+    
+    result_cache.set(cache_key, response.text)
+    return response.text
+
+def _condense_text(content, map_prompt, use_cache=True):
+    """
+    Map step of hierarchical generation
+    
+    Splits the transcript into chunks of TRANSCRIPT_CHUNK_TOKENS, processes
+    the chunks in parallel and joins the partial results, recursing on the
+    joined text until it fits in TRANSCRIPT_TOKEN_BUDGET. Each chunk result
+    is cached, so editing one paragraph only recomputes its chunk.
+    
+    Parameters:
+    ----------
+    content : str
+        Transcript text
+    map_prompt : str
+        Prompt applied to every chunk
+    use_cache : bool
+        Whether to reuse cached chunk results
+        
+    Returns:
+    -------
+    str
+        Condensed text for the final (reduce) call
+    """
+    while True:
+        chunks = chunk_text(content, TRANSCRIPT_CHUNK_TOKENS)
+        
+        with ThreadPoolExecutor(max_workers=max(1, MAP_MAX_WORKERS)) as executor:
+            partials = list(executor.map(lambda chunk: _generate_chunk(map_prompt, chunk, use_cache), chunks))
+        
+        condensed = "\n\n".join(partials)
+        
+        # Stop if a pass does not shrink the text, instead of looping forever
+        if estimate_tokens(condensed) >= estimate_tokens(content):
+            return content
+        
+        content = condensed
+        if estimate_tokens(content) <= TRANSCRIPT_TOKEN_BUDGET:
+            return content
+
+def generate_summary(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
     """
     Generate summary from content (text or audio)
     
@@ -66,6 +729,11 @@ def generate_summary(content, is_audio=False, audio_file_path=None):
         Whether the content is an audio file path
     audio_file_path : str
         Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
+    hierarchical : bool
+        Whether to condense long transcripts chunk by chunk first (None = only
+        when the transcript exceeds TRANSCRIPT_TOKEN_BUDGET)
         
     Returns:
     -------
@@ -73,38 +741,39 @@ def generate_summary(content, is_audio=False, audio_file_path=None):
         Summary text
     """
     try:
-        # Initialize model with appropriate configuration
-        model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            generation_config=GEMINI_CONFIG_SUMMARY
-        )
-        
         if is_audio:
             if not audio_file_path or not os.path.exists(audio_file_path):
                 raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-            
-            # Upload audio file
-            audio_file = genai.upload_file(path=audio_file_path)
-            
-            # Generate summary from audio
-            response = model.generate_content([
-                {"role": "user", "parts": ["Ringkas audio ini dan berikan poin-poin penting yang harus diketahui dalam format markdown rapi"]},
-                {"role": "user", "parts": [audio_file]}
-            ])
+            prompt = SUMMARY_PROMPT_AUDIO
         else:
-            # Generate summary from text
-            response = model.generate_content([
-                {"role": "user", "parts": ["Ringkas teks berikut dan berikan poin-poin penting yang harus diketahui dalam format markdown rapi"]},
-                {"role": "user", "parts": [content]}
-            ])
+            prompt = SUMMARY_PROMPT_TEXT
+            # Long transcripts are condensed per chunk first; the call below is the reduce step
+            if _use_hierarchical(content, hierarchical):
+                content = _condense_text(content, SUMMARY_MAP_PROMPT, use_cache)
+        
+        # Return cached summary if the same input was already summarized
+        cache_key = _result_cache_key("summary", prompt, GEMINI_CONFIG_SUMMARY, content=content,
+                                      audio_file_path=audio_file_path if is_audio else None)
+        if use_cache:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
+        # Get pooled model with appropriate configuration
+        model = get_model(GEMINI_MODEL, GEMINI_CONFIG_SUMMARY)
+        
+        # Generate summary from audio or text
+        response = _generate_content(model, prompt, "summary", content,
+                                     audio_file_path if is_audio else None)
+        
+        result_cache.set(cache_key, response.text)
         return response.text
     
     except Exception as e:
         print(f"Error generating summary: {str(e)}")
         raise e
 
-def generate_module(content, is_audio=False, audio_file_path=None):
+def generate_module(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
     """
     Generate learning module from content (text or audio)
     
@@ -116,6 +785,11 @@ def generate_module(content, is_audio=False, audio_file_path=None):
         Whether the content is an audio file path
     audio_file_path : str
         Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
+    hierarchical : bool
+        Whether to condense long transcripts chunk by chunk first (None = only
+        when the transcript exceeds TRANSCRIPT_TOKEN_BUDGET)
         
     Returns:
     -------
@@ -123,57 +797,249 @@ def generate_module(content, is_audio=False, audio_file_path=None):
         Module text in markdown format
     """
     try:
-        # Initialize model with appropriate configuration
-        model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            generation_config=GEMINI_CONFIG_MODULE
-        )
+        if is_audio and (not audio_file_path or not os.path.exists(audio_file_path)):
+            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         
-        module_prompt = """
-        Buatkan modul pelajaran yang lengkap dan terstruktur berdasarkan teks atau audio berikut.
-
-        Kriteria:
-        - Gunakan gaya bahasa buku pelajaran yang formal namun mudah dipahami
-        - Sertakan struktur:
-          1. Pendahuluan
-          2. Tujuan Pembelajaran
-          3. Materi
-             3.1 Sub-bab 1
-             3.2 Sub-bab 2
-             ...
-          4. Rangkuman
-          5. Latihan (tanpa jawaban)
-        - Gunakan paragraf panjang dan penjelasan mendalam
-        - Format dalam markdown yang rapi
-        - Langsung mulai dengan heading utama modul (tanpa kalimat pembuka)
-        """
+        # Long transcripts are condensed per chunk first; the call below is the reduce step
+        if not is_audio and _use_hierarchical(content, hierarchical):
+            content = _condense_text(content, MODULE_MAP_PROMPT, use_cache)
         
-        if is_audio:
-            if not audio_file_path or not os.path.exists(audio_file_path):
-                raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-            
-            # Upload audio file
-            audio_file = genai.upload_file(path=audio_file_path)
-            
-            # Generate module from audio
-            response = model.generate_content([
-                {"role": "user", "parts": [module_prompt]},
-                {"role": "user", "parts": [audio_file]}
-            ])
-        else:
-            # Generate module from text
-            response = model.generate_content([
-                {"role": "user", "parts": [module_prompt]},
-                {"role": "user", "parts": [content]}
-            ])
+        # Return cached module if the same input was already processed
+        cache_key = _result_cache_key("module", MODULE_PROMPT, GEMINI_CONFIG_MODULE, content=content,
+                                      audio_file_path=audio_file_path if is_audio else None)
+        if use_cache:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # Get pooled model with appropriate configuration
+        model = get_model(GEMINI_MODEL, GEMINI_CONFIG_MODULE)
         
+        # Generate module from audio or text
+        response = _generate_content(model, MODULE_PROMPT, "module", content,
+                                     audio_file_path if is_audio else None)
+        
+        result_cache.set(cache_key, response.text)
         return response.text
     
     except Exception as e:
         print(f"Error generating module: {str(e)}")
         raise e
 
-def generate_quiz(content, difficulty="Medium", num_questions=5, is_audio=False, audio_file_path=None):
+def _request_quiz(quiz_prompt, content, audio_file_path=None, output_type="quiz"):
+    """
+    Send one structured quiz request for text content or an audio file
+    """
+    model = get_model(GEMINI_MODEL, GEMINI_CONFIG_QUIZ)
+    return _generate_content(model, quiz_prompt, output_type, content, audio_file_path)
+
+def _plan_quiz_batches(content, difficulty, num_questions, audio_file_path=None):
+    """
+    Split a quiz into batches that each cover a different slice of the source
+    
+    Quizzes of up to QUIZ_BATCH_SIZE questions stay a single request. Text
+    sources are cut into contiguous slices of about equal size; for audio the
+    prompt names the part of the recording to use.
+    
+    Returns:
+    -------
+    list
+        List of (prompt, content, number of questions) tuples
+    """
+    num_batches = -(-num_questions // QUIZ_BATCH_SIZE)
+    
+    slices = None
+    if num_batches > 1 and not audio_file_path:
+        # Small chunks grouped by cumulative size give evenly sized slices
+        total_tokens = estimate_tokens(content)
+        chunks = chunk_text(content, max(1, total_tokens // (num_batches * 4)))
+        num_batches = min(num_batches, len(chunks))
+        
+        slices = [[] for _ in range(num_batches)]
+        position = 0
+        for chunk in chunks:
+            chunk_tokens = estimate_tokens(chunk)
+            # Assign each chunk by its midpoint
+            index = (position + chunk_tokens // 2) * num_batches // max(1, total_tokens)
+            slices[min(num_batches - 1, index)].append(chunk)
+            position += chunk_tokens
+        slices = ["\n\n".join(parts) for parts in slices if parts]
+        num_batches = len(slices)
+    
+    if num_batches <= 1:
+        return [(QUIZ_PROMPT_TEMPLATE.format(num_questions=num_questions, difficulty=difficulty),
+                 content, num_questions)]
+    
+    suffix = QUIZ_AUDIO_SHARD_PROMPT_SUFFIX if audio_file_path else QUIZ_SHARD_PROMPT_SUFFIX
+    batches = []
+    for index in range(num_batches):
+        count = num_questions // num_batches + (1 if index < num_questions % num_batches else 0)
+        prompt = (QUIZ_PROMPT_TEMPLATE.format(num_questions=count, difficulty=difficulty)
+                  + suffix.format(part=index + 1, parts=num_batches))
+        batches.append((prompt, slices[index] if slices else content, count))
+    return batches
+
+def _merge_quiz_batches(batch_results):
+    """
+    Merge per-batch (questions, rejected, tokens) results in batch order
+    """
+    questions = []
+    rejected = []
+    tokens = 0
+    for batch_questions, batch_rejected, batch_tokens in batch_results:
+        questions.extend(batch_questions)
+        rejected.extend(batch_rejected)
+        tokens += batch_tokens
+    
+    if len(batch_results) > 1:
+        with _quiz_lock:
+            _quiz_stats["sharded_quizzes"] += 1
+            _quiz_stats["batches"] += len(batch_results)
+    
+    return questions, rejected, tokens
+
+def _run_quiz_batch(prompt, content, count, audio_file_path=None):
+    """
+    Generate and parse one quiz batch
+    
+    Returns:
+    -------
+    tuple
+        (valid questions, rejected question errors, total tokens)
+    """
+    try:
+        response = _request_quiz(prompt, content, audio_file_path)
+    except Exception as e:
+        # The missing questions are topped up afterwards
+        print(f"Error generating quiz batch: {str(e)}")
+        return [], [str(e)], 0
+    
+    tokens = _response_tokens(response)
+    questions, rejected = parse_quiz_response(response.text)
+    return questions[:count], rejected, tokens
+
+def _generate_quiz_batches(batches, audio_file_path=None):
+    """
+    Run the planned quiz batches concurrently
+    
+    Returns:
+    -------
+    tuple
+        (questions in batch order, rejected question errors, total tokens)
+    """
+    if len(batches) == 1:
+        prompt, content, count = batches[0]
+        return _merge_quiz_batches([_run_quiz_batch(prompt, content, count, audio_file_path)])
+    
+    with ThreadPoolExecutor(max_workers=min(QUIZ_MAX_WORKERS, len(batches))) as executor:
+        futures = [executor.submit(_run_quiz_batch, prompt, content, count, audio_file_path)
+                   for prompt, content, count in batches]
+        return _merge_quiz_batches([future.result() for future in futures])
+
+# Questions salvaged instead of regenerating whole quizzes
+_quiz_lock = threading.Lock()
+_quiz_stats = {
+    "quizzes": 0,
+    "sharded_quizzes": 0,
+    "batches": 0,
+    "duplicates_removed": 0,
+    "repaired_quizzes": 0,
+    "rejected_questions": 0,
+    "regenerated_questions": 0,
+    "repair_calls": 0,
+    "repair_tokens": 0,
+    "tokens_saved": 0
+}
+
+def _complete_quiz(questions, rejected, content, difficulty, num_questions, audio_file_path=None,
+                   full_call_tokens=0):
+    """
+    Fill a quiz up to num_questions by regenerating only the missing questions
+    
+    Near-duplicate questions are dropped first and count as missing.
+    
+    Parameters:
+    ----------
+    questions : list
+        Valid questions already parsed
+    rejected : list
+        Errors of the questions that failed validation
+    content : str
+        Text content of the quiz source
+    difficulty : str
+        Difficulty level
+    num_questions : int
+        Number of questions wanted
+    audio_file_path : str
+        Audio source (instead of content)
+    full_call_tokens : int
+        Tokens of the original full quiz call, used for the tokens-saved metric
+        
+    Returns:
+    -------
+    list
+        Valid questions (fewer than num_questions only if every repair attempt failed)
+    """
+    questions, duplicates = remove_duplicate_questions(questions, threshold=QUIZ_DUPLICATE_THRESHOLD)
+    questions = questions[:num_questions]
+    repair_calls = 0
+    repair_tokens = 0
+    regenerated = 0
+    
+    while len(questions) < num_questions and repair_calls < QUIZ_REPAIR_ATTEMPTS:
+        missing = num_questions - len(questions)
+        existing = "\n".join(f"        - {question['question']}" for question in questions)
+        repair_prompt = (QUIZ_PROMPT_TEMPLATE.format(num_questions=missing, difficulty=difficulty)
+                         + QUIZ_REPAIR_PROMPT_SUFFIX.format(existing_questions=existing or "        -"))
+        
+        repair_calls += 1
+        try:
+            response = _request_quiz(repair_prompt, content, audio_file_path, output_type="quiz_repair")
+        except Exception as e:
+            print(f"Error regenerating quiz questions: {str(e)}")
+            break
+        repair_tokens += _response_tokens(response)
+        
+        new_questions, _ = parse_quiz_response(response.text)
+        new_questions, new_duplicates = remove_duplicate_questions(new_questions, questions,
+                                                                   QUIZ_DUPLICATE_THRESHOLD)
+        duplicates += new_duplicates
+        new_questions = new_questions[:missing]
+        regenerated += len(new_questions)
+        questions.extend(new_questions)
+    
+    with _quiz_lock:
+        _quiz_stats["quizzes"] += 1
+        _quiz_stats["rejected_questions"] += len(rejected)
+        _quiz_stats["duplicates_removed"] += duplicates
+        if repair_calls:
+            _quiz_stats["repaired_quizzes"] += 1
+            _quiz_stats["regenerated_questions"] += regenerated
+            _quiz_stats["repair_calls"] += repair_calls
+            _quiz_stats["repair_tokens"] += repair_tokens
+            # Without salvage every attempt would have been a full quiz call
+            _quiz_stats["tokens_saved"] += max(0, full_call_tokens * repair_calls - repair_tokens)
+    
+    if not questions:
+        reason = rejected[0] if rejected else "Tidak ada soal yang valid dalam response."
+        raise ValueError(reason)
+    
+    return questions
+
+def get_quiz_stats():
+    """
+    Get statistics of quiz validation and per-question repair
+    
+    Returns:
+    -------
+    dict
+        Rejected/regenerated question counts, repair calls and the tokens
+        saved compared to regenerating the whole quiz
+    """
+    with _quiz_lock:
+        return dict(_quiz_stats)
+
+def generate_quiz(content, difficulty="Medium", num_questions=5, is_audio=False, audio_file_path=None, use_cache=True):
     """
     Generate quiz from content (text or audio)
     
@@ -189,6 +1055,8 @@ def generate_quiz(content, difficulty="Medium", num_questions=5, is_audio=False,
         Whether the content is an audio file path
     audio_file_path : str
         Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
         
     Returns:
     -------
@@ -196,78 +1064,316 @@ def generate_quiz(content, difficulty="Medium", num_questions=5, is_audio=False,
         Quiz data in JSON format
     """
     try:
-        # Initialize model with appropriate configuration
-        model = genai.GenerativeModel(
-            model_name=GEMINI_MODEL,
-            generation_config=GEMINI_CONFIG_QUIZ
-        )
+        if is_audio and (not audio_file_path or not os.path.exists(audio_file_path)):
+            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
         
-        quiz_prompt = f"""
-        Buat {num_questions} soal kuis pilihan ganda berdasarkan konten berikut:
+        # Return cached quiz if the same input was already processed with the same settings
+        cache_key = _result_cache_key("quiz", QUIZ_PROMPT_TEMPLATE, GEMINI_CONFIG_QUIZ, content=content,
+                                      audio_file_path=audio_file_path if is_audio else None,
+                                      difficulty=difficulty, num_questions=num_questions)
+        if use_cache:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        audio_file_path = audio_file_path if is_audio else None
+        
+        # Large quizzes are generated in parallel batches over slices of the source
+        batches = _plan_quiz_batches(content, difficulty, num_questions, audio_file_path)
+        questions, rejected, total_tokens = _generate_quiz_batches(batches, audio_file_path)
+        
+        # Keep the valid, unique questions and regenerate only the missing ones
+        questions = _complete_quiz(questions, rejected, content, difficulty, num_questions,
+                                   audio_file_path, full_call_tokens=total_tokens)
+        quiz_data = {"quiz": questions}
+        
+        if len(questions) < num_questions:
+            print(f"Quiz has {len(questions)} of {num_questions} questions after repair")
+            return quiz_data
+        
+        # Only complete, validated quizzes are cached
+        result_cache.set(cache_key, quiz_data)
+        return quiz_data
+    
+    except Exception as e:
+        print(f"Error generating quiz: {str(e)}")
+        raise e
 
-        *Format Output (HARUS JSON):*
-        {{
-            "quiz": [
-                {{
-                    "question": "pertanyaan",
-                    "options": {{
-                        "a": "teks opsi a",
-                        "b": "teks opsi b", 
-                        "c": "teks opsi c",
-                        "d": "teks opsi d"
-                    }},
-                    "correct_answer": "a",  # Pilih dari a/b/c/d
-                    "correct_text": "teks opsi a",  # Teks jawaban benar yang sesuai dengan salah satu opsi
-                    "explanation": "penjelasan terkait jawaban benar"
-                }}
-            ]
-        }}
+def _stream_text(output_type, prompt, config, content, audio_file_path, cache_key, use_cache):
+    """
+    Stream a text output, serving it from the result cache when possible
+    
+    The full text is cached once the stream completes, under the same key the
+    non-streaming generator uses.
+    """
+    if use_cache:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+    
+    try:
+        # Get pooled model with appropriate configuration
+        model = get_model(GEMINI_MODEL, config)
         
-        *Aturan:*
-        1. Tingkat kesulitan: {difficulty}
-        2. Pastikan 'correct_text' sama persis dengan salah satu opsi
-        3. Format output HARUS JSON dan valid, tanpa komentar atau teks tambahan
-        4. Hindari pertanyaan trivial atau terlalu umum
-        5. Gunakan pertanyaan yang menguji pemahaman konsep
+        text = yield from _stream_content(model, prompt, output_type, content, audio_file_path)
+    
+    except Exception as e:
+        print(f"Error streaming {output_type}: {str(e)}")
+        raise e
+    
+    result_cache.set(cache_key, text)
+
+def stream_transcript(audio_file_path, use_cache=True):
+    """
+    Stream transcript text chunks from an audio file as they are generated
+    
+    Parameters:
+    ----------
+    audio_file_path : str
+        Path to the audio file
+    use_cache : bool
+        Whether to reuse a cached transcript of the same audio
+        
+    Yields:
+    ------
+    str
+        Transcript text chunks
+    
+    Returns:
+    -------
+    dict or None
+        Silence trimming report with the offset map (generator return value)
+    """
+    if not os.path.exists(audio_file_path):
+        raise FileNotFoundError(f"File not found: {audio_file_path}")
+    
+    # The upload registry sends the same trimmed copy; its offset map is returned
+    trimmed = _trim_for_upload(audio_file_path)
+    
+    cache_key = _result_cache_key("transcript", TRANSCRIBE_PROMPT, GEMINI_CONFIG_TRANSCRIBE,
+                                  audio_file_path=audio_file_path)
+    yield from _stream_text("transcript", TRANSCRIBE_PROMPT, GEMINI_CONFIG_TRANSCRIBE, None,
+                            audio_file_path, cache_key, use_cache)
+    return _trim_report(trimmed)
+
+def stream_summary(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
+    """
+    Stream summary text chunks as they are generated
+    
+    Parameters:
+    ----------
+    content : str
+        Text content to summarize
+    is_audio : bool
+        Whether to summarize the audio file instead of the text
+    audio_file_path : str
+        Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
+    hierarchical : bool
+        Whether to condense long transcripts chunk by chunk first (None = only
+        when the transcript exceeds TRANSCRIPT_TOKEN_BUDGET)
+        
+    Yields:
+    ------
+    str
+        Summary text chunks
+    """
+    if is_audio and (not audio_file_path or not os.path.exists(audio_file_path)):
+        raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+    
+    prompt = SUMMARY_PROMPT_AUDIO if is_audio else SUMMARY_PROMPT_TEXT
+    audio_file_path = audio_file_path if is_audio else None
+    
+    # Map step runs before streaming; only the final reduce step is streamed
+    if not is_audio and _use_hierarchical(content, hierarchical):
+        content = _condense_text(content, SUMMARY_MAP_PROMPT, use_cache)
+    
+    cache_key = _result_cache_key("summary", prompt, GEMINI_CONFIG_SUMMARY, content=content,
+                                  audio_file_path=audio_file_path)
+    yield from _stream_text("summary", prompt, GEMINI_CONFIG_SUMMARY, content,
+                            audio_file_path, cache_key, use_cache)
+
+def stream_module(content, is_audio=False, audio_file_path=None, use_cache=True, hierarchical=None):
+    """
+    Stream learning module text chunks as they are generated
+    
+    Parameters:
+    ----------
+    content : str
+        Text content to process
+    is_audio : bool
+        Whether to process the audio file instead of the text
+    audio_file_path : str
+        Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
+    hierarchical : bool
+        Whether to condense long transcripts chunk by chunk first (None = only
+        when the transcript exceeds TRANSCRIPT_TOKEN_BUDGET)
+        
+    Yields:
+    ------
+    str
+        Module markdown chunks
+    """
+    if is_audio and (not audio_file_path or not os.path.exists(audio_file_path)):
+        raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+    
+    audio_file_path = audio_file_path if is_audio else None
+    
+    # Map step runs before streaming; only the final reduce step is streamed
+    if not is_audio and _use_hierarchical(content, hierarchical):
+        content = _condense_text(content, MODULE_MAP_PROMPT, use_cache)
+    
+    cache_key = _result_cache_key("module", MODULE_PROMPT, GEMINI_CONFIG_MODULE, content=content,
+                                  audio_file_path=audio_file_path)
+    yield from _stream_text("module", MODULE_PROMPT, GEMINI_CONFIG_MODULE, content,
+                            audio_file_path, cache_key, use_cache)
+
+# Section markers used by the combined (single request) generation mode
+COMBINED_SECTIONS = {
+    "summary": "RINGKASAN",
+    "module": "MODUL",
+    "quiz": "QUIZ"
+}
+
+COMBINED_PROMPT_HEADER = """
+        Berdasarkan audio atau teks berikut, buat beberapa output sekaligus.
+        Tulis setiap output di bawah penanda bagiannya (contoh: === RINGKASAN ===),
+        dengan urutan yang sama seperti di bawah, tanpa teks lain di luar bagian-bagian tersebut.
         """
+
+COMBINED_SUMMARY_INSTRUCTION = "Ringkas materi ini dan berikan poin-poin penting yang harus diketahui dalam format markdown rapi"
+
+def _build_combined_prompt(output_types, difficulty, num_questions):
+    """
+    Build the prompt asking for several outputs in named sections
+    """
+    instructions = {
+        "summary": COMBINED_SUMMARY_INSTRUCTION,
+        "module": MODULE_PROMPT,
+        "quiz": QUIZ_PROMPT_TEMPLATE.format(num_questions=num_questions, difficulty=difficulty)
+    }
+    
+    parts = [COMBINED_PROMPT_HEADER]
+    for output_type in output_types:
+        parts.append(f"=== {COMBINED_SECTIONS[output_type]} ===\n{instructions[output_type]}")
+    
+    return "\n\n".join(parts)
+
+def _split_sections(text):
+    """
+    Split a combined response into its named sections
+    
+    Returns:
+    -------
+    dict
+        Section text keyed by section name (RINGKASAN, MODUL, QUIZ)
+    """
+    pattern = re.compile(r'^[\s#*]*=+\s*(RINGKASAN|MODUL|QUIZ)\s*=+[\s*]*$', re.MULTILINE)
+    matches = list(pattern.finditer(text))
+    
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections[match.group(1)] = text[match.end():end].strip()
+    
+    return sections
+
+def generate_combined(content, output_types, difficulty="Medium", num_questions=5, is_audio=False,
+                      audio_file_path=None, use_cache=True):
+    """
+    Generate several outputs (summary, module, quiz) with a single model request
+    
+    The audio or transcript is sent once and the response is split into named
+    sections. Each section is parsed into the same shape the separate
+    generator returns; a section that is missing or fails to parse falls
+    back to the separate generator for that output only.
+    
+    Parameters:
+    ----------
+    content : str
+        Text content to process (if is_audio is False)
+    output_types : list
+        Output types to generate ("summary", "module", "quiz")
+    difficulty : str
+        Quiz difficulty level (Easy, Medium, Hard)
+    num_questions : int
+        Number of quiz questions
+    is_audio : bool
+        Whether to generate from the audio file
+    audio_file_path : str
+        Path to the audio file (if is_audio is True)
+    use_cache : bool
+        Whether to reuse a cached result for the same input and settings
         
-        if is_audio:
-            if not audio_file_path or not os.path.exists(audio_file_path):
-                raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
-            
-            # Upload audio file
-            audio_file = genai.upload_file(path=audio_file_path)
-            
-            # Generate quiz from audio
-            response = model.generate_content([
-                {"role": "user", "parts": [quiz_prompt]},
-                {"role": "user", "parts": [audio_file]}
-            ])
-        else:
-            # Generate quiz from text
-            response = model.generate_content([
-                {"role": "user", "parts": [quiz_prompt]},
-                {"role": "user", "parts": [content]}
-            ])
-        
-        # Extract JSON from response
-        json_str = re.search(r'\{[\s\S]*\}', response.text)
-        
-        if json_str:
-            json_str = json_str.group()
-            quiz_data = json.loads(json_str)
-            
-            # Validate the quiz data
-            for question in quiz_data["quiz"]:
-                if question["correct_answer"] not in ['a', 'b', 'c', 'd']:
-                    raise ValueError("Jawaban benar harus salah satu dari opsi: a, b, c, d")
-                if question["correct_text"] != question["options"].get(question["correct_answer"]):
-                    raise ValueError("Teks jawaban benar tidak cocok dengan opsi yang dipilih")
+    Returns:
+    -------
+    dict
+        Results keyed by output type
+    dict
+        Error messages of outputs that could not be generated, keyed by output type
+    """
+    output_types = [t for t in COMBINED_SECTIONS if t in output_types]
+    
+    if is_audio and (not audio_file_path or not os.path.exists(audio_file_path)):
+        raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+    
+    prompt = _build_combined_prompt(output_types, difficulty, num_questions)
+    
+    sections = {}
+    try:
+        cache_key = _result_cache_key("combined", prompt, GEMINI_CONFIG_COMBINED, content=content,
+                                      audio_file_path=audio_file_path if is_audio else None)
+        response_text = result_cache.get(cache_key) if use_cache else None
+        
+        if response_text is None:
+            # Get pooled model with appropriate configuration
+            model = get_model(GEMINI_MODEL, GEMINI_CONFIG_COMBINED)
             
-            return quiz_data
-        else:
-            raise ValueError("Tidak ditemukan format JSON yang valid dalam response.")
+            response = _generate_content(model, prompt, "+".join(output_types), content,
+                                         audio_file_path if is_audio else None, mode="combined")
+            response_text = response.text
+            result_cache.set(cache_key, response_text)
+        
+        sections = _split_sections(response_text)
     
     except Exception as e:
-        print(f"Error generating quiz: {str(e)}")
-        raise e
\ No newline at end of file
+        # Every output falls back to its separate generator below
+        print(f"Error generating combined output: {str(e)}")
+    
+    results = {}
+    errors = {}
+    
+    for output_type in output_types:
+        section = sections.get(COMBINED_SECTIONS[output_type], "")
+        
+        try:
+            if output_type == "quiz":
+                questions, rejected = parse_quiz_response(section)
+                if not questions:
+                    raise ValueError(rejected[0] if rejected else "Bagian QUIZ tidak berisi soal yang valid.")
+                results["quiz"] = {"quiz": _complete_quiz(questions, rejected, content, difficulty, num_questions,
+                                                          audio_file_path if is_audio else None)}
+            elif section:
+                results[output_type] = section
+            else:
+                raise ValueError(f"Bagian {COMBINED_SECTIONS[output_type]} tidak ditemukan dalam response.")
+        
+        except Exception as e:
+            print(f"Falling back to separate {output_type} generation: {str(e)}")
+            
+            try:
+                if output_type == "summary":
+                    results["summary"] = generate_summary(content, is_audio, audio_file_path, use_cache)
+                elif output_type == "module":
+                    results["module"] = generate_module(content, is_audio, audio_file_path, use_cache)
+                else:
+                    results["quiz"] = generate_quiz(content, difficulty, num_questions, is_audio,
+                                                    audio_file_path, use_cache)
+            except Exception as fallback_error:
+                errors[output_type] = str(fallback_error)
+    
+    return results, errors
@@ -0,0 +1,340 @@
+import os
+import struct
+from utils.audio_store import audio_hash
+from utils.store import store
+
+# MPEG audio frame header tables (kbps), by (version is MPEG-1, layer)
+_MP3_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160]
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+_WAV_CODECS = {3: "pcm_f{bits}le", 6: "pcm_alaw", 7: "pcm_mulaw", 0x11: "adpcm_ima_wav", 0x55: "mp3"}
+_MP4_CODECS = {b"mp4a": "aac", b"alac": "alac", b"Opus": "opus", b"fLaC": "flac", b"ac-3": "ac3", b"ec-3": "eac3"}
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+
+# Bytes read from the start of a file to find the first MP3 frame, and from
+# the end of an Ogg file to find the last page
+_SCAN_BYTES = 64 * 1024
+_OGG_TAIL_BYTES = 128 * 1024
+
+def _metadata(fmt, codec, duration, sample_rate, channels, bitrate_kbps):
+    return {
+        "format": fmt,
+        "codec": codec,
+        "duration_seconds": round(duration, 3) if duration is not None else None,
+        "sample_rate": sample_rate,
+        "channels": channels,
+        "bitrate_kbps": int(round(bitrate_kbps)) if bitrate_kbps else None
+    }
+
+def _probe_wav(f, file_size):
+    if f.read(12)[8:12] != b"WAVE":
+        return None
+
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+
+        if chunk_id == b"fmt ":
+            data = f.read(chunk_size)
+            audio_format, channels, sample_rate, byte_rate, _, bits = struct.unpack("<HHIIHH", data[:16])
+            if audio_format == 0xFFFE and len(data) >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: the real format is the start of the sub-format GUID
+                audio_format = struct.unpack("<H", data[24:26])[0]
+            fmt = (audio_format, channels, sample_rate, byte_rate, bits)
+            f.seek(chunk_size % 2, 1)
+
+        elif chunk_id == b"data":
+            if fmt is None:
+                return None
+            audio_format, channels, sample_rate, byte_rate, bits = fmt
+            # Streaming writers leave the size unset (0 or 0xFFFFFFFF); use the rest of the file
+            data_size = chunk_size
+            if data_size == 0 or data_size > file_size - f.tell():
+                data_size = file_size - f.tell()
+            if audio_format == 1:
+                codec = "pcm_u8" if bits == 8 else f"pcm_s{bits}le"
+            else:
+                codec = _WAV_CODECS.get(audio_format, f"0x{audio_format:04x}").format(bits=bits)
+            duration = data_size / byte_rate if byte_rate else None
+            return _metadata("wav", codec, duration, sample_rate, channels, byte_rate * 8 / 1000)
+
+        else:
+            f.seek(chunk_size + chunk_size % 2, 1)
+
+    return None
+
+def _parse_mp3_header(header):
+    """Return (bitrate kbps, sample rate, channels, samples per frame, frame length) or None"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3
+    layer = 4 - ((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    channels = 1 if header[3] >> 6 == 3 else 2
+
+    if layer == 1:
+        samples, length = 384, (12 * bitrate * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate * 1000 // sample_rate + padding
+    return bitrate, sample_rate, channels, samples, length
+
+def _probe_mp3(f, file_size):
+    start = 0
+    head = f.read(10)
+    if head[:3] == b"ID3":
+        # ID3v2 tag: synchsafe size, plus a footer if flagged
+        start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+        if head[5] & 0x10:
+            start += 10
+
+    f.seek(start)
+    data = f.read(_SCAN_BYTES)
+    for offset in range(len(data) - 4):
+        if data[offset] != 0xFF:
+            continue
+        frame = _parse_mp3_header(data[offset:offset + 4])
+        if frame is None:
+            continue
+        # Require the next frame header too, so stray 0xFF bytes are not taken for a frame
+        next_offset = offset + frame[4]
+        if next_offset + 4 <= len(data) and _parse_mp3_header(data[next_offset:next_offset + 4]) is None:
+            continue
+        break
+    else:
+        return None
+
+    bitrate, sample_rate, channels, samples, _ = frame
+    mpeg1 = (data[offset + 1] >> 3) & 3 == 3
+    audio_start = start + offset
+    audio_size = file_size - audio_start
+    if file_size >= 128:
+        # ID3v1 tag at the end
+        f.seek(-128, 2)
+        if f.read(3) == b"TAG":
+            audio_size -= 128
+
+    # VBR files carry a frame count in a Xing/Info or VBRI header in the first frame
+    frame_data = data[offset:offset + 200]
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    frames = None
+    xing = frame_data[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 1:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    elif frame_data[36:40] == b"VBRI":
+        frames = struct.unpack(">I", frame_data[50:54])[0]
+
+    if frames:
+        duration = frames * samples / sample_rate
+        bitrate = audio_size * 8 / duration / 1000 if duration else bitrate
+    else:
+        duration = audio_size * 8 / (bitrate * 1000)
+    return _metadata("mp3", "mp3", duration, sample_rate, channels, bitrate)
+
+def _iter_mp4_boxes(f, start, end):
+    """Yield (type, payload start, box end) of the boxes between start and end"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return
+        yield box_type, position + header, position + size
+        position += size
+
+def _probe_mp4(f, file_size):
+    found = {}
+
+    def walk(start, end):
+        for box_type, payload, box_end in _iter_mp4_boxes(f, start, end):
+            if box_type in _MP4_CONTAINERS:
+                if box_type == b"trak":
+                    track = {}
+                    found.setdefault("tracks", []).append(track)
+                    found["track"] = track
+                walk(payload, box_end)
+            elif box_type == b"mvhd":
+                f.seek(payload)
+                version = f.read(4)[0]
+                if version == 1:
+                    f.seek(16, 1)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(8, 1)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                found["movie_duration"] = duration / timescale if timescale else None
+            elif box_type == b"mdhd" and "track" in found:
+                f.seek(payload)
+                version = f.read(4)[0]
+                if version == 1:
+                    f.seek(16, 1)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(8, 1)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                found["track"]["duration"] = duration / timescale if timescale else None
+            elif box_type == b"hdlr" and "track" in found:
+                f.seek(payload + 8)
+                found["track"]["handler"] = f.read(4)
+            elif box_type == b"stsd" and "track" in found:
+                # First sample entry: size, format, 6 reserved, data ref index, then the audio fields
+                f.seek(payload + 8)
+                entry = f.read(36)
+                if len(entry) == 36:
+                    channels = struct.unpack(">H", entry[24:26])[0]
+                    sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+                    found["track"].update(codec=entry[4:8], channels=channels, sample_rate=sample_rate)
+
+    # Only box headers are read; mdat (the audio data) is skipped with a seek
+    walk(0, file_size)
+    audio = [track for track in found.get("tracks", []) if track.get("handler") == b"soun" and "codec" in track]
+    if not audio:
+        return None
+
+    track = audio[0]
+    duration = track.get("duration") or found.get("movie_duration")
+    codec = _MP4_CODECS.get(track["codec"], track["codec"].decode("latin-1").strip())
+    bitrate = file_size * 8 / duration / 1000 if duration else None
+    return _metadata("m4a", codec, duration, track["sample_rate"], track["channels"], bitrate)
+
+def _probe_ogg(f, file_size):
+    page = f.read(27 + 255)
+    if page[:4] != b"OggS":
+        return None
+    serial = page[14:18]
+    segments = page[26]
+    packet = page[27 + segments:] + f.read(64)
+
+    if packet[:7] == b"\x01vorbis":
+        channels = packet[11]
+        sample_rate, _, nominal = struct.unpack("<Iii", packet[12:24])
+        codec, granule_rate, pre_skip = "vorbis", sample_rate, 0
+        bitrate = nominal / 1000 if nominal > 0 else None
+    elif packet[:8] == b"OpusHead":
+        channels = packet[9]
+        pre_skip, sample_rate = struct.unpack("<HI", packet[10:16])
+        # Opus granule positions always count 48 kHz samples
+        codec, granule_rate, bitrate = "opus", 48000, None
+    else:
+        return None
+
+    # The granule position of the last page is the total number of samples
+    tail_start = max(0, file_size - _OGG_TAIL_BYTES)
+    f.seek(tail_start)
+    tail = f.read()
+    granule = None
+    position = tail.rfind(b"OggS")
+    while position >= 0 and granule is None:
+        if position + 18 <= len(tail) and tail[position + 14:position + 18] == serial:
+            value = struct.unpack("<q", tail[position + 6:position + 14])[0]
+            if value >= 0:
+                granule = value
+        position = tail.rfind(b"OggS", 0, position)
+
+    duration = max(0, granule - pre_skip) / granule_rate if granule is not None else None
+    if bitrate is None and duration:
+        bitrate = file_size * 8 / duration / 1000
+    return _metadata("ogg", codec, duration, sample_rate, channels, bitrate)
+
+def probe_audio(file_path):
+    """
+    Read duration, sample rate, channels, codec and bitrate from the container headers
+
+    Supports WAV, MP3, M4A and OGG (Vorbis or Opus) without decoding audio:
+    at most a few small reads at the start and end of the file, so probing
+    takes milliseconds whatever the size of the recording.
+
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file
+
+    Returns:
+    -------
+    dict or None
+        format, codec, duration_seconds, sample_rate, channels and
+        bitrate_kbps, or None if the file could not be parsed
+    """
+    probes = {"wav": _probe_wav, "mp3": _probe_mp3, "m4a": _probe_mp4, "ogg": _probe_ogg}
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            magic = f.read(12)
+            # Detect the container from its magic bytes; the extension can be wrong
+            if magic[:4] == b"RIFF":
+                order = ["wav"]
+            elif magic[:4] == b"OggS":
+                order = ["ogg"]
+            elif magic[4:8] == b"ftyp":
+                order = ["m4a"]
+            else:
+                order = ["mp3"]
+
+            for name in order:
+                f.seek(0)
+                metadata = probes[name](f, file_size)
+                if metadata is not None:
+                    return metadata
+        return None
+
+    except (OSError, struct.error, IndexError, ZeroDivisionError) as e:
+        print(f"Error probing audio metadata: {str(e)}")
+        return None
+
+def get_audio_metadata(file_path, sha256=None):
+    """
+    Probe an audio file, with the result cached by content hash
+
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file
+    sha256 : str
+        Content hash, if already known (default: audio_hash(file_path))
+
+    Returns:
+    -------
+    dict or None
+        Metadata as returned by probe_audio
+    """
+    sha256 = sha256 or audio_hash(file_path)
+    metadata = store.get_audio_metadata(sha256)
+    if metadata is None:
+        metadata = probe_audio(file_path)
+        if metadata is not None:
+            store.save_audio_metadata(sha256, metadata)
+    return metadata
+
+def format_duration(seconds):
+    """
+    Format a duration as "m:ss" or "h:mm:ss" ("Unknown" if not known)
+    """
+    if seconds is None:
+        return "Unknown"
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
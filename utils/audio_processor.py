@@ -1,9 +1,42 @@
 import os
+import json
 import tempfile
-import uuid
+import wave
+import subprocess
 from datetime import datetime
 import shutil
-from config import TEMP_FOLDER, ALLOWED_AUDIO_EXTENSIONS, MAX_UPLOAD_SIZE_MB
+import threading
+import time
+from bisect import bisect_right
+import numpy as np
+from utils.audio_store import audio_store, audio_hash, audio_id_from_hash
+from utils.store import store
+from utils.flask_client import download_file, download_lock, get_remote_file_info
+from utils.audio_metadata import get_audio_metadata, format_duration
+from utils.result_cache import make_cache_key
+from config import (
+    TEMP_FOLDER, CACHE_FOLDER, ALLOWED_AUDIO_EXTENSIONS, MAX_UPLOAD_SIZE_MB,
+    AUDIO_COMPACT_SAMPLE_RATE, AUDIO_COMPACT_BITRATE_KBPS,
+    SILENCE_TRIM_WINDOW_SECONDS, SILENCE_TRIM_THRESHOLD_DB, SILENCE_TRIM_FLOOR_DBFS,
+    SILENCE_TRIM_MIN_SILENCE_SECONDS, SILENCE_TRIM_KEEP_SILENCE_SECONDS, SILENCE_TRIM_PAD_SECONDS
+)
+
+# One lock per cached output, so concurrent threads preparing the same
+# recording do the work once and never share a half-written file
+_output_locks = {}
+_output_locks_guard = threading.Lock()
+
+def _output_lock(key):
+    with _output_locks_guard:
+        return _output_locks.setdefault(key, threading.Lock())
+
+def _temp_path(output_path):
+    """
+    Create a unique temporary file next to output_path (renamed into place when complete)
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix=".tmp")
+    os.close(fd)
+    return tmp_path
 
 def is_valid_audio_file(file):
     """
@@ -23,41 +56,769 @@ def is_valid_audio_file(file):
     
     return True
 
-def save_uploaded_file(uploaded_file):
+def _stored_file_info(stored, filename, source):
     """
-    Save an uploaded file to disk
+    Build the file info dict of a recording in the audio store
+    
+    Duration and format come from a header probe (cached by content hash).
+    """
+    metadata = get_audio_metadata(stored["path"], stored["sha256"])
+    return {
+        "id": stored["audio_id"],
+        "filename": filename,
+        "path": stored["path"],
+        "size": f"{stored['size'] / 1024:.1f} KB",
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "duration": format_duration(metadata["duration_seconds"] if metadata else None),
+        "metadata": metadata,
+        "source": source,
+        "sha256": stored["sha256"],
+        "is_duplicate": not stored["is_new"]
+    }
+
+def save_uploaded_file(uploaded_file, owner=None):
+    """
+    Save an uploaded file to the audio store
+    
+    The file is copied in INGEST_CHUNK_KB blocks (hashed on the way), so
+    saving adds constant memory whatever the size of the recording. A
+    recording that was uploaded before (by anyone) is not stored again;
+    the existing copy and its audio ID are returned.
+    
+    Parameters:
+    ----------
+    uploaded_file : UploadedFile
+        File from st.file_uploader
+    owner : str
+        Session that uses the recording
+    
+    Returns:
+    -------
+    tuple
+        (path, file info) or (None, None) on error
     """
     try:
         if not is_valid_audio_file(uploaded_file):
             return None, None
         
-        # Create a unique filename
-        file_id = str(uuid.uuid4())[:8]
-        file_ext = uploaded_file.name.split(".")[-1] if "." in uploaded_file.name else "wav"
-        filename = f"{file_id}.{file_ext}"
-        
-        # Create full path
-        file_path = os.path.join(TEMP_FOLDER, filename)
-        
-        # Ensure directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-        
-        # Save the file
-        with open(file_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        # Create file info
-        file_info = {
-            "id": file_id,
-            "filename": uploaded_file.name,
-            "path": file_path,
-            "size": f"{uploaded_file.size / 1024:.1f} KB",
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "duration": "Unknown"  # In a real app, extract this from audio metadata
-        }
+        uploaded_file.seek(0)
+        stored = audio_store.add_stream(uploaded_file, uploaded_file.name, owner)
+        file_info = _stored_file_info(stored, uploaded_file.name, "upload")
         
-        return file_path, file_info
+        return stored["path"], file_info
     
     except Exception as e:
         print(f"Error saving uploaded file: {str(e)}")
-        return None, None
\ No newline at end of file
+        return None, None
+
+def save_downloaded_file(file_path, filename, owner=None):
+    """
+    Move a downloaded file into the audio store
+    
+    The checksum recorded by download_file is reused, so the file is not
+    read again.
+    
+    Returns:
+    -------
+    tuple
+        (path, file info) or (None, None) on error
+    """
+    try:
+        meta_path = f"{file_path}.download.json"
+        sha256 = None
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("size") == os.path.getsize(file_path):
+                sha256 = meta.get("sha256")
+            # The download is moved; its record would go stale
+            os.remove(meta_path)
+        
+        stored = audio_store.add_file(file_path, filename, owner, move=True, sha256=sha256)
+        return stored["path"], _stored_file_info(stored, filename, "server")
+    
+    except Exception as e:
+        print(f"Error saving downloaded file: {str(e)}")
+        return None, None
+
+def fetch_server_file(filename, owner=None):
+    """
+    Get a recording from the Flask server into the audio store
+    
+    The file is not downloaded again if the store already holds it: the
+    server's checksum names the stored recording directly, and without a
+    checksum the ETag (or Last-Modified) and size of the last download of
+    the same file are compared.
+    
+    Parameters:
+    ----------
+    filename : str
+        Name of the file on the server
+    owner : str
+        Session that uses the recording
+    
+    Returns:
+    -------
+    tuple
+        (path, file info) or (None, None) on error
+    """
+    source = f"server:{filename}"
+    info = get_remote_file_info(filename)
+    
+    stored = _stored_server_file(source, info, owner)
+    if stored is not None:
+        return stored["path"], _stored_file_info(stored, filename, "server")
+    
+    save_path = os.path.join(TEMP_FOLDER, filename)
+    with download_lock(save_path):
+        # A concurrent selection of the same file may have stored it meanwhile
+        stored = _stored_server_file(source, info, owner)
+        if stored is not None:
+            return stored["path"], _stored_file_info(stored, filename, "server")
+        
+        download_path = download_file(filename, save_path)
+        if not download_path:
+            return None, None
+        
+        path, file_info = save_downloaded_file(download_path, filename, owner)
+        if path and info is not None and info["validator"]:
+            store.save_audio_source(source, info["validator"], info["size"], file_info["id"])
+        return path, file_info
+
+def _stored_server_file(source, info, owner):
+    """
+    Reference the stored copy of a server file, or None if it has to be downloaded
+    """
+    if info is None:
+        return None
+    
+    audio_id = None
+    if info["sha256"]:
+        audio_id = audio_id_from_hash(info["sha256"])
+    elif info["validator"]:
+        known = store.get_audio_source(source)
+        if known and known["validator"] == info["validator"] and known["size"] == info["size"]:
+            audio_id = known["audio_id"]
+    
+    stored = audio_store.reference(audio_id, owner) if audio_id else None
+    if stored is not None and (not info["sha256"] or stored["sha256"] == info["sha256"]):
+        return stored
+    return None
+
+def convert_to_wav(file_path, output_path):
+    """
+    Convert an audio file to WAV using ffmpeg (if installed)
+    
+    Parameters:
+    ----------
+    file_path : str
+        Path to the source audio file
+    output_path : str
+        Path of the WAV file to write
+        
+    Returns:
+    -------
+    str
+        Path to the WAV file, or None if the file cannot be converted
+    """
+    if file_path.lower().endswith(".wav"):
+        return file_path
+    
+    if os.path.exists(output_path):
+        return output_path
+    
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    
+    # Written under a temporary name, so output_path only ever holds a complete file
+    tmp_path = _temp_path(output_path)
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-i", file_path, "-f", "wav", tmp_path],
+            check=True
+        )
+        os.replace(tmp_path, output_path)
+        return output_path
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Error converting audio to WAV: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+def get_wav_duration(file_path):
+    """
+    Get the duration of a WAV file in seconds from its header
+    """
+    with wave.open(file_path, "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate())
+
+def _frames_to_mono(frames, sample_width, channels):
+    """
+    Convert raw PCM frames to a mono float32 numpy array in [-1, 1]
+    """
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        ints = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8) | (raw[:, 2].astype(np.int32) << 16))
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / (1 << 23)
+    else:
+        samples = np.frombuffer(frames, dtype="<i4").astype(np.float32) / 2147483648
+    
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    
+    return samples
+
+def _resample_blocks(blocks, source_rate, target_rate, taps=33):
+    """
+    Resample a stream of mono float32 blocks to target_rate
+    
+    A windowed-sinc low-pass filter (below the target Nyquist frequency)
+    followed by linear interpolation. Filter and interpolation state carry
+    over between blocks, so the output is the same as for one long block.
+    """
+    if source_rate == target_rate:
+        yield from blocks
+        return
+    
+    step = source_rate / target_rate
+    cutoff = min(1.0, target_rate / source_rate) * 0.9
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = (cutoff * np.sinc(cutoff * n) * np.hamming(taps)).astype(np.float32)
+    kernel /= kernel.sum()
+    delay = (taps - 1) // 2
+    
+    context = np.zeros(taps - 1, dtype=np.float32)  # input tail of the previous block
+    filtered = np.zeros(0, dtype=np.float32)  # filtered samples not yet interpolated
+    offset = -delay  # source index of filtered[0] (the filter output lags by delay)
+    position = 0.0  # source index of the next output sample
+    total = 0
+    
+    def interpolate(last):
+        nonlocal filtered, offset, position
+        if last < position:
+            return None
+        count = int((last - position) // step) + 1
+        points = position + step * np.arange(count) - offset
+        index = points.astype(np.int64)
+        fraction = (points - index).astype(np.float32)
+        out = filtered[index] * (1 - fraction) + filtered[np.minimum(index + 1, len(filtered) - 1)] * fraction
+        position += step * count
+        drop = max(0, min(int(position) - offset, len(filtered) - 1))
+        filtered = filtered[drop:]
+        offset += drop
+        return out
+    
+    for block in blocks:
+        total += len(block)
+        data = np.concatenate([context, block])
+        context = data[len(data) - (taps - 1):]
+        filtered = np.concatenate([filtered, np.convolve(data, kernel, mode="valid").astype(np.float32)])
+        # Interpolate between samples that are both filtered already
+        out = interpolate(offset + len(filtered) - 2)
+        if out is not None:
+            yield out
+    
+    # Flush the filter delay and emit the rest of the recording
+    data = np.concatenate([context, np.zeros(delay, dtype=np.float32)])
+    filtered = np.concatenate([filtered, np.convolve(data, kernel, mode="valid").astype(np.float32)])
+    out = interpolate(min(total - 1, offset + len(filtered) - 1))
+    if out is not None:
+        yield out
+
+def _compact_wav(wav_path, output_path, sample_rate, block_seconds=30):
+    """
+    Write a mono 16-bit WAV at sample_rate, reading the source block by block
+    """
+    with wave.open(wav_path, "rb") as wav:
+        source_rate = wav.getframerate()
+        sample_width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        block = int(source_rate * block_seconds)
+        
+        def read_blocks():
+            while True:
+                frames = wav.readframes(block)
+                if not frames:
+                    return
+                yield _frames_to_mono(frames, sample_width, channels)
+        
+        with wave.open(output_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(sample_rate)
+            for samples in _resample_blocks(read_blocks(), source_rate, sample_rate):
+                out.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+
+def _write_compact_copy(file_path, output_path, ffmpeg, sample_rate, bitrate_kbps):
+    """
+    Write the compacted copy under a unique temporary name and rename it into place
+    
+    Returns:
+    -------
+    bool
+        True if output_path was written
+    """
+    # A crash or a concurrent writer never leaves a truncated copy in the cache
+    tmp_path = _temp_path(output_path)
+    try:
+        if ffmpeg:
+            subprocess.run(
+                [ffmpeg, "-y", "-loglevel", "error", "-i", file_path, "-vn", "-ac", "1", "-ar", str(sample_rate),
+                 "-c:a", "libopus", "-b:a", f"{bitrate_kbps}k", "-application", "voip", "-f", "ogg", tmp_path],
+                check=True
+            )
+        else:
+            _compact_wav(file_path, tmp_path, sample_rate)
+        os.replace(tmp_path, output_path)
+        return True
+    except (OSError, wave.Error, subprocess.CalledProcessError) as e:
+        print(f"Error compacting audio: {str(e)}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
+def compact_audio(file_path, output_folder=None, sample_rate=AUDIO_COMPACT_SAMPLE_RATE,
+                  bitrate_kbps=AUDIO_COMPACT_BITRATE_KBPS, sha256=None):
+    """
+    Make a smaller copy of a recording for upload: mono, resampled for speech, compactly encoded
+    
+    With ffmpeg installed the copy is Opus in Ogg at bitrate_kbps; otherwise
+    WAV input is downmixed and resampled with numpy to 16-bit PCM. Copies are
+    cached by the content hash of the source, so each recording is compacted
+    once.
+    
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file
+    output_folder : str
+        Folder for the compacted copies (defaults to CACHE_FOLDER/compact)
+    sample_rate : int
+        Target sample rate
+    bitrate_kbps : int
+        Opus bitrate (ffmpeg only)
+    sha256 : str
+        Content hash (or another stable ID) of the source, if already known
+        
+    Returns:
+    -------
+    dict
+        path (the copy, or file_path if compacting did not make it smaller),
+        original_bytes, compact_bytes, seconds spent and cached; None if the
+        file cannot be compacted (non-WAV without ffmpeg)
+    """
+    output_folder = output_folder or os.path.join(CACHE_FOLDER, "compact")
+    os.makedirs(output_folder, exist_ok=True)
+    
+    started = time.perf_counter()
+    ffmpeg = shutil.which("ffmpeg")
+    original_bytes = os.path.getsize(file_path)
+    
+    if not ffmpeg and file_path.lower().endswith(".wav"):
+        # Already mono 16-bit at (or below) the target rate: nothing to gain
+        try:
+            with wave.open(file_path, "rb") as wav:
+                params = wav.getparams()
+        except (OSError, wave.Error) as e:
+            print(f"Error compacting audio: {str(e)}")
+            return None
+        if params.nchannels == 1 and params.sampwidth <= 2 and params.framerate <= sample_rate:
+            return {"path": file_path, "original_bytes": original_bytes, "compact_bytes": original_bytes,
+                    "seconds": time.perf_counter() - started, "cached": False}
+    
+    base = f"{(sha256 or audio_hash(file_path))[:16]}_{sample_rate}hz"
+    if ffmpeg:
+        output_path = os.path.join(output_folder, f"{base}_{bitrate_kbps}k.ogg")
+    else:
+        output_path = os.path.join(output_folder, f"{base}.wav")
+    
+    cached = os.path.exists(output_path)
+    if not cached:
+        if not ffmpeg and not file_path.lower().endswith(".wav"):
+            return None
+        # Concurrent calls for the same copy wait for the first one
+        with _output_lock(output_path):
+            cached = os.path.exists(output_path)
+            if not cached and not _write_compact_copy(file_path, output_path, ffmpeg, sample_rate, bitrate_kbps):
+                return None
+    
+    compact_bytes = os.path.getsize(output_path)
+    return {
+        "path": output_path if compact_bytes < original_bytes else file_path,
+        "original_bytes": original_bytes,
+        "compact_bytes": min(compact_bytes, original_bytes),
+        "seconds": time.perf_counter() - started,
+        "cached": cached
+    }
+
+def _window_samples(rate, window_seconds):
+    """
+    Samples per energy window; window i starts at i * _window_samples(...) / rate,
+    which drifts from i * window_seconds when rate * window_seconds is not whole
+    """
+    return max(1, int(rate * window_seconds))
+
+def compute_frame_energy(wav_path, window_seconds=0.05, block_seconds=30):
+    """
+    Compute the RMS energy of consecutive windows of a WAV file
+    
+    The file is read block by block, so memory use does not grow with the
+    length of the recording.
+    
+    Parameters:
+    ----------
+    wav_path : str
+        Path to the WAV file
+    window_seconds : float
+        Length of each energy window, rounded down to whole samples
+    block_seconds : float
+        Amount of audio read per iteration
+        
+    Returns:
+    -------
+    numpy.ndarray
+        RMS energy per window
+    """
+    energies = []
+    
+    with wave.open(wav_path, "rb") as wav:
+        rate = wav.getframerate()
+        window = _window_samples(rate, window_seconds)
+        block = window * max(1, int(block_seconds / window_seconds))
+        
+        while True:
+            frames = wav.readframes(block)
+            if not frames:
+                break
+            samples = _frames_to_mono(frames, wav.getsampwidth(), wav.getnchannels())
+            usable = len(samples) - len(samples) % window
+            if usable == 0:
+                break
+            windows = samples[:usable].reshape(-1, window)
+            energies.append(np.sqrt(np.mean(windows ** 2, axis=1)))
+    
+    return np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+
+def split_audio_on_silence(file_path, segment_seconds=300, overlap_seconds=3, search_seconds=20,
+                           output_folder=None, window_seconds=0.05):
+    """
+    Split a recording into overlapping segments cut at quiet moments
+    
+    Each cut is placed at the lowest-energy window within search_seconds
+    before the target segment length, and neighbouring segments share
+    overlap_seconds of audio on each side of the cut.
+    
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file (non-WAV files need ffmpeg)
+    segment_seconds : float
+        Target length of each segment
+    overlap_seconds : float
+        Audio shared by neighbouring segments on each side of a cut
+    search_seconds : float
+        How far before the target length to look for silence
+    output_folder : str
+        Folder for the segment files (defaults to TEMP_FOLDER/segments); the
+        caller deletes them when done
+    window_seconds : float
+        Length of the energy windows used to find silence
+        
+    Returns:
+    -------
+    list
+        Segment dicts with "index", "path", "start" and "end" (seconds in the
+        original recording), or None if the file cannot be split
+    """
+    output_folder = output_folder or os.path.join(TEMP_FOLDER, "segments")
+    os.makedirs(output_folder, exist_ok=True)
+    
+    # Name segments after the content hash of the recording
+    base = audio_hash(file_path)[:16]
+    wav_path = convert_to_wav(file_path, os.path.join(output_folder, f"{base}.wav"))
+    if not wav_path:
+        return None
+    
+    with wave.open(wav_path, "rb") as wav:
+        params = wav.getparams()
+    rate = params.framerate
+    duration = params.nframes / float(rate)
+    
+    # Short recordings stay in one piece
+    if duration <= segment_seconds * 1.5:
+        return [{"index": 0, "path": wav_path, "start": 0.0, "end": duration}]
+    
+    energy = compute_frame_energy(wav_path, window_seconds)
+    step = _window_samples(rate, window_seconds) / float(rate)
+    
+    # Pick the cut points
+    cuts = []
+    position = 0.0
+    while duration - position > segment_seconds * 1.5:
+        target = position + segment_seconds
+        first = int(max(position + overlap_seconds, target - search_seconds) / step)
+        last = max(first + 1, int(target / step))
+        quietest = first + int(np.argmin(energy[first:last])) if first < len(energy) else first
+        position = (quietest + 0.5) * step
+        cuts.append(position)
+    
+    boundaries = [0.0] + cuts + [duration]
+    segments = []
+    
+    with wave.open(wav_path, "rb") as wav:
+        for index in range(len(boundaries) - 1):
+            start = max(0.0, boundaries[index] - overlap_seconds)
+            end = min(duration, boundaries[index + 1] + overlap_seconds)
+            
+            segment_path = os.path.join(output_folder, f"{base}_part{index:03d}.wav")
+            start_frame = int(start * rate)
+            end_frame = int(end * rate)
+            
+            wav.setpos(start_frame)
+            frames = wav.readframes(end_frame - start_frame)
+            
+            with wave.open(segment_path, "wb") as out:
+                out.setnchannels(params.nchannels)
+                out.setsampwidth(params.sampwidth)
+                out.setframerate(rate)
+                out.writeframes(frames)
+            
+            segments.append({
+                "index": index,
+                "path": segment_path,
+                "start": start_frame / float(rate),
+                "end": end_frame / float(rate)
+            })
+    
+    return segments
+
+def detect_speech(wav_path, window_seconds=SILENCE_TRIM_WINDOW_SECONDS, threshold_db=SILENCE_TRIM_THRESHOLD_DB,
+                  floor_dbfs=SILENCE_TRIM_FLOOR_DBFS, min_silence_seconds=SILENCE_TRIM_MIN_SILENCE_SECONDS,
+                  keep_silence_seconds=SILENCE_TRIM_KEEP_SILENCE_SECONDS, pad_seconds=SILENCE_TRIM_PAD_SECONDS):
+    """
+    Find the parts of a WAV file to keep: speech, padding and shortened silences
+    
+    An energy-based voice activity detector, vectorized over all windows:
+    a window is speech when its level is threshold_db above the noise floor
+    (10th percentile level), but the threshold stays threshold_db below the
+    speech level (90th percentile), so recordings with little silence are
+    left alone. Speech is padded by pad_seconds on both sides, and silences
+    longer than min_silence_seconds are shortened to keep_silence_seconds.
+    
+    Parameters:
+    ----------
+    wav_path : str
+        Path to the WAV file
+    window_seconds : float
+        Length of the energy windows
+    threshold_db : float
+        Margin between the noise floor and the speech threshold
+    floor_dbfs : float
+        Lowest possible threshold (dB relative to full scale)
+    min_silence_seconds : float
+        Shorter silences are kept as they are
+    keep_silence_seconds : float
+        Length a longer silence is shortened to
+    pad_seconds : float
+        Audio kept before and after speech
+        
+    Returns:
+    -------
+    tuple
+        (list of (start, end) seconds to keep, duration in seconds)
+    """
+    with wave.open(wav_path, "rb") as wav:
+        rate = wav.getframerate()
+        duration = wav.getnframes() / float(rate)
+    
+    energy = compute_frame_energy(wav_path, window_seconds)
+    step = _window_samples(rate, window_seconds) / float(rate)
+    if len(energy) == 0:
+        return [(0.0, duration)] if duration > 0 else [], duration
+    
+    level = 20 * np.log10(np.maximum(energy, 1e-10))
+    noise_db, speech_db = np.percentile(level, [10, 90])
+    threshold = max(floor_dbfs, min(noise_db + threshold_db, speech_db - threshold_db))
+    speech = level > threshold
+    
+    pad = int(round(pad_seconds / step))
+    if pad:
+        speech = np.convolve(speech.astype(np.int32), np.ones(2 * pad + 1, dtype=np.int32), mode="same") > 0
+    
+    # Silent runs, as [start, end) window indices
+    edges = np.diff(np.concatenate([[0], (~speech).astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    
+    # Drop the middle of long silences, keeping half of keep_silence_seconds at each end
+    half = int(round(keep_silence_seconds / step / 2))
+    long_runs = ends - starts > max(int(round(min_silence_seconds / step)), 2 * half)
+    delta = np.zeros(len(speech) + 1, dtype=np.int32)
+    np.add.at(delta, starts[long_runs] + half, 1)
+    np.add.at(delta, ends[long_runs] - half, -1)
+    keep = np.cumsum(delta[:-1]) == 0
+    
+    edges = np.diff(np.concatenate([[0], keep.astype(np.int8), [0]]))
+    spans = [(float(start * step), float(end * step))
+             for start, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))]
+    
+    # The last, partial window belongs to the final span
+    if spans and keep[-1]:
+        spans[-1] = (spans[-1][0], duration)
+    elif len(energy) * step < duration:
+        spans.append((float(len(energy) * step), duration))
+    return spans, duration
+
+def to_original_time(offset_map, seconds):
+    """
+    Convert a position in trimmed audio to the position in the original recording
+    
+    Parameters:
+    ----------
+    offset_map : list
+        Spans from trim_silence: {"start", "original_start", "duration"}
+    seconds : float
+        Position in the trimmed audio
+        
+    Returns:
+    -------
+    float
+        Position in the original audio
+    """
+    if not offset_map:
+        return seconds
+    index = max(0, bisect_right([span["start"] for span in offset_map], seconds) - 1)
+    span = offset_map[index]
+    return span["original_start"] + min(max(0.0, seconds - span["start"]), span["duration"])
+
+def trim_silence(file_path, output_folder=None, sha256=None, block_seconds=30):
+    """
+    Remove long silences from a recording before it is sent to the AI
+    
+    Uses detect_speech with the SILENCE_TRIM_* settings. The trimmed copy
+    and its offset map are cached by content hash and settings, so each
+    recording is analysed once.
+    
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file (non-WAV files need ffmpeg)
+    output_folder : str
+        Folder for the trimmed copies (defaults to CACHE_FOLDER/trimmed)
+    sha256 : str
+        Content hash of the recording, if already known
+    block_seconds : float
+        Amount of audio copied per read
+        
+    Returns:
+    -------
+    dict
+        path (the trimmed copy, or file_path if nothing was removed), key (a
+        stable ID of the trimmed audio), offset_map (see to_original_time),
+        original_seconds, trimmed_seconds, removed_percent, seconds_saved
+        (audio removed), seconds (time spent) and cached; None if the file
+        cannot be read
+    """
+    output_folder = output_folder or os.path.join(CACHE_FOLDER, "trimmed")
+    os.makedirs(output_folder, exist_ok=True)
+    
+    started = time.perf_counter()
+    settings = [SILENCE_TRIM_WINDOW_SECONDS, SILENCE_TRIM_THRESHOLD_DB, SILENCE_TRIM_FLOOR_DBFS,
+                SILENCE_TRIM_MIN_SILENCE_SECONDS, SILENCE_TRIM_KEEP_SILENCE_SECONDS, SILENCE_TRIM_PAD_SECONDS]
+    # "v2": window times from whole samples; older entries drift at e.g. 22050 Hz
+    key = make_cache_key("trim", "v2", sha256 or audio_hash(file_path), settings)
+    output_path = os.path.join(output_folder, f"{key[:24]}.wav")
+    meta_path = os.path.join(output_folder, f"{key[:24]}.json")
+    
+    report = _read_trim_cache(file_path, key, output_path, meta_path, started)
+    if report is not None:
+        return report
+    
+    # Concurrent calls for the same recording wait for the first one and read its cache
+    with _output_lock(key):
+        return _trim_silence_locked(file_path, output_folder, key, output_path, meta_path, started, block_seconds)
+
+def _read_trim_cache(file_path, key, output_path, meta_path, started):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            report = json.load(f)
+        if not report["trimmed"] or os.path.exists(output_path):
+            report.update(path=output_path if report["trimmed"] else file_path, key=key,
+                          seconds=time.perf_counter() - started, cached=True)
+            return report
+    except (OSError, ValueError, KeyError):
+        pass
+    return None
+
+def _trim_silence_locked(file_path, output_folder, key, output_path, meta_path, started, block_seconds):
+    """
+    Body of trim_silence, run under the lock of its cache key
+    """
+    report = _read_trim_cache(file_path, key, output_path, meta_path, started)
+    if report is not None:
+        return report
+    
+    try:
+        wav_path = convert_to_wav(file_path, os.path.join(output_folder, f"{key[:24]}_source.wav"))
+        if not wav_path:
+            return None
+        
+        spans, duration = detect_speech(wav_path)
+        offset_map = []
+        position = 0.0
+        for start, end in spans:
+            offset_map.append({"start": round(position, 3), "original_start": round(start, 3),
+                               "duration": round(end - start, 3)})
+            position += end - start
+        
+        # Not worth a copy if less than one minimum silence would be removed
+        trimmed = bool(duration - position >= SILENCE_TRIM_MIN_SILENCE_SECONDS)
+        if trimmed:
+            tmp_path = _temp_path(output_path)
+            with wave.open(wav_path, "rb") as wav, wave.open(tmp_path, "wb") as out:
+                rate = wav.getframerate()
+                out.setnchannels(wav.getnchannels())
+                out.setsampwidth(wav.getsampwidth())
+                out.setframerate(rate)
+                block = int(rate * block_seconds)
+                for start, end in spans:
+                    start_frame, end_frame = int(start * rate), int(end * rate)
+                    wav.setpos(start_frame)
+                    while start_frame < end_frame:
+                        count = min(block, end_frame - start_frame)
+                        out.writeframes(wav.readframes(count))
+                        start_frame += count
+            os.replace(tmp_path, output_path)
+        else:
+            offset_map = [{"start": 0.0, "original_start": 0.0, "duration": round(duration, 3)}]
+            position = duration
+        
+        report = {
+            "trimmed": trimmed,
+            "offset_map": offset_map,
+            "original_seconds": round(duration, 3),
+            "trimmed_seconds": round(position, 3),
+            "removed_percent": round(100 * (duration - position) / duration, 2) if duration else 0.0,
+            "seconds_saved": round(duration - position, 3)
+        }
+        tmp_meta_path = _temp_path(meta_path)
+        with open(tmp_meta_path, "w", encoding="utf-8") as f:
+            json.dump(report, f)
+        os.replace(tmp_meta_path, meta_path)
+        
+        if wav_path != file_path:
+            os.remove(wav_path)
+        
+        report.update(path=output_path if trimmed else file_path, key=key,
+                      seconds=time.perf_counter() - started, cached=False)
+        return report
+    
+    except (OSError, wave.Error) as e:
+        print(f"Error trimming silence: {str(e)}")
+        return None
@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+from config import AUDIO_STORE_FOLDER, INGEST_CHUNK_KB
+from utils.result_cache import hash_file
+from utils.store import store
+
+_BLOB_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+
+def audio_id_from_hash(sha256):
+    """
+    Stable audio ID of a recording (the first 16 hex digits of its SHA-256)
+    """
+    return sha256[:16]
+
+class AudioStore:
+    """
+    Content-addressed store of audio recordings
+
+    Each unique recording is kept once as "<sha256>.<ext>" in the store
+    folder, whatever its original name or who uploaded it. The hash is
+    computed while the data is written, so adding a recording reads it only
+    once. Sessions that use a recording hold a reference to it; release()
+    drops a reference and deletes the file when none are left.
+    """
+
+    def __init__(self, folder, store):
+        self.folder = folder
+        self.store = store
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+
+    def add_chunks(self, chunks, filename, owner=None):
+        """
+        Add a recording from an iterable of byte chunks
+
+        The chunks are written to a temporary file in the store folder and
+        hashed in the same pass, so only one chunk is in memory at a time.
+
+        Parameters:
+        ----------
+        chunks : iterable
+            Bytes-like chunks of the recording
+        filename : str
+            Original filename (its extension is kept)
+        owner : str
+            Session that uses the recording (adds a reference)
+
+        Returns:
+        -------
+        dict
+            audio_id, sha256, path, size and is_new (False if the
+            recording was already stored)
+        """
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "wav"
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+        return self._commit(tmp_path, digest.hexdigest(), size, ext, owner)
+
+    def add_stream(self, file_obj, filename, owner=None):
+        """
+        Add a recording from a file-like object, reading it in INGEST_CHUNK_KB blocks
+
+        Returns:
+        -------
+        dict
+            audio_id, sha256, path, size and is_new
+        """
+        chunk_size = INGEST_CHUNK_KB * 1024
+        return self.add_chunks(iter(lambda: file_obj.read(chunk_size), b""), filename, owner)
+
+    def add_file(self, file_path, filename=None, owner=None, move=False, sha256=None):
+        """
+        Add a recording from a local file (e.g. a server download)
+
+        Parameters:
+        ----------
+        file_path : str
+            Path to the file
+        filename : str
+            Original filename (default: the file's name)
+        owner : str
+            Session that uses the recording (adds a reference)
+        move : bool
+            Move the file into the store instead of copying it
+        sha256 : str
+            Known hash of the file (e.g. verified while downloading), so a
+            moved file is not read again
+
+        Returns:
+        -------
+        dict
+            audio_id, sha256, path, size and is_new
+        """
+        filename = filename or os.path.basename(file_path)
+        if not move:
+            with open(file_path, "rb") as f:
+                return self.add_stream(f, filename, owner)
+
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else "wav"
+        fd, tmp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+        os.close(fd)
+        shutil.move(file_path, tmp_path)
+        return self._commit(tmp_path, sha256 or hash_file(tmp_path), os.path.getsize(tmp_path), ext, owner)
+
+    def reference(self, audio_id, owner=None):
+        """
+        Use a recording that is already stored, without adding its data again
+
+        Returns:
+        -------
+        dict or None
+            audio_id, sha256, path, size and is_new (False), or None if the
+            recording is not in the store
+        """
+        with self._lock:
+            blob = self.store.get_audio_blob(audio_id)
+            if blob is None or not os.path.exists(blob["path"]):
+                return None
+            if owner:
+                self.store.add_audio_ref(audio_id, owner)
+        return {"audio_id": audio_id, "sha256": blob["sha256"], "path": blob["path"], "size": blob["size"],
+                "is_new": False}
+
+    def _commit(self, tmp_path, sha256, size, ext, owner):
+        audio_id = audio_id_from_hash(sha256)
+
+        with self._lock:
+            blob = self.store.get_audio_blob(audio_id)
+            is_new = blob is None or not os.path.exists(blob["path"])
+
+            if is_new:
+                path = os.path.join(self.folder, f"{sha256}.{ext}")
+                # Atomic: readers see either no file or the complete recording
+                os.replace(tmp_path, path)
+                if blob is not None:
+                    self.store.delete_audio_blob(audio_id)
+                blob = self.store.add_audio_blob(audio_id, sha256, path, size)
+            else:
+                os.remove(tmp_path)
+
+            if owner:
+                self.store.add_audio_ref(audio_id, owner)
+
+        return {"audio_id": audio_id, "sha256": sha256, "path": blob["path"], "size": size, "is_new": is_new}
+
+    def release(self, audio_id, owner):
+        """
+        Drop an owner's reference; the recording's file is deleted when no references remain
+
+        The audio record and its transcript are kept, so the upload history
+        and edited transcripts survive the file.
+
+        Returns:
+        -------
+        bool
+            True if the recording's file was deleted
+        """
+        with self._lock:
+            self.store.remove_audio_ref(audio_id, owner)
+            if self.store.count_audio_refs(audio_id) > 0:
+                return False
+
+            blob = self.store.get_audio_blob(audio_id)
+            if blob is None:
+                return False
+            try:
+                os.remove(blob["path"])
+            except OSError:
+                pass
+            self.store.delete_audio_blob(audio_id)
+            return True
+
+    def refcount(self, audio_id):
+        return self.store.count_audio_refs(audio_id)
+
+def audio_hash(file_path):
+    """
+    SHA-256 of an audio file, without reading it if it is in the audio store
+
+    Stored recordings are named after their hash, so caches and jobs keyed
+    by audio content recognize a recording without hashing it again.
+
+    Parameters:
+    ----------
+    file_path : str
+        Path to the audio file
+
+    Returns:
+    -------
+    str
+        Hex digest
+    """
+    match = _BLOB_NAME.match(os.path.basename(file_path))
+    if match and os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(AUDIO_STORE_FOLDER):
+        return match.group(1)
+    return hash_file(file_path)
+
+# Shared by every session
+audio_store = AudioStore(AUDIO_STORE_FOLDER, store)
@@ -0,0 +1,292 @@
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from google.api_core import exceptions as google_exceptions
+from config import (
+    GEMINI_MODEL,
+    FAKE_AI_LATENCY_SECONDS,
+    FAKE_AI_TOKENS_PER_SECOND,
+    FAKE_AI_ERROR_RATE,
+    FAKE_AI_UPLOAD_MB_PER_SECOND,
+    FAKE_AI_SEED
+)
+from utils.ai_backend import GenerationBackend
+from utils.audio_metadata import probe_audio
+from utils.text_processor import estimate_tokens
+
+# Words used for simulated transcripts and quiz options
+_VOCABULARY = (
+    "energi cahaya sel tumbuhan air udara tanah proses hasil reaksi fungsi struktur sistem "
+    "organisme lingkungan suhu tekanan gaya massa waktu jarak bilangan pecahan sejarah "
+    "kerajaan budaya bahasa kalimat paragraf data grafik contoh konsep teori percobaan "
+    "pengamatan kesimpulan perubahan bagian jenis sifat faktor pengaruh manfaat tahap"
+).split()
+
+# Gemini counts audio at about 32 tokens per second
+_AUDIO_TOKENS_PER_SECOND = 32
+_SPOKEN_WORDS_PER_SECOND = 2.5
+_CHUNK_TOKENS = 20
+
+def _seeded_random(*parts):
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+def _words(rng, count):
+    return " ".join(rng.choice(_VOCABULARY) for _ in range(count))
+
+class FakeFile:
+    """
+    Simulated remote file returned by FakeBackend.upload_file
+    """
+
+    def __init__(self, name, path, size_bytes, duration_seconds):
+        self.name = name
+        self.display_name = os.path.basename(path)
+        self.uri = f"fake://{name}"
+        self.size_bytes = size_bytes
+        self.duration_seconds = duration_seconds
+        self.expiration_time = None
+
+class FakeResponse:
+    """
+    Simulated generate_content response (text, usage metadata, streamed chunks)
+    """
+
+    def __init__(self, text, prompt_tokens, chunk_delay=0.0):
+        self.text = text
+        self._chunk_delay = chunk_delay
+        output_tokens = estimate_tokens(text)
+        self.usage_metadata = SimpleNamespace(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens
+        )
+
+    def _chunks(self):
+        size = _CHUNK_TOKENS * 4
+        return [self.text[i:i + size] for i in range(0, len(self.text), size)]
+
+    def __iter__(self):
+        for chunk in self._chunks():
+            if self._chunk_delay:
+                time.sleep(self._chunk_delay)
+            yield SimpleNamespace(text=chunk)
+
+class FakeModel:
+    """
+    Simulated GenerativeModel producing deterministic outputs without network access
+    """
+
+    def __init__(self, backend, model_name, generation_config=None):
+        self._backend = backend
+        self.model_name = model_name
+        self.generation_config = generation_config or {}
+
+    def count_tokens(self, contents):
+        return SimpleNamespace(total_tokens=self._backend.prompt_tokens(contents))
+
+    def generate_content(self, contents, stream=False, **kwargs):
+        text, prompt_tokens = self._backend.prepare_response(contents, self.generation_config)
+        time.sleep(self._backend.latency_seconds)
+
+        chunk_delay = _CHUNK_TOKENS / self._backend.tokens_per_second
+        if stream:
+            return FakeResponse(text, prompt_tokens, chunk_delay)
+
+        time.sleep(estimate_tokens(text) / self._backend.tokens_per_second)
+        return FakeResponse(text, prompt_tokens)
+
+    async def generate_content_async(self, contents, **kwargs):
+        text, prompt_tokens = self._backend.prepare_response(contents, self.generation_config)
+        await asyncio.sleep(self._backend.latency_seconds + estimate_tokens(text) / self._backend.tokens_per_second)
+        return FakeResponse(text, prompt_tokens)
+
+class FakeBackend(GenerationBackend):
+    """
+    Deterministic local backend for offline runs and benchmarks
+
+    Outputs depend only on the request and the seed: transcripts are sized
+    from the audio duration, summaries and modules are built from the input
+    text, and quizzes are valid JSON with the requested number of questions.
+    Latency (time to first byte), output throughput, upload speed and the
+    rate of retryable errors are configurable.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency_seconds=0.5, tokens_per_second=200, error_rate=0.0,
+                 upload_mb_per_second=20, seed=0):
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = max(1e-6, tokens_per_second)
+        self.error_rate = error_rate
+        self.upload_mb_per_second = upload_mb_per_second
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._attempts = {}  # request key -> number of calls, so retries can succeed
+        self._file_ids = itertools.count(1)
+        self._stats = {"calls": 0, "errors": 0, "uploads": 0}
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            latency_seconds=FAKE_AI_LATENCY_SECONDS,
+            tokens_per_second=FAKE_AI_TOKENS_PER_SECOND,
+            error_rate=FAKE_AI_ERROR_RATE,
+            upload_mb_per_second=FAKE_AI_UPLOAD_MB_PER_SECOND,
+            seed=FAKE_AI_SEED
+        )
+
+    def get_model(self, model_name=GEMINI_MODEL, generation_config=None):
+        return FakeModel(self, model_name, generation_config)
+
+    def upload_file(self, path):
+        size = os.path.getsize(path)
+        metadata = probe_audio(path)
+        if metadata and metadata["duration_seconds"] is not None:
+            duration = metadata["duration_seconds"]
+        else:
+            # Unreadable headers: assume 128 kbps
+            duration = size / (128 * 1000 / 8)
+
+        if self.upload_mb_per_second:
+            time.sleep(size / (self.upload_mb_per_second * 1024 * 1024))
+
+        with self._lock:
+            self._stats["uploads"] += 1
+        return FakeFile(f"files/fake-{next(self._file_ids)}", path, size, duration)
+
+    def delete_file(self, name):
+        return None
+
+    def prompt_tokens(self, contents):
+        """Prompt tokens of a request (text estimate, 32 tokens per audio second)"""
+        tokens = 0
+        for message in contents:
+            for part in message["parts"]:
+                if isinstance(part, str):
+                    tokens += estimate_tokens(part)
+                else:
+                    tokens += int(getattr(part, "duration_seconds", 0) * _AUDIO_TOKENS_PER_SECOND)
+        return tokens
+
+    def prepare_response(self, contents, generation_config):
+        """
+        Decide the outcome of one call: raise a simulated error or return its text
+
+        Returns:
+        -------
+        tuple
+            (response text, prompt tokens)
+        """
+        prompt = contents[0]["parts"][0]
+        source = contents[-1]["parts"][0]
+        source_key = source.name if isinstance(source, FakeFile) else source
+        request_key = hashlib.sha256(f"{prompt}\x1f{source_key}".encode("utf-8")).hexdigest()
+
+        with self._lock:
+            attempt = self._attempts.get(request_key, 0)
+            self._attempts[request_key] = attempt + 1
+            self._stats["calls"] += 1
+
+        # Errors are decided per request and attempt, independent of thread scheduling
+        if self.error_rate and _seeded_random(self.seed, request_key, attempt).random() < self.error_rate:
+            with self._lock:
+                self._stats["errors"] += 1
+            raise google_exceptions.ServiceUnavailable("Simulated backend error")
+
+        rng = _seeded_random(self.seed, request_key)
+        return self._generate_text(prompt, source, generation_config, rng), self.prompt_tokens(contents)
+
+    def _generate_text(self, prompt, source, generation_config, rng):
+        if generation_config.get("response_mime_type") == "application/json":
+            return json.dumps(self._quiz(prompt, source, rng), ensure_ascii=False)
+
+        sections = re.findall(r"^=== (RINGKASAN|MODUL|QUIZ) ===$", prompt, re.MULTILINE)
+        if sections:
+            parts = []
+            for section in sections:
+                if section == "RINGKASAN":
+                    body = self._summary(source, rng)
+                elif section == "MODUL":
+                    body = self._module(source, rng)
+                else:
+                    body = json.dumps(self._quiz(prompt, source, rng), ensure_ascii=False)
+                parts.append(f"=== {section} ===\n{body}")
+            return "\n\n".join(parts)
+
+        if isinstance(source, FakeFile) and prompt.lower().startswith("transkripsi"):
+            return self._transcript(source, rng)
+        if "modul" in prompt.lower() or "catatan materi" in prompt.lower():
+            return self._module(source, rng)
+        return self._summary(source, rng)
+
+    def _source_sentences(self, source, rng):
+        if isinstance(source, FakeFile):
+            source = self._transcript(source, rng)
+        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", source) if s.strip()]
+        return sentences or [_words(rng, 8).capitalize() + "."]
+
+    def _transcript(self, audio_file, rng):
+        words = max(1, int(audio_file.duration_seconds * _SPOKEN_WORDS_PER_SECOND))
+        file_rng = _seeded_random(self.seed, audio_file.size_bytes, audio_file.duration_seconds)
+        sentences = []
+        while words > 0:
+            length = min(words, file_rng.randint(8, 16))
+            sentences.append(_words(file_rng, length).capitalize() + ".")
+            words -= length
+        return " ".join(sentences)
+
+    def _summary(self, source, rng):
+        sentences = self._source_sentences(source, rng)
+        points = sentences[::max(1, len(sentences) // 8)][:8]
+        return "## Ringkasan\n\n" + "\n".join(f"- {point}" for point in points)
+
+    def _module(self, source, rng):
+        sentences = self._source_sentences(source, rng)
+        third = max(1, len(sentences) // 3)
+        return "\n\n".join([
+            "# Modul Pembelajaran",
+            "## 1. Pendahuluan\n\n" + " ".join(sentences[:third]),
+            "## 2. Tujuan Pembelajaran\n\n" + "\n".join(f"- Memahami {_words(rng, 3)}" for _ in range(3)),
+            "## 3. Materi\n\n### 3.1 Sub-bab 1\n\n" + " ".join(sentences[third:2 * third])
+            + "\n\n### 3.2 Sub-bab 2\n\n" + " ".join(sentences[2 * third:]),
+            "## 4. Rangkuman\n\n" + " ".join(sentences[:2]),
+            "## 5. Latihan\n\n" + "\n".join(f"{i}. Jelaskan {_words(rng, 3)}." for i in range(1, 4))
+        ])
+
+    def _quiz(self, prompt, source, rng):
+        match = re.search(r"Buat (\d+) soal", prompt)
+        count = int(match.group(1)) if match else 5
+
+        questions = []
+        for _ in range(count):
+            options = {key: _words(rng, 4) for key in ("a", "b", "c", "d")}
+            answer = rng.choice(("a", "b", "c", "d"))
+            questions.append({
+                "question": f"Apa hubungan antara {_words(rng, 2)} dan {_words(rng, 3)}?",
+                "options": options,
+                "correct_answer": answer,
+                "correct_text": options[answer],
+                "explanation": f"Karena {_words(rng, 6)}."
+            })
+        return {"quiz": questions}
+
+    def stats(self):
+        """
+        Get simulated call statistics
+
+        Returns:
+        -------
+        dict
+            Calls, simulated errors and uploads
+        """
+        with self._lock:
+            return dict(self._stats)
@@ -1,106 +1,609 @@
-import requests
 import os
+import hashlib
 import json
-from config import FLASK_SERVER_URL
+import mimetypes
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from config import (
+    FLASK_SERVER_URL,
+    FILE_LIST_TTL_SECONDS,
+    TEMP_FOLDER,
+    DOWNLOAD_CHUNK_MIN_KB,
+    DOWNLOAD_CHUNK_MAX_KB,
+    DOWNLOAD_PARALLEL_MIN_MB,
+    DOWNLOAD_SEGMENTS,
+    DOWNLOAD_MAX_ATTEMPTS,
+    UPLOAD_CHUNK_KB,
+    UPLOAD_MAX_WORKERS
+)
+from utils.http_session import http_session
+from utils.result_cache import hash_file
 
-def get_file_list():
+class FileListCache:
+    """
+    Cross-session cache of the server file listing
+    
+    The listing is reused for ttl seconds. After that it is revalidated with a
+    conditional request (If-None-Match / If-Modified-Since) when the server sent
+    an ETag or Last-Modified header, so an unchanged listing costs a 304 without
+    a body. Concurrent callers share one in-flight request.
+    """
+    
+    def __init__(self, url, ttl=30):
+        self.url = url
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._files = None
+        self._etag = None
+        self._last_modified = None
+        self._fetched_at = 0
+        self._inflight = None  # threading.Event of the running fetch
+        self.stats = {"hits": 0, "fetches": 0, "not_modified": 0, "errors": 0}
+    
+    def is_fresh(self):
+        """Whether the cached listing is younger than the TTL"""
+        return self._files is not None and time.monotonic() - self._fetched_at < self.ttl
+    
+    def get(self, force_refresh=False):
+        """
+        Get the file listing
+        
+        Parameters:
+        ----------
+        force_refresh : bool
+            Ask the server even if the cached listing is still fresh
+        
+        Returns:
+        -------
+        list
+            List of file information dictionaries (the last known listing if the
+            server cannot be reached, or [] if there is none)
+        """
+        with self._lock:
+            if not force_refresh and self.is_fresh():
+                self.stats["hits"] += 1
+                return list(self._files)
+            
+            inflight = self._inflight
+            if inflight is None:
+                inflight = self._inflight = threading.Event()
+                leader = True
+            else:
+                leader = False
+        
+        if not leader:
+            # Another session is already fetching; use its result
+            inflight.wait()
+            with self._lock:
+                return list(self._files or [])
+        
+        try:
+            self._fetch()
+        finally:
+            with self._lock:
+                self._inflight = None
+            inflight.set()
+        
+        with self._lock:
+            return list(self._files or [])
+    
+    def _fetch(self):
+        headers = {}
+        if self._files is not None:
+            if self._etag:
+                headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                headers["If-Modified-Since"] = self._last_modified
+        
+        try:
+            response = http_session.get(self.url, "GET /files", headers=headers)
+        except Exception as e:
+            print(f"Error communicating with Flask server: {str(e)}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return
+        
+        with self._lock:
+            if response.status_code == 304:
+                self.stats["not_modified"] += 1
+                self._fetched_at = time.monotonic()
+            elif response.status_code == 200:
+                self.stats["fetches"] += 1
+                self._files = response.json()
+                self._etag = response.headers.get("ETag")
+                self._last_modified = response.headers.get("Last-Modified")
+                self._fetched_at = time.monotonic()
+            else:
+                print(f"Error getting file list: {response.status_code}")
+                self.stats["errors"] += 1
+    
+    def invalidate(self):
+        """Make the next get() ask the server (keeps the validators for a conditional request)"""
+        with self._lock:
+            self._fetched_at = 0
+
+# Shared by every session
+_file_list_cache = FileListCache(f"{FLASK_SERVER_URL}/files", ttl=FILE_LIST_TTL_SECONDS)
+
+def get_file_list(force_refresh=False):
     """
     Get list of files from Flask server
     
+    The listing is cached for FILE_LIST_TTL_SECONDS and shared by all sessions.
+    
+    Parameters:
+    ----------
+    force_refresh : bool
+        Bypass the cache and ask the server
+    
     Returns:
     -------
     list
         List of file information dictionaries
     """
+    return _file_list_cache.get(force_refresh)
+
+# One lock per download path: the .part file and its offsets are shared by
+# every call (so downloads resume), so only one call may write them at a time
+_download_locks = {}
+_download_locks_guard = threading.Lock()
+
+def download_lock(save_path):
+    """
+    Lock held while a file is downloaded to save_path (reentrant)
+    
+    Hold it around download_file and whatever moves the file away, so a
+    concurrent download of the same file never sees it half done or gone.
+    """
+    with _download_locks_guard:
+        return _download_locks.setdefault(os.path.abspath(save_path), threading.RLock())
+
+class RangeNotSupported(Exception):
+    """The server answered a Range request with the whole file (or an error)"""
+
+def _remote_file_info(url):
+    """
+    Get size, validator (ETag or Last-Modified), checksum and Range support with a HEAD request
+
+    Returns:
+    -------
+    dict or None
+        File info, or None if the server does not answer HEAD with a size
+    """
     try:
-        response = requests.get(f"{FLASK_SERVER_URL}/files")
+        response = http_session.request("HEAD", url, "HEAD /uploads/<file>")
+    except Exception as e:
+        print(f"Error getting file info: {str(e)}")
+        return None
+
+    if response.status_code != 200 or "Content-Length" not in response.headers:
+        return None
+
+    return {
+        "size": int(response.headers["Content-Length"]),
+        "validator": response.headers.get("ETag") or response.headers.get("Last-Modified"),
+        "sha256": response.headers.get("X-Checksum-SHA256"),
+        "ranges": response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    }
+
+def get_remote_file_info(filename):
+    """
+    Get size, validator (ETag or Last-Modified) and checksum of a server file without downloading it
+    
+    Parameters:
+    ----------
+    filename : str
+        Name of the file on the server
         
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error getting file list: {response.status_code}")
-            return []
+    Returns:
+    -------
+    dict or None
+        size, validator, sha256 (None if the server sends no checksum) and
+        ranges, or None if the server does not report the file
+    """
+    return _remote_file_info(f"{FLASK_SERVER_URL}/uploads/{filename}")
+
+def _read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _is_local_copy_valid(save_path, info):
+    """Whether save_path already holds the remote file (same size and checksum)"""
+    if not os.path.isfile(save_path) or os.path.getsize(save_path) != info["size"]:
+        return False
+
+    # Checksum from the server, or the one recorded when this copy was downloaded
+    expected = info["sha256"]
+    if expected is None:
+        meta = _read_json(f"{save_path}.download.json")
+        if meta and info["validator"] and meta.get("validator") == info["validator"]:
+            expected = meta.get("sha256")
+
+    return expected is not None and hash_file(save_path) == expected
+
+def _split_segments(size, count):
+    step = -(-size // count)
+    return [{"start": start, "end": min(size, start + step) - 1, "written": 0}
+            for start in range(0, size, step)]
+
+def _adapt_chunk_size(chunk_size, received, seconds):
+    # Grow the read size while chunks arrive quickly, shrink it when they are slow
+    if received == chunk_size and seconds < 0.05:
+        return min(chunk_size * 2, DOWNLOAD_CHUNK_MAX_KB * 1024)
+    if seconds > 0.5:
+        return max(chunk_size // 2, DOWNLOAD_CHUNK_MIN_KB * 1024)
+    return chunk_size
+
+def _download_segment(url, part_path, segment, validator, on_progress):
+    """
+    Download one byte range into the .part file, resuming after connection errors
+    """
+    attempts = 0
+    chunk_size = DOWNLOAD_CHUNK_MIN_KB * 1024
+
+    while segment["start"] + segment["written"] <= segment["end"]:
+        offset = segment["start"] + segment["written"]
+        # Byte offsets refer to the file itself, not a compressed encoding of it
+        headers = {"Range": f"bytes={offset}-{segment['end']}", "Accept-Encoding": "identity"}
+        if validator:
+            # The server sends the whole file instead if it changed since the last attempt
+            headers["If-Range"] = validator
+
+        try:
+            with http_session.get(url, "GET /uploads/<file>", headers=headers, stream=True) as response:
+                if response.status_code != 206:
+                    raise RangeNotSupported(f"Status {response.status_code} for range request")
+
+                with open(part_path, "r+b") as f:
+                    f.seek(offset)
+                    while segment["start"] + segment["written"] <= segment["end"]:
+                        started = time.perf_counter()
+                        chunk = response.raw.read(chunk_size, decode_content=True)
+                        if not chunk:
+                            break
+                        f.write(chunk)
+                        segment["written"] += len(chunk)
+                        on_progress(len(chunk))
+                        chunk_size = _adapt_chunk_size(chunk_size, len(chunk), time.perf_counter() - started)
+
+            if segment["start"] + segment["written"] <= segment["end"]:
+                raise IOError("Connection closed before the range was complete")
+
+        except RangeNotSupported:
+            raise
+        except Exception as e:
+            # Count only failures without progress; a resumed range starts a new count
+            attempts = attempts + 1 if segment["start"] + segment["written"] == offset else 1
+            if attempts >= DOWNLOAD_MAX_ATTEMPTS:
+                raise e
+            print(f"Error downloading bytes {offset}-{segment['end']}, resuming: {str(e)}")
+            time.sleep(min(2 ** attempts * 0.5, 10))
+
+def _download_whole(url, part_path, on_progress):
+    """
+    Download the file in one request (server without Range support)
     
-    except Exception as e:
-        print(f"Error communicating with Flask server: {str(e)}")
-        return []
+    Returns the SHA-256 of the file, computed while it is written.
+    """
+    chunk_size = DOWNLOAD_CHUNK_MIN_KB * 1024
+    digest = hashlib.sha256()
+    with http_session.get(url, "GET /uploads/<file>", stream=True) as response:
+        if response.status_code != 200:
+            raise IOError(f"Status {response.status_code}")
+        with open(part_path, "wb") as f:
+            while True:
+                started = time.perf_counter()
+                # Undo any Content-Encoding (gzip) the server applied
+                chunk = response.raw.read(chunk_size, decode_content=True)
+                if not chunk:
+                    break
+                f.write(chunk)
+                digest.update(chunk)
+                on_progress(len(chunk))
+                chunk_size = _adapt_chunk_size(chunk_size, len(chunk), time.perf_counter() - started)
+    return digest.hexdigest()
 
-def download_file(filename, save_path=None):
+def download_file(filename, save_path=None, progress_callback=None, segments=None):
     """
     Download file from Flask server
     
+    The file is written to "<save_path>.part" and renamed when complete. With
+    Range support, an interrupted download resumes where it stopped (also
+    across calls) and large files are fetched in parallel segments. A file
+    already present at save_path with the same size and checksum is not
+    downloaded again. Concurrent calls for the same save_path run one after
+    the other (see download_lock).
+    
     Parameters:
     ----------
     filename : str
         Name of the file to download
     save_path : str
-        Path to save the file (if None, returns file content)
+        Path to save the file (default: TEMP_FOLDER/filename)
+    progress_callback : callable
+        Called as progress_callback(bytes_done, total_bytes) while downloading
+    segments : int
+        Number of parallel Range requests (default: DOWNLOAD_SEGMENTS for files
+        of at least DOWNLOAD_PARALLEL_MIN_MB, otherwise 1)
         
     Returns:
     -------
-    bytes or str
-        File content (bytes) or path to saved file (str)
+    str
+        Path to the saved file, or None if the download failed
     """
-    try:
-        response = requests.get(f"{FLASK_SERVER_URL}/uploads/{filename}", stream=True)
-        
-        if response.status_code == 200:
-            if save_path:
-                # Save to file
-                os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                with open(save_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+    save_path = save_path or os.path.join(TEMP_FOLDER, filename)
+    url = f"{FLASK_SERVER_URL}/uploads/{filename}"
+    part_path = f"{save_path}.part"
+    state_path = f"{part_path}.json"
+    
+    if os.path.dirname(save_path):
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    
+    with download_lock(save_path):
+        try:
+            info = _remote_file_info(url)
+            
+            if info is not None and _is_local_copy_valid(save_path, info):
                 return save_path
+            
+            lock = threading.Lock()
+            progress = {"done": 0, "saved_at": time.monotonic()}
+            state = None
+            checksum = None
+            
+            def on_progress(received):
+                with lock:
+                    progress["done"] += received
+                    done = progress["done"]
+                    # Persist segment offsets now and then so a later call can resume
+                    if state is not None and time.monotonic() - progress["saved_at"] > 1:
+                        progress["saved_at"] = time.monotonic()
+                        _write_json(state_path, state)
+                if progress_callback:
+                    progress_callback(done, info["size"] if info else None)
+            
+            if info is not None and info["ranges"] and info["size"] > 0:
+                state = _read_json(state_path)
+                if (state is None or not os.path.isfile(part_path)
+                        or state.get("size") != info["size"] or state.get("validator") != info["validator"]):
+                    # Start over: new file, or it changed on the server
+                    if segments is None:
+                        large = info["size"] >= DOWNLOAD_PARALLEL_MIN_MB * 1024 * 1024
+                        segments = DOWNLOAD_SEGMENTS if large else 1
+                    state = {
+                        "size": info["size"],
+                        "validator": info["validator"],
+                        "segments": _split_segments(info["size"], max(1, segments))
+                    }
+                    with open(part_path, "wb") as f:
+                        f.truncate(info["size"])
+                
+                progress["done"] = sum(segment["written"] for segment in state["segments"])
+                _write_json(state_path, state)
+                pending = [segment for segment in state["segments"]
+                           if segment["start"] + segment["written"] <= segment["end"]]
+                
+                try:
+                    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+                        futures = [executor.submit(_download_segment, url, part_path, segment, info["validator"], on_progress)
+                                   for segment in pending]
+                        for future in futures:
+                            future.result()
+                except RangeNotSupported as e:
+                    print(f"Range download not possible, downloading the whole file: {str(e)}")
+                    state = None
+                    _remove(state_path)
+                    progress["done"] = 0
+                    checksum = _download_whole(url, part_path, on_progress)
+                except Exception:
+                    # Keep the .part file and offsets for the next attempt
+                    with lock:
+                        _write_json(state_path, state)
+                    raise
             else:
-                # Return content
-                return response.content
-        else:
-            print(f"Error downloading file: {response.status_code}")
+                checksum = _download_whole(url, part_path, on_progress)
+            
+            # Verify the complete file before it replaces save_path (segments
+            # arrive out of order, so a ranged download is hashed afterwards)
+            size = os.path.getsize(part_path)
+            checksum = checksum or hash_file(part_path)
+            if info is not None and size != info["size"]:
+                raise IOError(f"Size mismatch: expected {info['size']} bytes, got {size}")
+            if info is not None and info["sha256"] and checksum != info["sha256"]:
+                _remove(part_path, state_path)
+                raise IOError("Checksum mismatch")
+            
+            os.replace(part_path, save_path)
+            _remove(state_path)
+            _write_json(f"{save_path}.download.json", {
+                "size": size,
+                "sha256": checksum,
+                "validator": info["validator"] if info else None
+            })
+            return save_path
+        
+        except Exception as e:
+            print(f"Error downloading file: {str(e)}")
             return None
+
+class MultipartFileStream:
+    """
+    File-like multipart/form-data body that reads the file while it is sent
+    
+    requests sends objects with read() and a length in blocks with a
+    Content-Length header, so only one block of the file is in memory at a
+    time. progress_callback(bytes_sent, total_bytes) is called per block of
+    file data.
+    """
+    
+    def __init__(self, file_path, filename, field="file", progress_callback=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.file_size = os.path.getsize(file_path)
+        self.progress_callback = progress_callback
+        
+        mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        self._preamble = (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {mime_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._epilogue = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+        self._file = open(file_path, "rb")
+        self._buffer = self._preamble
+        self._sent = 0
+        self._done = False
     
+    def __len__(self):
+        return len(self._preamble) + self.file_size + len(self._epilogue)
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self)
+        size = max(size, UPLOAD_CHUNK_KB * 1024) if not self._buffer else size
+        
+        if self._buffer:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+            return data
+        if self._done:
+            return b""
+        
+        data = self._file.read(size)
+        if data:
+            self._sent += len(data)
+            if self.progress_callback:
+                self.progress_callback(self._sent, self.file_size)
+            return data
+        
+        self._done = True
+        self._file.close()
+        return self._epilogue
+    
+    def close(self):
+        self._file.close()
+
+def _upload_one(file_path, filename=None, progress_callback=None):
+    """
+    Upload one file with a streamed multipart body
+    
+    Returns:
+    -------
+    dict
+        path, filename, ok, bytes, seconds, status and error
+    """
+    filename = filename or os.path.basename(file_path)
+    result = {"path": file_path, "filename": filename, "ok": False, "bytes": 0,
+              "seconds": 0.0, "status": None, "error": None}
+    
+    if not os.path.exists(file_path):
+        result["error"] = "File not found"
+        print(f"File not found: {file_path}")
+        return result
+    
+    start = time.perf_counter()
+    body = MultipartFileStream(file_path, filename, progress_callback=progress_callback)
+    try:
+        response = http_session.post(
+            f"{FLASK_SERVER_URL}/upload",
+            "POST /upload",
+            data=body,
+            headers={"Content-Type": body.content_type, "Content-Length": str(len(body))}
+        )
+        result["status"] = response.status_code
+        result["ok"] = response.status_code == 200
+        if not result["ok"]:
+            result["error"] = f"Status {response.status_code}"
+            print(f"Error uploading file: {response.status_code}")
     except Exception as e:
-        print(f"Error downloading file: {str(e)}")
-        return None
+        result["error"] = str(e)
+        print(f"Error uploading file: {str(e)}")
+    finally:
+        body.close()
+    
+    result["bytes"] = body.file_size
+    result["seconds"] = time.perf_counter() - start
+    return result
 
-def upload_file(file_path, filename=None):
+def upload_file(file_path, filename=None, progress_callback=None):
     """
     Upload file to Flask server
     
+    The file is streamed from disk, never loaded into memory as a whole.
+    
     Parameters:
     ----------
     file_path : str
         Path to the file to upload
     filename : str
         Custom filename (if None, uses original filename)
+    progress_callback : callable
+        Called as progress_callback(bytes_sent, total_bytes) while uploading
         
     Returns:
     -------
     bool
         Success status
     """
-    try:
-        if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
-            return False
-        
-        # If no custom filename provided, use original
-        if not filename:
-            filename = os.path.basename(file_path)
-        
-        with open(file_path, 'rb') as f:
-            files = {'file': (filename, f)}
-            response = requests.post(f"{FLASK_SERVER_URL}/upload", files=files)
+    result = _upload_one(file_path, filename, progress_callback)
+    if result["ok"]:
+        _file_list_cache.invalidate()
+    return result["ok"]
+
+def upload_files(file_paths, max_workers=None, progress_callback=None):
+    """
+    Upload several files concurrently over the pooled connection
+    
+    Parameters:
+    ----------
+    file_paths : list
+        Paths of the files to upload (or (path, filename) tuples)
+    max_workers : int
+        Concurrent uploads (default: UPLOAD_MAX_WORKERS)
+    progress_callback : callable
+        Called as progress_callback(filename, bytes_sent, total_bytes)
         
-        if response.status_code == 200:
-            return True
-        else:
-            print(f"Error uploading file: {response.status_code}")
-            return False
+    Returns:
+    -------
+    list
+        One result dict per file, in input order: path, filename, ok, bytes,
+        seconds, status and error
+    """
+    items = [item if isinstance(item, (tuple, list)) else (item, None) for item in file_paths]
+    if not items:
+        return []
     
-    except Exception as e:
-        print(f"Error uploading file: {str(e)}")
-        return False
+    def upload(item):
+        file_path, filename = item
+        name = filename or os.path.basename(file_path)
+        callback = (lambda sent, total: progress_callback(name, sent, total)) if progress_callback else None
+        return _upload_one(file_path, filename, callback)
+    
+    max_workers = max(1, min(max_workers or UPLOAD_MAX_WORKERS, len(items)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(upload, items))
+    
+    if any(result["ok"] for result in results):
+        _file_list_cache.invalidate()
+    return results
 
 def delete_file(filename):
     """
@@ -117,9 +620,10 @@ def delete_file(filename):
         Success status
     """
     try:
-        response = requests.delete(f"{FLASK_SERVER_URL}/uploads/{filename}")
+        response = http_session.delete(f"{FLASK_SERVER_URL}/uploads/{filename}", "DELETE /uploads/<file>")
         
         if response.status_code == 200:
+            _file_list_cache.invalidate()
             return True
         else:
             print(f"Error deleting file: {response.status_code}")
@@ -129,17 +633,37 @@ def delete_file(filename):
         print(f"Error deleting file: {str(e)}")
         return False
 
-def check_server_status():
+def check_server_status(use_cache=True):
     """
     Check if Flask server is online
     
+    Parameters:
+    ----------
+    use_cache : bool
+        Treat the server as online without a request while the cached
+        file listing is fresh (it was just answered by the server)
+    
     Returns:
     -------
     bool
         Server status (True = online)
     """
+    if use_cache and _file_list_cache.is_fresh():
+        return True
+    
     try:
-        response = requests.get(f"{FLASK_SERVER_URL}/status")
+        response = http_session.get(f"{FLASK_SERVER_URL}/status", "GET /status")
         return response.status_code == 200
-    except:
-        return False
\ No newline at end of file
+    except requests.RequestException:
+        return False
+
+def get_http_stats():
+    """
+    Get latency statistics of the Flask server calls per endpoint
+    
+    Returns:
+    -------
+    dict
+        endpoint -> calls, errors, mean/p50/p95/max latency in seconds
+    """
+    return http_session.stats()
@@ -0,0 +1,135 @@
+import json
+import threading
+import time
+import google.generativeai as genai
+from config import (
+    GOOGLE_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_CONFIG_SUMMARY,
+    GEMINI_CONFIG_TRANSCRIBE,
+    GEMINI_CONFIG_MODULE,
+    GEMINI_CONFIG_QUIZ,
+    GEMINI_CONFIG_COMBINED
+)
+
+_lock = threading.Lock()
+_configured = False
+_models = {}  # (model name, generation config JSON) -> GenerativeModel
+
+_stats = {
+    "configure_seconds": 0.0,
+    "models_built": 0,
+    "model_build_seconds": 0.0,
+    "pool_hits": 0,
+    "warm_up_seconds": None,
+    "warm_up_error": None
+}
+
+def configure_client():
+    """
+    Configure the Gemini SDK once per process
+    """
+    global _configured
+
+    with _lock:
+        if _configured:
+            return
+        start = time.perf_counter()
+        genai.configure(api_key=GOOGLE_API_KEY)
+        _stats["configure_seconds"] = time.perf_counter() - start
+        _configured = True
+
+def get_model(model_name=GEMINI_MODEL, generation_config=None):
+    """
+    Get a shared GenerativeModel for a model name and generation config
+
+    Models are built once and reused by every session and request.
+
+    Parameters:
+    ----------
+    model_name : str
+        Gemini model name
+    generation_config : dict
+        Generation config (temperature, max_output_tokens, ...)
+
+    Returns:
+    -------
+    genai.GenerativeModel
+        Pooled model instance
+    """
+    configure_client()
+    key = (model_name, json.dumps(generation_config or {}, sort_keys=True))
+
+    with _lock:
+        model = _models.get(key)
+        if model is not None:
+            _stats["pool_hits"] += 1
+            return model
+
+        start = time.perf_counter()
+        model = genai.GenerativeModel(
+            model_name=model_name,
+            generation_config=generation_config
+        )
+        _stats["model_build_seconds"] += time.perf_counter() - start
+        _stats["models_built"] += 1
+        _models[key] = model
+        return model
+
+def warm_up(background=True):
+    """
+    Build the pooled models for every generation config and open the connection
+
+    Meant to be called at app start, so the first teacher request does not
+    pay client setup and connection cost.
+
+    Parameters:
+    ----------
+    background : bool
+        Run in a daemon thread instead of blocking the caller
+
+    Returns:
+    -------
+    threading.Thread or float
+        The warm-up thread, or the warm-up time in seconds if run inline
+    """
+    if background:
+        thread = threading.Thread(target=warm_up, kwargs={"background": False}, name="gemini-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    start = time.perf_counter()
+    try:
+        for config in (GEMINI_CONFIG_TRANSCRIBE, GEMINI_CONFIG_SUMMARY, GEMINI_CONFIG_MODULE,
+                       GEMINI_CONFIG_QUIZ, GEMINI_CONFIG_COMBINED):
+            get_model(GEMINI_MODEL, config)
+
+        # Cheap metadata request to establish the connection
+        genai.get_model(f"models/{GEMINI_MODEL}")
+    except Exception as e:
+        print(f"Error warming up Gemini client: {str(e)}")
+        _stats["warm_up_error"] = str(e)
+
+    elapsed = time.perf_counter() - start
+    _stats["warm_up_seconds"] = elapsed
+    return elapsed
+
+def get_client_stats():
+    """
+    Get client setup statistics
+
+    Returns:
+    -------
+    dict
+        Configure/build times, pool hits, warm-up time and the estimated setup
+        time saved by reusing pooled models
+    """
+    with _lock:
+        stats = dict(_stats)
+        stats["pooled_models"] = len(_models)
+
+    built = stats["models_built"]
+    average_build = stats["model_build_seconds"] / built if built else 0.0
+    stats["average_build_seconds"] = average_build
+    stats["setup_seconds_saved"] = average_build * stats["pool_hits"]
+    return stats
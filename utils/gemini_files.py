@@ -0,0 +1,267 @@
+import os
+import threading
+import time
+from utils.audio_store import audio_hash
+from utils.audio_processor import compact_audio, trim_silence
+from utils.ai_backend import get_backend
+from utils.rate_limiter import upload_limiter
+
+# Gemini keeps uploaded files for 48 hours; used when the API does not report an expiry
+DEFAULT_FILE_LIFETIME_SECONDS = 48 * 3600
+
+class UploadRegistry:
+    """
+    Registry of audio files uploaded to Gemini, keyed by content hash
+
+    The same recording is uploaded once and the remote file handle is shared
+    by every generation call while it is still valid. Callers acquire a handle
+    before using it and release it afterwards; remote files that are expired,
+    or unreferenced for longer than idle_ttl, are deleted from Gemini. A file
+    replaced by a re-upload (near its expiry) is deleted once the last handle
+    still using it is released.
+
+    With trim=True, long silences are removed first (see
+    audio_processor.trim_silence); with compact=True, a smaller mono copy of
+    the recording (see audio_processor.compact_audio) is uploaded instead of
+    the original. Transcript segments, cut from an already trimmed copy, are
+    acquired with trim=False.
+    """
+
+    def __init__(self, idle_ttl=3600, expiry_margin=300, compact=False, trim=False):
+        self.idle_ttl = idle_ttl
+        self.expiry_margin = expiry_margin
+        self.compact = compact
+        self.trim = trim
+        self._lock = threading.Lock()
+        self._entries = {}  # (file hash, trim) -> entry dict
+        self._names = {}  # remote file name -> entry key
+        self._file_refs = {}  # remote file name -> handles acquired and not yet released
+        self._retired = {}  # remote file name -> replaced file, deleted when its last handle is released
+        self._stats = {
+            "uploads": 0,
+            "reuses": 0,
+            "bytes_uploaded": 0,
+            "bytes_saved": 0,
+            "deleted": 0,
+            "upload_seconds": 0.0,
+            "compacted": 0,
+            "compact_bytes_saved": 0,
+            "compact_seconds": 0.0,
+            "trimmed": 0,
+            "trim_audio_seconds": 0.0,
+            "trim_audio_seconds_removed": 0.0,
+            "trim_seconds": 0.0
+        }
+
+    def _is_valid(self, entry, now):
+        return entry["file"] is not None and now < entry["expires_at"] - self.expiry_margin
+
+    def acquire(self, file_path, trim=None):
+        """
+        Get a remote file handle for a local file, uploading it only if needed
+
+        Parameters:
+        ----------
+        file_path : str
+            Path to the local audio file
+        trim : bool
+            Whether to trim long silences before uploading (None: the registry's setting)
+
+        Returns:
+        -------
+        File
+            Gemini file handle (must be passed to release when done)
+        """
+        file_hash = audio_hash(file_path)
+        size = os.path.getsize(file_path)
+        key = (file_hash, self.trim if trim is None else trim)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {
+                    "file": None,
+                    "key": key,
+                    "hash": file_hash,
+                    "trim": key[1],
+                    "size": size,
+                    "refs": 0,
+                    "expires_at": 0,
+                    "last_used": time.time(),
+                    "lock": threading.Lock()
+                }
+                self._entries[key] = entry
+            entry["refs"] += 1
+
+        # Upload under the entry lock so concurrent callers share one upload
+        try:
+            with entry["lock"]:
+                now = time.time()
+                if self._is_valid(entry, now):
+                    with self._lock:
+                        self._stats["reuses"] += 1
+                        self._stats["bytes_saved"] += entry["size"]
+                else:
+                    self._upload(entry, file_path)
+                with self._lock:
+                    remote_file = entry["file"]
+                    self._file_refs[remote_file.name] = self._file_refs.get(remote_file.name, 0) + 1
+        except Exception:
+            with self._lock:
+                entry["refs"] -= 1
+            raise
+
+        self.collect_garbage()
+        return remote_file
+
+    def _upload(self, entry, file_path):
+        """Upload (or re-upload an expired) file for an entry"""
+        old_file = entry["file"]
+
+        upload_path = file_path
+        source_id = entry["hash"]
+        trimmed = trim_silence(file_path, sha256=entry["hash"]) if entry["trim"] else None
+        if trimmed is not None:
+            upload_path = trimmed["path"]
+            source_id = trimmed["key"] if trimmed["trimmed"] else source_id
+            with self._lock:
+                self._stats["trimmed"] += 1
+                self._stats["trim_audio_seconds"] += trimmed["original_seconds"]
+                self._stats["trim_audio_seconds_removed"] += trimmed["seconds_saved"]
+                self._stats["trim_seconds"] += trimmed["seconds"]
+
+        compacted = compact_audio(upload_path, sha256=source_id) if self.compact else None
+        if compacted is not None:
+            upload_path = compacted["path"]
+            with self._lock:
+                self._stats["compacted"] += 1
+                self._stats["compact_bytes_saved"] += compacted["original_bytes"] - compacted["compact_bytes"]
+                self._stats["compact_seconds"] += compacted["seconds"]
+
+        started = time.perf_counter()
+        remote_file = upload_limiter.call(get_backend().upload_file, upload_path)
+        upload_seconds = time.perf_counter() - started
+        uploaded_at = time.time()
+
+        expiration = getattr(remote_file, "expiration_time", None)
+        if expiration is not None and hasattr(expiration, "timestamp"):
+            expires_at = expiration.timestamp()
+        else:
+            expires_at = uploaded_at + DEFAULT_FILE_LIFETIME_SECONDS
+
+        with self._lock:
+            if old_file is not None:
+                if self._file_refs.get(old_file.name):
+                    # Still used by in-flight requests; deleted by the last release
+                    self._retired[old_file.name] = old_file
+                    old_file = None
+                else:
+                    self._names.pop(old_file.name, None)
+            entry["file"] = remote_file
+            entry["size"] = os.path.getsize(upload_path)
+            entry["expires_at"] = expires_at
+            entry["last_used"] = uploaded_at
+            self._names[remote_file.name] = entry["key"]
+            self._stats["uploads"] += 1
+            self._stats["bytes_uploaded"] += entry["size"]
+            self._stats["upload_seconds"] += upload_seconds
+
+        if old_file is not None:
+            self._delete_remote(old_file)
+
+    def release(self, remote_file):
+        """
+        Release a handle returned by acquire
+
+        Parameters:
+        ----------
+        remote_file : File
+            Gemini file handle
+        """
+        retired = None
+        with self._lock:
+            name = remote_file.name
+            key = self._names.get(name)
+            count = self._file_refs.get(name, 0) - 1
+            if count > 0:
+                self._file_refs[name] = count
+            else:
+                self._file_refs.pop(name, None)
+                retired = self._retired.pop(name, None)
+                if retired is not None:
+                    self._names.pop(name, None)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["refs"] = max(0, entry["refs"] - 1)
+                entry["last_used"] = time.time()
+
+        if retired is not None:
+            # The file was replaced by a re-upload while this handle was in use
+            self._delete_remote(retired)
+
+    def collect_garbage(self):
+        """
+        Delete remote files that are expired or no longer referenced
+
+        Returns:
+        -------
+        int
+            Number of remote files deleted
+        """
+        now = time.time()
+        to_delete = []
+
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry["refs"] > 0 or entry["lock"].locked():
+                    continue
+                expired = now >= entry["expires_at"] - self.expiry_margin
+                idle = now - entry["last_used"] > self.idle_ttl
+                if expired or idle:
+                    del self._entries[key]
+                    if entry["file"] is not None:
+                        self._names.pop(entry["file"].name, None)
+                        to_delete.append(entry["file"])
+
+        for remote_file in to_delete:
+            self._delete_remote(remote_file)
+        return len(to_delete)
+
+    def _delete_remote(self, remote_file):
+        try:
+            get_backend().delete_file(remote_file.name)
+            with self._lock:
+                self._stats["deleted"] += 1
+        except Exception as e:
+            # Expired files may already be gone on the server
+            print(f"Error deleting remote file {remote_file.name}: {str(e)}")
+
+    def stats(self):
+        """
+        Get upload statistics
+
+        Returns:
+        -------
+        dict
+            Upload/reuse counters, bytes uploaded, bytes saved by reuse and by
+            compaction, the upload time compaction saved (estimated from the
+            measured upload throughput, minus the time spent compacting), and
+            the audio removed by silence trimming (seconds and percent), and
+            the upload rate limiter's statistics ("rate_limit")
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            if stats["bytes_uploaded"]:
+                seconds_per_byte = stats["upload_seconds"] / stats["bytes_uploaded"]
+                stats["compact_seconds_saved"] = stats["compact_bytes_saved"] * seconds_per_byte - stats["compact_seconds"]
+            else:
+                stats["compact_seconds_saved"] = 0.0
+            if stats["trim_audio_seconds"]:
+                stats["trim_removed_percent"] = 100 * stats["trim_audio_seconds_removed"] / stats["trim_audio_seconds"]
+            else:
+                stats["trim_removed_percent"] = 0.0
+            stats["active_files"] = sum(1 for e in self._entries.values() if e["file"] is not None)
+            stats["referenced_files"] = sum(1 for e in self._entries.values() if e["refs"] > 0)
+        stats["rate_limit"] = upload_limiter.stats()
+        return stats
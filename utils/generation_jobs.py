@@ -0,0 +1,202 @@
+import copy
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import GENERATION_MAX_WORKERS
+from utils.jobs import job_runner
+from utils.result_cache import hash_text, make_cache_key
+from utils.audio_store import audio_store, audio_hash, audio_id_from_hash
+from utils.ai_generator import (
+    generate_transcript,
+    generate_quiz,
+    generate_combined,
+    stream_summary,
+    stream_module
+)
+
+# Output types whose text is streamed into the job while it is generated
+STREAMED_OUTPUTS = ("summary", "module")
+
+@contextmanager
+def _holding_audio(job, audio_path):
+    """
+    Keep a stored recording while a job uses it, even if its session releases it
+    """
+    audio_id = audio_id_from_hash(audio_hash(audio_path))
+    owner = f"job:{job.id}"
+    audio_store.reference(audio_id, owner)
+    try:
+        yield
+    finally:
+        audio_store.release(audio_id, owner)
+
+def transcription_job(job, audio_path):
+    """
+    Job function: transcribe an audio file
+
+    Returns:
+    -------
+    str
+        Transcript text
+    """
+    job.update(progress=0.0, message="Mentranskripsikan audio")
+    with _holding_audio(job, audio_path):
+        return generate_transcript(audio_path)
+
+def submit_transcription(audio_path, meta=None):
+    """
+    Submit (or reuse) a transcription job for an audio file
+
+    The job is keyed by the audio content, so the same recording is only
+    transcribed once while its job is running or kept.
+
+    Returns:
+    -------
+    str
+        Job ID
+    """
+    key = make_cache_key("transcription", audio_hash(audio_path))
+    return job_runner.submit("transcription", transcription_job, {"audio_path": audio_path},
+                             key=key, meta=meta)
+
+def generation_job(job, output_types, content, is_audio, audio_path, num_questions, difficulty, combined=False):
+    """
+    Job function: generate the selected outputs concurrently (see _generate_outputs)
+    """
+    if not is_audio:
+        return _generate_outputs(job, output_types, content, is_audio, audio_path, num_questions, difficulty, combined)
+    with _holding_audio(job, audio_path):
+        return _generate_outputs(job, output_types, content, is_audio, audio_path, num_questions, difficulty, combined)
+
+def _generate_outputs(job, output_types, content, is_audio, audio_path, num_questions, difficulty, combined):
+    """
+    Generate the selected outputs concurrently
+
+    Summary and module text is streamed into job.partial["outputs"] as it
+    arrives, so pages can show a live preview by polling the job.
+
+    Returns:
+    -------
+    dict
+        {"results": {output_type: result}, "errors": {output_type: message}}
+    """
+    outputs = {
+        output_type: {"status": "running", "text": "", "ttft": None, "total": None, "error": None}
+        for output_type in output_types
+    }
+    lock = threading.Lock()
+
+    def publish(progress=None):
+        with lock:
+            snapshot = copy.deepcopy(outputs)
+        job.update(progress=progress, outputs=snapshot)
+
+    publish(0.0)
+
+    if combined:
+        results, errors = generate_combined(
+            content,
+            output_types,
+            difficulty=difficulty,
+            num_questions=num_questions,
+            is_audio=is_audio,
+            audio_file_path=audio_path
+        )
+        for output_type in output_types:
+            outputs[output_type]["status"] = "done" if output_type in results else "failed"
+            outputs[output_type]["error"] = errors.get(output_type)
+        publish(1.0)
+        return {"results": results, "errors": errors}
+
+    def run_output(output_type):
+        start = time.perf_counter()
+        try:
+            if output_type in STREAMED_OUTPUTS:
+                stream_fn = stream_summary if output_type == "summary" else stream_module
+                parts = []
+                for chunk in stream_fn(content, is_audio, audio_path):
+                    with lock:
+                        if not parts:
+                            outputs[output_type]["ttft"] = time.perf_counter() - start
+                        parts.append(chunk)
+                        outputs[output_type]["text"] += chunk
+                    publish()
+                result = "".join(parts)
+            else:
+                result = generate_quiz(content, difficulty, num_questions, is_audio, audio_path)
+        except Exception as e:
+            with lock:
+                outputs[output_type]["status"] = "failed"
+                outputs[output_type]["error"] = str(e)
+            raise e
+
+        with lock:
+            outputs[output_type]["status"] = "done"
+            outputs[output_type]["total"] = time.perf_counter() - start
+        return result
+
+    results = {}
+    errors = {}
+    max_workers = max(1, min(GENERATION_MAX_WORKERS, len(output_types)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(run_output, output_type): output_type for output_type in output_types}
+        for done, future in enumerate(as_completed(futures), start=1):
+            output_type = futures[future]
+            try:
+                results[output_type] = future.result()
+            except Exception as e:
+                # A failed output does not discard the ones that already finished
+                errors[output_type] = str(e)
+            publish(done / len(output_types))
+
+    if not results:
+        raise RuntimeError("; ".join(f"{output_type}: {message}" for output_type, message in errors.items()))
+
+    return {"results": results, "errors": errors}
+
+def submit_generation(output_types, content, is_audio, audio_path, num_questions, difficulty,
+                      combined=False, meta=None):
+    """
+    Submit (or reuse) a generation job
+
+    The job is keyed by the input (transcript text or audio content) and
+    the settings, so an identical request returns the existing job.
+
+    Parameters:
+    ----------
+    output_types : list
+        Output types ("summary", "module", "quiz")
+    content : str
+        Transcript text (None when generating from audio)
+    is_audio : bool
+        Whether to generate directly from audio
+    audio_path : str
+        Path to the audio file
+    num_questions : int
+        Number of quiz questions
+    difficulty : str
+        Quiz difficulty (Easy, Medium, Hard)
+    combined : bool
+        Whether to request all outputs in a single AI call
+    meta : dict
+        Information the page needs to store the results (filename, material, ...)
+
+    Returns:
+    -------
+    str
+        Job ID
+    """
+    source = ("audio", audio_hash(audio_path)) if is_audio else ("text", hash_text(content))
+    key = make_cache_key("generation", sorted(output_types), source, num_questions, difficulty, combined)
+    params = {
+        "output_types": list(output_types),
+        "content": content,
+        "is_audio": is_audio,
+        "audio_path": audio_path,
+        "num_questions": num_questions,
+        "difficulty": difficulty,
+        "combined": combined
+    }
+    return job_runner.submit("generation", generation_job, params, key=key, meta=meta)
@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_RETRY_BACKOFF
+)
+from utils.metrics import percentile
+
+# Only requests that can be repeated safely are retried
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+
+class PooledSession:
+    """
+    Shared HTTP session with a keep-alive connection pool, timeouts and retries
+
+    One requests.Session is used by every thread; its connection pool is
+    thread-safe, so concurrent pages and workers reuse open connections
+    instead of opening a new TCP connection per call. Idempotent requests are
+    retried with exponential backoff on connection errors and 502/503/504.
+    Latency is recorded per endpoint label.
+    """
+
+    def __init__(self, connect_timeout=3.05, read_timeout=30, pool_size=10, max_retries=3,
+                 retry_backoff=0.5, max_samples=1000):
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=retry_backoff,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._max_samples = max_samples
+        self._latencies = {}  # endpoint -> deque of seconds
+        self._counts = {}  # endpoint -> {"calls": n, "errors": n}
+
+    def request(self, method, url, endpoint=None, **kwargs):
+        """
+        Send a request through the pool
+
+        Parameters:
+        ----------
+        method : str
+            HTTP method
+        url : str
+            Full URL
+        endpoint : str
+            Label the latency is recorded under (e.g. "GET /files");
+            defaults to the method and URL
+        **kwargs :
+            Passed to requests.Session.request (timeout defaults to the
+            configured connect/read timeouts)
+
+        Returns:
+        -------
+        requests.Response
+            Response (for stream=True the latency covers the headers only)
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        endpoint = endpoint or f"{method.upper()} {url}"
+        start = time.perf_counter()
+        error = False
+
+        try:
+            response = self.session.request(method, url, **kwargs)
+            error = response.status_code >= 500
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._record(endpoint, time.perf_counter() - start, error)
+
+    def get(self, url, endpoint=None, **kwargs):
+        return self.request("GET", url, endpoint, **kwargs)
+
+    def post(self, url, endpoint=None, **kwargs):
+        return self.request("POST", url, endpoint, **kwargs)
+
+    def delete(self, url, endpoint=None, **kwargs):
+        return self.request("DELETE", url, endpoint, **kwargs)
+
+    def _record(self, endpoint, seconds, error):
+        with self._lock:
+            latencies = self._latencies.setdefault(endpoint, deque(maxlen=self._max_samples))
+            latencies.append(seconds)
+            counts = self._counts.setdefault(endpoint, {"calls": 0, "errors": 0})
+            counts["calls"] += 1
+            counts["errors"] += int(error)
+
+    def stats(self):
+        """
+        Get latency statistics per endpoint
+
+        Returns:
+        -------
+        dict
+            endpoint -> calls, errors, mean/p50/p95/max latency in seconds
+            (over the most recent samples)
+        """
+        with self._lock:
+            snapshot = {endpoint: (list(self._latencies[endpoint]), dict(counts))
+                        for endpoint, counts in self._counts.items()}
+
+        stats = {}
+        for endpoint, (latencies, counts) in snapshot.items():
+            stats[endpoint] = {
+                "calls": counts["calls"],
+                "errors": counts["errors"],
+                "mean_seconds": sum(latencies) / len(latencies) if latencies else None,
+                "p50_seconds": percentile(latencies, 0.5),
+                "p95_seconds": percentile(latencies, 0.95),
+                "max_seconds": max(latencies) if latencies else None
+            }
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._latencies.clear()
+            self._counts.clear()
+
+    def close(self):
+        self.session.close()
+
+# Shared by every session and worker thread
+http_session = PooledSession(
+    connect_timeout=HTTP_CONNECT_TIMEOUT,
+    read_timeout=HTTP_READ_TIMEOUT,
+    pool_size=HTTP_POOL_SIZE,
+    max_retries=HTTP_MAX_RETRIES,
+    retry_backoff=HTTP_RETRY_BACKOFF
+)
@@ -0,0 +1,278 @@
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import CACHE_FOLDER, JOB_MAX_WORKERS, JOB_RETENTION_HOURS
+from utils.result_cache import make_cache_key
+
+# Job states; "interrupted" jobs were running when the process stopped
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+INTERRUPTED = "interrupted"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+class Job:
+    """
+    Handle passed to a job function to report progress and partial output
+    """
+
+    def __init__(self, runner, job_id):
+        self._runner = runner
+        self.id = job_id
+
+    def update(self, progress=None, message=None, **partial):
+        """
+        Report progress (0-1), a status message and/or partial output fields
+
+        Parameters:
+        ----------
+        progress : float
+            Fraction of the job done
+        message : str
+            Short status message
+        **partial :
+            Values merged into the job's "partial" dict (e.g. streamed text)
+        """
+        self._runner._update(self.id, progress, message, partial)
+
+class JobRunner:
+    """
+    Runs transcription and generation jobs in worker threads
+
+    Each job is stored as a JSON file (status, progress, partial output,
+    result, error), so pages can poll it by ID across reruns, page switches
+    and reconnects. Submitting a request with the key of a queued, running
+    or finished job returns that job instead of starting the work again.
+    """
+
+    def __init__(self, folder, max_workers=4, retention_hours=24, save_interval=0.5):
+        self.folder = folder
+        self.retention_seconds = retention_hours * 3600
+        self.save_interval = save_interval
+        os.makedirs(folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._jobs = {}  # job id -> job dict
+        self._keys = {}  # request key -> job id
+        self._last_saved = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._load()
+
+    def _path(self, job_id):
+        return os.path.join(self.folder, f"{job_id}.json")
+
+    def _load(self):
+        """Load persisted jobs; work that was running when the process stopped is lost"""
+        now = time.time()
+        for filename in os.listdir(self.folder):
+            if not filename.endswith(".json"):
+                continue
+            path = os.path.join(self.folder, filename)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if now - job.get("updated_at", 0) > self.retention_seconds:
+                self._remove_file(path)
+                continue
+
+            if job["status"] in ACTIVE_STATES:
+                job["status"] = INTERRUPTED
+                job["error"] = "Proses dihentikan sebelum pekerjaan selesai."
+                self._write(job)
+
+            self._jobs[job["id"]] = job
+            if job.get("key") and job["status"] == DONE:
+                self._keys[job["key"]] = job["id"]
+
+    def _write(self, job):
+        # Write to a temporary file first so readers never see a partial file
+        path = self._path(job["id"])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving job {job['id']}: {str(e)}")
+
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _save(self, job_id, force=False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_saved.get(job_id, 0) < self.save_interval:
+                return
+            self._last_saved[job_id] = now
+            snapshot = copy.deepcopy(self._jobs[job_id])
+        self._write(snapshot)
+
+    def submit(self, kind, fn, params, key=None, meta=None):
+        """
+        Submit a job
+
+        Parameters:
+        ----------
+        kind : str
+            Job kind (e.g. "transcription", "generation")
+        fn : callable
+            Job function, called as fn(job, **params); its return value
+            (JSON serializable) becomes the job result
+        params : dict
+            Keyword arguments of fn (JSON serializable, stored with the job)
+        key : str
+            Request key; defaults to a hash of kind and params
+        meta : dict
+            Extra information stored with the job but not passed to fn
+
+        Returns:
+        -------
+        str
+            Job ID
+        """
+        key = key or make_cache_key(kind, params)
+
+        with self._lock:
+            existing_id = self._keys.get(key)
+            existing = self._jobs.get(existing_id)
+            if existing is not None and (existing["status"] in ACTIVE_STATES or existing["status"] == DONE):
+                return existing_id
+
+            job_id = uuid.uuid4().hex[:12]
+            now = time.time()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "kind": kind,
+                "key": key,
+                "params": params,
+                "meta": meta or {},
+                "status": QUEUED,
+                "progress": 0.0,
+                "message": "",
+                "partial": {},
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+                "started_at": None,
+                "finished_at": None
+            }
+            self._keys[key] = job_id
+
+        self._save(job_id, force=True)
+        self._executor.submit(self._run, job_id, fn)
+        return job_id
+
+    def _run(self, job_id, fn):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = RUNNING
+            job["started_at"] = job["updated_at"] = time.time()
+            params = copy.deepcopy(job["params"])
+        self._save(job_id, force=True)
+
+        try:
+            result = fn(Job(self, job_id), **params)
+        except Exception as e:
+            print(f"Error running job {job_id}: {str(e)}")
+            with self._lock:
+                job["status"] = FAILED
+                job["error"] = str(e)
+                # A failed request can be submitted again
+                if self._keys.get(job["key"]) == job_id:
+                    del self._keys[job["key"]]
+        else:
+            with self._lock:
+                job["status"] = DONE
+                job["progress"] = 1.0
+                job["result"] = result
+
+        with self._lock:
+            job["finished_at"] = job["updated_at"] = time.time()
+        self._save(job_id, force=True)
+
+    def _update(self, job_id, progress, message, partial):
+        with self._lock:
+            job = self._jobs[job_id]
+            if progress is not None:
+                job["progress"] = max(0.0, min(1.0, progress))
+            if message is not None:
+                job["message"] = message
+            job["partial"].update(partial)
+            job["updated_at"] = time.time()
+        self._save(job_id)
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job
+
+        Parameters:
+        ----------
+        job_id : str
+            Job ID
+
+        Returns:
+        -------
+        dict or None
+            Job (id, kind, params, status, progress, message, partial,
+            result, error, timestamps), or None if unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return copy.deepcopy(job) if job is not None else None
+
+    def list_jobs(self, kind=None, status=None):
+        """
+        List job snapshots, newest first
+
+        Returns:
+        -------
+        list
+            Jobs matching the kind and status (if given)
+        """
+        with self._lock:
+            jobs = [copy.deepcopy(job) for job in self._jobs.values()
+                    if (kind is None or job["kind"] == kind) and (status is None or job["status"] == status)]
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def cleanup(self):
+        """
+        Delete finished jobs older than the retention period
+
+        Returns:
+        -------
+        int
+            Number of jobs deleted
+        """
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] not in ACTIVE_STATES and job["updated_at"] < cutoff]
+            for job_id in expired:
+                job = self._jobs.pop(job_id)
+                self._last_saved.pop(job_id, None)
+                if self._keys.get(job["key"]) == job_id:
+                    del self._keys[job["key"]]
+
+        for job_id in expired:
+            self._remove_file(self._path(job_id))
+        return len(expired)
+
+# Shared by every session; lives as long as the Streamlit server process
+job_runner = JobRunner(
+    folder=os.path.join(CACHE_FOLDER, "jobs"),
+    max_workers=JOB_MAX_WORKERS,
+    retention_hours=JOB_RETENTION_HOURS
+)
@@ -0,0 +1,237 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers (None if empty)
+    """
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+class CallTimer:
+    """
+    Measures one AI call and adds its record to a CallMetrics when finished
+
+    Timeline: start -> uploaded (audio only) -> sent -> first_byte -> finish.
+    For non-streaming calls the first byte is the complete response.
+    """
+
+    def __init__(self, metrics, output_type, input_kind, model, mode="separate", streamed=False):
+        self._metrics = metrics
+        self._start = time.perf_counter()
+        self._sent = None
+        self._finished = False
+        self.record = {
+            "timestamp": time.time(),
+            "output_type": output_type,
+            "input_kind": input_kind,
+            "model": model,
+            "mode": mode,
+            "streamed": streamed,
+            "estimated_prompt_tokens": None,
+            "counted_prompt_tokens": None,
+            "prompt_tokens": None,
+            "output_tokens": None,
+            "total_tokens": None,
+            "upload_seconds": 0.0,
+            "ttfb_seconds": None,
+            "generation_seconds": None,
+            "latency_seconds": None,
+            "error": None
+        }
+
+    def uploaded(self):
+        """Mark the audio upload (or registry reuse) as done"""
+        self.record["upload_seconds"] = time.perf_counter() - self._start
+
+    def sent(self, estimated_prompt_tokens, counted_prompt_tokens=None):
+        """Mark the request as sent, with its prompt token count measured beforehand"""
+        self._sent = time.perf_counter()
+        self.record["estimated_prompt_tokens"] = estimated_prompt_tokens
+        self.record["counted_prompt_tokens"] = counted_prompt_tokens
+
+    def first_byte(self):
+        """Mark the first response bytes (only the first call counts)"""
+        if self.record["ttfb_seconds"] is None:
+            self.record["ttfb_seconds"] = time.perf_counter() - (self._sent or self._start)
+
+    def finish(self, usage=None, error=None):
+        """
+        Complete the record and store it
+
+        Parameters:
+        ----------
+        usage : object
+            usage_metadata of the response
+        error : Exception or str
+            Error that ended the call, if any
+        """
+        if self._finished:
+            return
+        self._finished = True
+
+        end = time.perf_counter()
+        self.record["latency_seconds"] = end - self._start
+        if self._sent is not None:
+            self.record["generation_seconds"] = end - self._sent
+        if usage is not None:
+            self.record["prompt_tokens"] = getattr(usage, "prompt_token_count", 0) or 0
+            self.record["output_tokens"] = getattr(usage, "candidates_token_count", 0) or 0
+            self.record["total_tokens"] = (getattr(usage, "total_token_count", 0)
+                                           or self.record["prompt_tokens"] + self.record["output_tokens"])
+        if error is not None:
+            self.record["error"] = str(error)
+
+        self._metrics.add(self.record)
+
+class CallMetrics:
+    """
+    In-process log of AI call records (tokens and latency per call)
+
+    The most recent max_records records are kept in memory; when log_file is
+    set every record is also appended to it as a JSON line.
+    """
+
+    def __init__(self, max_records=10000, log_file=None):
+        self.log_file = log_file
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records)
+
+    def start(self, output_type, input_kind, model, mode="separate", streamed=False):
+        """
+        Start timing one call
+
+        Parameters:
+        ----------
+        output_type : str
+            Output type (transcript, summary, module, quiz, ...)
+        input_kind : str
+            "audio" or "transcript"
+        model : str
+            Model name
+        mode : str
+            Generation mode ("separate" or "combined")
+        streamed : bool
+            Whether the response is streamed
+
+        Returns:
+        -------
+        CallTimer
+            Timer to mark the call's progress on
+        """
+        return CallTimer(self, output_type, input_kind, model, mode, streamed)
+
+    def add(self, record):
+        """Store a finished call record"""
+        with self._lock:
+            self._records.append(dict(record))
+            if self.log_file:
+                try:
+                    with open(self.log_file, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    print(f"Error writing call metrics: {str(e)}")
+
+    def query(self, since=None, **filters):
+        """
+        Get call records, optionally filtered
+
+        Parameters:
+        ----------
+        since : float
+            Only records with a timestamp at or after this time
+        **filters :
+            Field values to match, e.g. output_type="summary", input_kind="audio"
+
+        Returns:
+        -------
+        list
+            Matching records, oldest first
+        """
+        with self._lock:
+            records = list(self._records)
+
+        return [
+            dict(record) for record in records
+            if (since is None or record["timestamp"] >= since)
+            and all(record.get(key) == value for key, value in filters.items())
+        ]
+
+    def summarize(self, group_by=("output_type", "input_kind"), since=None, **filters):
+        """
+        Aggregate call records per group
+
+        Parameters:
+        ----------
+        group_by : tuple
+            Record fields to group by
+        since : float
+            Only records with a timestamp at or after this time
+        **filters :
+            Field values to match (see query)
+
+        Returns:
+        -------
+        dict
+            {group key tuple: {"calls", "errors", token totals, mean/p50/p95 latency,
+            p50 time to first byte, total upload seconds}}
+        """
+        groups = {}
+        for record in self.query(since=since, **filters):
+            groups.setdefault(tuple(record.get(field) for field in group_by), []).append(record)
+
+        summary = {}
+        for key, records in groups.items():
+            latencies = [r["latency_seconds"] for r in records if r["latency_seconds"] is not None]
+            ttfbs = [r["ttfb_seconds"] for r in records if r["ttfb_seconds"] is not None]
+            summary[key] = {
+                "calls": len(records),
+                "errors": sum(1 for r in records if r["error"]),
+                "prompt_tokens": sum(r["prompt_tokens"] or 0 for r in records),
+                "output_tokens": sum(r["output_tokens"] or 0 for r in records),
+                "total_tokens": sum(r["total_tokens"] or 0 for r in records),
+                "upload_seconds": sum(r["upload_seconds"] or 0 for r in records),
+                "mean_latency_seconds": sum(latencies) / len(latencies) if latencies else None,
+                "p50_latency_seconds": percentile(latencies, 0.5),
+                "p95_latency_seconds": percentile(latencies, 0.95),
+                "p50_ttfb_seconds": percentile(ttfbs, 0.5)
+            }
+        return summary
+
+    def export_jsonl(self, path, since=None, **filters):
+        """
+        Write call records to a JSON lines file
+
+        Parameters:
+        ----------
+        path : str
+            Output file path
+        since : float
+            Only records with a timestamp at or after this time
+        **filters :
+            Field values to match (see query)
+
+        Returns:
+        -------
+        int
+            Number of records written
+        """
+        records = self.query(since=since, **filters)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        with open(path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+        return len(records)
+
+    def clear(self):
+        """Remove all in-memory records"""
+        with self._lock:
+            self._records.clear()
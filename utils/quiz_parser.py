@@ -0,0 +1,359 @@
+import difflib
+import json
+import re
+
+OPTION_KEYS = ("a", "b", "c", "d")
+
+# Curly quotes some responses use instead of JSON quotes
+_QUOTE_TRANSLATION = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"})
+
+def _strip_comments(text):
+    """
+    Remove # and // comments and trailing commas outside of JSON strings
+    """
+    result = []
+    in_string = False
+    escaped = False
+    i = 0
+
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            result.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char == "#" or text.startswith("//", i):
+            # Skip to the end of the line
+            end = text.find("\n", i)
+            i = len(text) if end == -1 else end
+            continue
+        elif char in "}]":
+            # Drop a trailing comma before a closing bracket
+            j = len(result) - 1
+            while j >= 0 and result[j].isspace():
+                j -= 1
+            if j >= 0 and result[j] == ",":
+                del result[j]
+        result.append(char)
+        i += 1
+
+    return "".join(result)
+
+def _close_truncated(text):
+    """
+    Close the strings and brackets left open by a truncated response
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    last_complete = 0
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            # Position after the last complete value inside the top-level array
+            if len(stack) <= 2:
+                last_complete = i + 1
+
+    if not stack:
+        return text
+
+    # Cut the unfinished question off and close the remaining brackets
+    text = text[:last_complete].rstrip().rstrip(",")
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+
+    return text + "".join(reversed(stack))
+
+def repair_json(text):
+    """
+    Parse JSON from a model response, repairing common defects
+
+    Handles markdown code fences, text around the JSON, curly quotes,
+    comments, trailing commas and responses cut off mid-way.
+
+    Parameters:
+    ----------
+    text : str
+        Response text
+
+    Returns:
+    -------
+    dict or list
+        Parsed JSON
+
+    Raises:
+    ------
+    ValueError
+        If no JSON can be recovered
+    """
+    text = (text or "").translate(_QUOTE_TRANSLATION)
+    text = re.sub(r"```(?:json)?", "", text)
+
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("Tidak ditemukan format JSON yang valid dalam response.")
+    text = text[min(starts):]
+
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+
+    text = _strip_comments(text)
+    end = max(text.rfind("}"), text.rfind("]"))
+    for candidate in (text[:end + 1], _close_truncated(text)):
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+
+    raise ValueError("Tidak ditemukan format JSON yang valid dalam response.")
+
+def _find_question_objects(text):
+    """
+    Scan text for standalone JSON objects that look like quiz questions
+
+    Used when the response as a whole cannot be repaired, so the intact
+    questions can still be kept.
+    """
+    objects = []
+    accepted_start = None
+    starts = []
+    in_string = False
+    escaped = False
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char == "{":
+            starts.append(i)
+        elif char == "}" and starts:
+            start = starts.pop()
+            # Skip objects that enclose an already accepted question
+            if accepted_start is not None and start < accepted_start:
+                continue
+            candidate = text[start:i + 1]
+            if '"question"' not in candidate:
+                continue
+            try:
+                objects.append(json.loads(_strip_comments(candidate)))
+            except json.JSONDecodeError:
+                continue
+            accepted_start = start
+
+    return objects
+
+def validate_question(question):
+    """
+    Validate and normalize one quiz question
+
+    Parameters:
+    ----------
+    question : dict
+        Question as returned by the model
+
+    Returns:
+    -------
+    dict
+        Normalized question
+
+    Raises:
+    ------
+    ValueError
+        If the question cannot be used
+    """
+    if not isinstance(question, dict):
+        raise ValueError("Soal harus berupa objek JSON")
+
+    text = str(question.get("question") or "").strip()
+    if not text:
+        raise ValueError("Teks pertanyaan kosong")
+
+    options = question.get("options")
+    if isinstance(options, list) and len(options) == len(OPTION_KEYS):
+        options = dict(zip(OPTION_KEYS, options))
+    if not isinstance(options, dict):
+        raise ValueError("Opsi jawaban tidak valid")
+    options = {str(k).strip().lower(): str(v).strip() for k, v in options.items()}
+    if any(not options.get(key) for key in OPTION_KEYS):
+        raise ValueError("Opsi jawaban harus berisi a, b, c, d")
+    options = {key: options[key] for key in OPTION_KEYS}
+
+    # Accept answers such as "A", "a)" or "(b)"
+    answer = re.sub(r"[^a-z]", "", str(question.get("correct_answer") or "").lower())
+    correct_text = str(question.get("correct_text") or "").strip()
+
+    matching_keys = [key for key, value in options.items() if value.casefold() == correct_text.casefold()]
+
+    if answer not in OPTION_KEYS:
+        if len(matching_keys) != 1:
+            raise ValueError("Jawaban benar harus salah satu dari opsi: a, b, c, d")
+        answer = matching_keys[0]
+    elif correct_text and answer not in matching_keys:
+        raise ValueError("Teks jawaban benar tidak cocok dengan opsi yang dipilih")
+
+    return {
+        "question": text,
+        "options": options,
+        "correct_answer": answer,
+        "correct_text": options[answer],
+        "explanation": str(question.get("explanation") or "").strip()
+    }
+
+def parse_quiz_response(text):
+    """
+    Parse a quiz response and validate every question separately
+
+    Parameters:
+    ----------
+    text : str
+        Response text containing the quiz JSON
+
+    Returns:
+    -------
+    list
+        Valid, normalized questions
+    list
+        Error message of every rejected question
+    """
+    try:
+        data = repair_json(text)
+        raw_questions = data.get("quiz", []) if isinstance(data, dict) else data
+        if not isinstance(raw_questions, list):
+            raise ValueError("Field 'quiz' harus berupa daftar soal")
+    except ValueError as e:
+        raw_questions = _find_question_objects(text or "")
+        if not raw_questions:
+            return [], [str(e)]
+
+    questions = []
+    errors = []
+    for raw_question in raw_questions:
+        try:
+            questions.append(validate_question(raw_question))
+        except ValueError as e:
+            errors.append(str(e))
+
+    return questions, errors
+
+def _normalize_for_similarity(text):
+    return re.sub(r"\W+", " ", text.casefold()).strip()
+
+def is_similar_question(first, second, threshold=0.85):
+    """
+    Check whether two validated questions are near-duplicates
+
+    Questions match when they have the same correct answer and either nearly
+    identical texts, or slightly reworded texts with nearly the same options.
+    Questions that differ in one key word ("first" vs "second president")
+    have different answers and are kept.
+
+    Parameters:
+    ----------
+    first, second : dict
+        Validated questions
+    threshold : float
+        Similarity ratio (0-1) above which texts count as the same
+
+    Returns:
+    -------
+    bool
+        True if the questions are near-duplicates
+    """
+    answer_ratio = difflib.SequenceMatcher(None, _normalize_for_similarity(first["correct_text"]),
+                                           _normalize_for_similarity(second["correct_text"])).ratio()
+    if answer_ratio < threshold:
+        return False
+
+    question_matcher = difflib.SequenceMatcher(None, _normalize_for_similarity(first["question"]),
+                                               _normalize_for_similarity(second["question"]))
+    if question_matcher.quick_ratio() < threshold - 0.15:
+        return False
+
+    question_ratio = question_matcher.ratio()
+    if question_ratio >= threshold:
+        return True
+    if question_ratio < threshold - 0.15:
+        return False
+
+    first_options = " ".join(sorted(_normalize_for_similarity(v) for v in first["options"].values()))
+    second_options = " ".join(sorted(_normalize_for_similarity(v) for v in second["options"].values()))
+    return difflib.SequenceMatcher(None, first_options, second_options).ratio() >= threshold
+
+def remove_duplicate_questions(questions, existing=(), threshold=0.85):
+    """
+    Drop questions that are near-duplicates of an earlier or existing question
+
+    Parameters:
+    ----------
+    questions : list
+        Validated questions, in order of preference
+    existing : list
+        Questions already accepted (kept, and compared against)
+    threshold : float
+        Similarity ratio passed to is_similar_question
+
+    Returns:
+    -------
+    list
+        Unique questions from questions
+    int
+        Number of duplicates removed
+    """
+    kept = list(existing)
+    unique = []
+
+    for question in questions:
+        if any(is_similar_question(question, other, threshold) for other in kept):
+            continue
+        kept.append(question)
+        unique.append(question)
+
+    return unique, len(questions) - len(unique)
@@ -0,0 +1,256 @@
+import asyncio
+import random
+import threading
+import time
+from google.api_core import exceptions as google_exceptions
+from config import (
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_TOKENS_PER_MINUTE,
+    GEMINI_UPLOADS_PER_MINUTE,
+    GEMINI_MAX_RETRIES,
+    GEMINI_RETRY_BASE_DELAY,
+    GEMINI_RETRY_MAX_DELAY
+)
+
+# Errors worth retrying: quota (429), server errors and timeouts
+RETRYABLE_EXCEPTIONS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded
+)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+def is_retryable(error):
+    """
+    Check whether an API error is transient and worth retrying
+    """
+    if isinstance(error, RETRYABLE_EXCEPTIONS):
+        return True
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code in RETRYABLE_STATUS_CODES
+
+def _is_quota_error(error):
+    return (isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests))
+            or getattr(error, "code", None) == 429)
+
+class RateLimiter:
+    """
+    Token-bucket scheduler for API calls, limited in requests and tokens per minute
+
+    Every call reserves one request and its estimated tokens. Reservations
+    may drive a bucket negative; the caller then sleeps until the bucket has
+    refilled, so waiting callers are served in arrival order at the quota
+    rate instead of all retrying at once. Transient errors are retried with
+    jittered exponential backoff, and a quota error drains the buckets so
+    the other callers slow down too. With tokens_per_minute=None only
+    requests are limited.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_retries=5, base_delay=1.0, max_delay=60.0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._request_balance = float(requests_per_minute)
+        self._token_balance = float(tokens_per_minute or 0)
+        self._last_refill = time.monotonic()
+
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttled": 0,
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0
+        }
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_balance = min(self.requests_per_minute,
+                                    self._request_balance + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._token_balance = min(self.tokens_per_minute,
+                                      self._token_balance + elapsed * self.tokens_per_minute / 60)
+
+    def _reserve(self, tokens):
+        """
+        Reserve capacity for one call and return how long the caller must wait
+        """
+        # A single call can never need more than a full minute of quota
+        tokens = min(max(0, int(tokens)), self.tokens_per_minute) if self.tokens_per_minute else 0
+
+        with self._lock:
+            self._refill(time.monotonic())
+            self._request_balance -= 1
+            self._token_balance -= tokens
+
+            wait = max(
+                0.0,
+                -self._request_balance * 60 / self.requests_per_minute,
+                -self._token_balance * 60 / self.tokens_per_minute if self.tokens_per_minute else 0.0
+            )
+
+            self._stats["calls"] += 1
+            self._stats["total_wait_seconds"] += wait
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], wait)
+            if wait > 0:
+                self._stats["throttled"] += 1
+                self._stats["queue_depth"] += 1
+                self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+
+        return wait
+
+    def _leave_queue(self):
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+
+    def _backoff_delay(self, attempt):
+        # Full jitter keeps retrying callers from synchronizing
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _penalize(self):
+        """Drain the buckets after a quota error so every caller backs off"""
+        with self._lock:
+            self._request_balance = min(self._request_balance, 0.0)
+            self._token_balance = min(self._token_balance, 0.0)
+
+    def settle(self, estimated_tokens, actual_tokens):
+        """
+        Correct the token bucket once the real token count of a call is known
+
+        Parameters:
+        ----------
+        estimated_tokens : int
+            Tokens reserved before the call
+        actual_tokens : int
+            Tokens reported by the API
+        """
+        if not actual_tokens:
+            return
+        with self._lock:
+            self._token_balance -= actual_tokens - estimated_tokens
+
+    def acquire(self, tokens=0):
+        """
+        Block until a call with the given token estimate may be sent
+
+        Parameters:
+        ----------
+        tokens : int
+            Estimated tokens of the call
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    async def acquire_async(self, tokens=0):
+        """
+        Async counterpart of acquire
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._leave_queue()
+
+    def call(self, fn, *args, tokens=0, **kwargs):
+        """
+        Call fn under the rate limit, retrying transient errors
+
+        Parameters:
+        ----------
+        fn : callable
+            API function (e.g. model.generate_content or genai.upload_file)
+        *args, **kwargs :
+            Arguments for fn
+        tokens : int
+            Estimated tokens of the call
+
+        Returns:
+        -------
+        any
+            Return value of fn
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens)
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise e
+                if _is_quota_error(e):
+                    self._penalize()
+                with self._lock:
+                    self._stats["retries"] += 1
+                print(f"Retrying API call after error: {str(e)}")
+                time.sleep(self._backoff_delay(attempt))
+
+    async def call_async(self, fn, *args, tokens=0, **kwargs):
+        """
+        Async counterpart of call, for coroutine functions such as generate_content_async
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.acquire_async(tokens)
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    with self._lock:
+                        self._stats["failures"] += 1
+                    raise e
+                if _is_quota_error(e):
+                    self._penalize()
+                with self._lock:
+                    self._stats["retries"] += 1
+                print(f"Retrying API call after error: {str(e)}")
+                await asyncio.sleep(self._backoff_delay(attempt))
+
+    def stats(self):
+        """
+        Get scheduler statistics
+
+        Returns:
+        -------
+        dict
+            Call/retry/failure counters, current and maximum queue depth,
+            wait times and remaining bucket capacity
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            stats = dict(self._stats)
+            stats["average_wait_seconds"] = stats["total_wait_seconds"] / stats["calls"] if stats["calls"] else 0.0
+            stats["requests_available"] = self._request_balance
+            stats["tokens_available"] = self._token_balance
+        return stats
+
+# Shared by every generate_content call in the process
+gemini_limiter = RateLimiter(
+    requests_per_minute=GEMINI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=GEMINI_TOKENS_PER_MINUTE,
+    max_retries=GEMINI_MAX_RETRIES,
+    base_delay=GEMINI_RETRY_BASE_DELAY,
+    max_delay=GEMINI_RETRY_MAX_DELAY
+)
+
+# Shared by every upload_file call; uploads do not use the generate quota
+upload_limiter = RateLimiter(
+    requests_per_minute=GEMINI_UPLOADS_PER_MINUTE,
+    tokens_per_minute=None,
+    max_retries=GEMINI_MAX_RETRIES,
+    base_delay=GEMINI_RETRY_BASE_DELAY,
+    max_delay=GEMINI_RETRY_MAX_DELAY
+)
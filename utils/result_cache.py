@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+def hash_text(text):
+    """
+    Compute a SHA-256 hex digest of a text
+
+    Parameters:
+    ----------
+    text : str
+        Text to hash
+
+    Returns:
+    -------
+    str
+        Hex digest
+    """
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    """
+    Compute a SHA-256 hex digest of a file without loading it into memory
+
+    Parameters:
+    ----------
+    file_path : str
+        Path to the file
+    chunk_size : int
+        Number of bytes read per iteration
+
+    Returns:
+    -------
+    str
+        Hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_cache_key(*parts):
+    """
+    Build a cache key from JSON-serializable parts
+
+    Parameters:
+    ----------
+    *parts : any
+        Values that together identify a result (input hash, prompt, config, ...)
+
+    Returns:
+    -------
+    str
+        Hex digest usable as a cache key
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """
+    Disk-backed key/value cache with size-bounded LRU eviction
+
+    Each entry is stored as a JSON file named after its key. The access order
+    is kept in memory and mirrored on disk through file modification times, so
+    the LRU order survives restarts.
+    """
+
+    def __init__(self, folder, max_size_mb=200, enabled=True):
+        self.folder = folder
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size in bytes, oldest first
+        self._total_bytes = 0
+
+        os.makedirs(self.folder, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.folder, f"{key}.json")
+
+    def _load_index(self):
+        """Rebuild the in-memory LRU index from the files on disk"""
+        entries = []
+        for name in os.listdir(self.folder):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._total_bytes += size
+
+    def get(self, key):
+        """
+        Look up a cached value
+
+        Parameters:
+        ----------
+        key : str
+            Cache key
+
+        Returns:
+        -------
+        any
+            Cached value, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)["value"]
+            except (OSError, ValueError, KeyError):
+                # Entry is unreadable, drop it and treat as a miss
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """
+        Store a value and evict least recently used entries if needed
+
+        Parameters:
+        ----------
+        key : str
+            Cache key
+        value : any
+            JSON-serializable value
+        """
+        if not self.enabled:
+            return
+
+        data = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+
+        with self._lock:
+            path = self._path(key)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing cache entry: {str(e)}")
+                return
+
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+
+            self._evict()
+
+    def _evict(self):
+        """Remove oldest entries until the cache fits in max_bytes"""
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        size = self._entries.pop(key, 0)
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+        -------
+        dict
+            Hit/miss counters, hit rate, entry count and size on disk
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
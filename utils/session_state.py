@@ -1,9 +1,16 @@
 import streamlit as st
+import uuid
+from utils.store import store
+from utils.audio_store import audio_store
 
 def initialize_session_state():
     """
     Inisialisasi semua session state yang dibutuhkan aplikasi
     """
+    # ID sesi (pemilik referensi rekaman di audio store)
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    
     # Halaman saat ini
     if 'current_page' not in st.session_state:
         st.session_state.current_page = 'dashboard'
@@ -20,10 +27,6 @@ def initialize_session_state():
     if 'process_path' not in st.session_state:
         st.session_state.process_path = None  # 'transcript' atau 'direct'
     
-    # Audio files yang tersedia
-    if 'audio_files' not in st.session_state:
-        st.session_state.audio_files = {}
-    
     # Audio yang dipilih untuk diproses
     if 'selected_audio' not in st.session_state:
         st.session_state.selected_audio = None
@@ -48,29 +51,44 @@ def initialize_session_state():
     if 'output_types' not in st.session_state:
         st.session_state.output_types = []
     
-    # Hasil dari proses summarize
-    if 'summary_result' not in st.session_state:
-        st.session_state.summary_result = ""
+    # ID ringkasan yang ditampilkan (audio, transkrip, hasil dan quiz disimpan di store)
+    if 'summary_id' not in st.session_state:
+        st.session_state.summary_id = None
     
-    # Hasil dari proses pembuatan modul
-    if 'module_result' not in st.session_state:
-        st.session_state.module_result = ""
+    # ID modul yang ditampilkan
+    if 'module_id' not in st.session_state:
+        st.session_state.module_id = None
     
-    # Hasil dari pembuatan quiz
-    if 'quiz_result' not in st.session_state:
-        st.session_state.quiz_result = {}
+    # Waktu token pertama dan total per output (detik)
+    if 'generation_timings' not in st.session_state:
+        st.session_state.generation_timings = {}
     
-    # Daftar quiz yang sudah dibuat
-    if 'quizzes' not in st.session_state:
-        st.session_state.quizzes = {}
+    # ID quiz terakhir yang dibuat
+    if 'quiz_id' not in st.session_state:
+        st.session_state.quiz_id = None
     
     # Quiz yang sedang aktif
     if 'active_quiz' not in st.session_state:
         st.session_state.active_quiz = None
     
-    # Jawaban siswa untuk quiz
+    # Jawaban siswa untuk quiz yang sedang dikerjakan
     if 'student_answers' not in st.session_state:
         st.session_state.student_answers = {}
+    
+    # Pekerjaan latar belakang (transkripsi/generate) yang diikuti sesi ini
+    if 'jobs' not in st.session_state:
+        st.session_state.jobs = []
+    
+    # Pekerjaan yang hasilnya sudah disimpan ke sesi ini
+    if 'applied_jobs' not in st.session_state:
+        st.session_state.applied_jobs = set()
+    
+    # Pekerjaan transkripsi dan generate yang sedang ditampilkan
+    if 'transcript_job_id' not in st.session_state:
+        st.session_state.transcript_job_id = None
+    
+    if 'generation_job_id' not in st.session_state:
+        st.session_state.generation_job_id = None
 
 def reset_wizard():
     """
@@ -78,7 +96,8 @@ def reset_wizard():
     """
     st.session_state.wizard_step = 1
     st.session_state.process_path = None
-    st.session_state.selected_audio = None
+    select_audio(None)
+    st.session_state.saved_upload_id = None
     st.session_state.original_transcript = ""
     st.session_state.edited_transcript = ""
     st.session_state.transcript_stats = {
@@ -87,6 +106,78 @@ def reset_wizard():
         'changed_words': 0
     }
     st.session_state.output_types = []
+    st.session_state.transcript_job_id = None
+    st.session_state.generation_job_id = None
+
+def select_audio(audio_id):
+    """
+    Pilih audio untuk diproses
+    
+    Referensi sesi ke audio yang dipilih sebelumnya dilepas, sehingga file
+    rekaman yang tidak dipakai lagi (oleh sesi, hasil, quiz, atau pekerjaan)
+    dihapus dari audio store. Catatan audio dan transkripnya tetap disimpan.
+    
+    Parameters:
+    ----------
+    audio_id : str
+        ID audio, atau None untuk melepas pilihan
+    """
+    previous = st.session_state.get("selected_audio")
+    if previous and previous != audio_id:
+        audio_store.release(previous, st.session_state.session_id)
+    st.session_state.selected_audio = audio_id
+
+def store_output(output_type, result, source, num_questions=5, difficulty="Medium"):
+    """
+    Simpan output yang sudah dibuat ke store dan tampilkan di sesi ini
+    
+    Parameters:
+    ----------
+    output_type : str
+        Jenis output ("summary", "module", "quiz")
+    result : str or dict
+        Hasil output
+    source : dict
+        Sumber output: content (transkrip), is_audio, audio_path, audio_id, filename
+    num_questions : int
+        Jumlah soal quiz
+    difficulty : str
+        Tingkat kesulitan quiz
+    """
+    audio_id = source.get("audio_id")
+    title = source.get("filename")
+    
+    if output_type in ("summary", "module"):
+        # Simpan sumber agar modul bisa dibuat ulang
+        generation_source = {
+            "content": source.get("content"),
+            "is_audio": source.get("is_audio", False),
+            "audio_path": source.get("audio_path")
+        }
+        result_id = store.add_result(output_type, result, audio_id=audio_id, title=title, source=generation_source)
+        
+        if output_type == "summary":
+            st.session_state.summary_id = result_id
+        else:
+            st.session_state.module_id = result_id
+        
+        # Rekaman sumber disimpan selama hasilnya ada, agar modul bisa dibuat ulang dari audio
+        if audio_id:
+            audio_store.reference(audio_id, f"result:{result_id}")
+    
+    elif output_type == "quiz":
+        st.session_state.quiz_id = store.add_quiz(
+            result,
+            num_questions,
+            difficulty,
+            material=source.get("content") or f"Audio: {title}",
+            audio_id=audio_id,
+            title=title
+        )
+        
+        # Quiz dari audio juga menyimpan rekaman sumbernya
+        if audio_id:
+            audio_store.reference(audio_id, f"quiz:{st.session_state.quiz_id}")
 
 def change_page(page):
     """
@@ -0,0 +1,458 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from config import DATABASE_PATH
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_files (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size TEXT,
+    duration TEXT,
+    source TEXT,
+    timestamp TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audio_created ON audio_files (created_at);
+
+CREATE TABLE IF NOT EXISTS audio_blobs (
+    audio_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS audio_refs (
+    audio_id TEXT NOT NULL REFERENCES audio_blobs (audio_id) ON DELETE CASCADE,
+    owner TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (audio_id, owner)
+);
+
+CREATE TABLE IF NOT EXISTS audio_sources (
+    source TEXT PRIMARY KEY,
+    validator TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    audio_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS audio_metadata (
+    sha256 TEXT PRIMARY KEY,
+    metadata TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    audio_id TEXT PRIMARY KEY REFERENCES audio_files (id) ON DELETE CASCADE,
+    original TEXT NOT NULL,
+    edited TEXT NOT NULL,
+    word_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    audio_id TEXT,
+    output_type TEXT NOT NULL,
+    title TEXT,
+    content TEXT NOT NULL,
+    source TEXT,
+    word_count INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_type_created ON results (output_type, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_audio ON results (audio_id);
+
+CREATE TABLE IF NOT EXISTS quizzes (
+    id TEXT PRIMARY KEY,
+    audio_id TEXT,
+    title TEXT,
+    material TEXT,
+    difficulty TEXT,
+    num_questions INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quizzes_created ON quizzes (created_at);
+"""
+
+# Metadata columns returned by list queries; large text columns are only read by the get_* methods
+_RESULT_COLUMNS = "id, audio_id, output_type, title, word_count, created_at"
+_QUIZ_COLUMNS = "id, audio_id, title, difficulty, num_questions, created_at"
+
+def _format_time(created_at):
+    return datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H:%M:%S")
+
+def _count_words(text):
+    return len(text.split()) if isinstance(text, str) else 0
+
+class Store:
+    """
+    SQLite store for audio files, transcripts, generated results and quizzes
+
+    Shared by all sessions and kept across restarts. Every table is indexed
+    on the columns the pages filter and sort by. List methods return only
+    metadata (titles, word counts, timestamps); the transcript, result text
+    and quiz data are loaded by the get_* methods when a page shows them.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # One connection per thread; sqlite3 connections cannot be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _query(self, sql, params=()):
+        return [dict(row) for row in self._connect().execute(sql, params).fetchall()]
+
+    def _query_one(self, sql, params=()):
+        row = self._connect().execute(sql, params).fetchone()
+        return dict(row) if row is not None else None
+
+    def _execute(self, sql, params=()):
+        with self._connect() as conn:
+            return conn.execute(sql, params)
+
+    # Audio files
+
+    def add_audio(self, file_info):
+        """
+        Save an audio file (the file_info dict built by the upload page)
+
+        Parameters:
+        ----------
+        file_info : dict
+            id, filename, path, size, duration, source and timestamp
+
+        Returns:
+        -------
+        str
+            Audio ID
+        """
+        # The same recording keeps its first record (and its transcript and results)
+        self._execute(
+            "INSERT INTO audio_files (id, filename, path, size, duration, source, timestamp, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE SET path = excluded.path",
+            (file_info["id"], file_info["filename"], file_info["path"], file_info.get("size"),
+             file_info.get("duration"), file_info.get("source", "upload"), file_info.get("timestamp"), time.time())
+        )
+        return file_info["id"]
+
+    def get_audio(self, audio_id):
+        """
+        Get an audio file by ID
+
+        Returns:
+        -------
+        dict or None
+            Audio file info, or None if unknown
+        """
+        if not audio_id:
+            return None
+        return self._query_one("SELECT * FROM audio_files WHERE id = ?", (audio_id,))
+
+    def list_audio(self, limit=50):
+        """
+        List audio files, newest first
+        """
+        return self._query("SELECT * FROM audio_files ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def count_audio(self):
+        return self._query_one("SELECT COUNT(*) AS n FROM audio_files")["n"]
+
+    def delete_audio(self, audio_id):
+        """
+        Delete an audio file record (its transcript is deleted with it)
+        """
+        self._execute("DELETE FROM audio_files WHERE id = ?", (audio_id,))
+
+    # Audio blobs (content-addressed files, see utils/audio_store)
+
+    def add_audio_blob(self, audio_id, sha256, path, size):
+        """
+        Register a stored recording; an existing blob with the same ID is kept
+
+        Returns:
+        -------
+        dict
+            The blob (audio_id, sha256, path, size, created_at)
+        """
+        self._execute(
+            "INSERT OR IGNORE INTO audio_blobs (audio_id, sha256, path, size, created_at) VALUES (?, ?, ?, ?, ?)",
+            (audio_id, sha256, path, size, time.time())
+        )
+        return self.get_audio_blob(audio_id)
+
+    def get_audio_blob(self, audio_id):
+        return self._query_one("SELECT * FROM audio_blobs WHERE audio_id = ?", (audio_id,))
+
+    def delete_audio_blob(self, audio_id):
+        self._execute("DELETE FROM audio_blobs WHERE audio_id = ?", (audio_id,))
+
+    def add_audio_ref(self, audio_id, owner):
+        """
+        Record that an owner (a session) uses a recording; repeated calls count once
+        """
+        self._execute(
+            "INSERT OR IGNORE INTO audio_refs (audio_id, owner, created_at) VALUES (?, ?, ?)",
+            (audio_id, owner, time.time())
+        )
+
+    def remove_audio_ref(self, audio_id, owner):
+        self._execute("DELETE FROM audio_refs WHERE audio_id = ? AND owner = ?", (audio_id, owner))
+
+    def count_audio_refs(self, audio_id):
+        return self._query_one("SELECT COUNT(*) AS n FROM audio_refs WHERE audio_id = ?", (audio_id,))["n"]
+
+    def get_audio_source(self, source):
+        """
+        Get the stored recording last downloaded from a source (e.g. "server:<filename>")
+
+        Returns:
+        -------
+        dict or None
+            source, validator (ETag or Last-Modified), size and audio_id
+        """
+        return self._query_one("SELECT * FROM audio_sources WHERE source = ?", (source,))
+
+    def save_audio_source(self, source, validator, size, audio_id):
+        self._execute(
+            "INSERT OR REPLACE INTO audio_sources (source, validator, size, audio_id, created_at) VALUES (?, ?, ?, ?, ?)",
+            (source, validator, size, audio_id, time.time())
+        )
+
+    # Audio metadata (header probe results, see utils/audio_metadata)
+
+    def get_audio_metadata(self, sha256):
+        """
+        Get the probed metadata of a recording by content hash
+
+        Returns:
+        -------
+        dict or None
+            Metadata, or None if the recording was not probed yet
+        """
+        row = self._query_one("SELECT metadata FROM audio_metadata WHERE sha256 = ?", (sha256,))
+        return json.loads(row["metadata"]) if row is not None else None
+
+    def save_audio_metadata(self, sha256, metadata):
+        self._execute(
+            "INSERT OR REPLACE INTO audio_metadata (sha256, metadata, created_at) VALUES (?, ?, ?)",
+            (sha256, json.dumps(metadata), time.time())
+        )
+
+    # Transcripts
+
+    def save_transcript(self, audio_id, original, edited=None):
+        """
+        Save the original and edited transcript of an audio file
+        """
+        edited = original if edited is None else edited
+        self._execute(
+            "INSERT OR REPLACE INTO transcripts (audio_id, original, edited, word_count, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (audio_id, original, edited, _count_words(edited), time.time())
+        )
+
+    def update_transcript(self, audio_id, edited):
+        """
+        Update the edited transcript of an audio file
+        """
+        self._execute(
+            "UPDATE transcripts SET edited = ?, word_count = ?, updated_at = ? WHERE audio_id = ?",
+            (edited, _count_words(edited), time.time(), audio_id)
+        )
+
+    def get_transcript(self, audio_id):
+        """
+        Get the transcript of an audio file
+
+        Returns:
+        -------
+        dict or None
+            original, edited, word_count and updated_at, or None if not transcribed
+        """
+        return self._query_one("SELECT * FROM transcripts WHERE audio_id = ?", (audio_id,))
+
+    # Generated results (summaries and modules)
+
+    def add_result(self, output_type, content, audio_id=None, title=None, source=None):
+        """
+        Save a generated summary or module
+
+        Parameters:
+        ----------
+        output_type : str
+            "summary" or "module"
+        content : str
+            Generated markdown
+        audio_id : str
+            Audio the result was generated from
+        title : str
+            Display title (e.g. the audio filename)
+        source : dict
+            Generation source (content, is_audio, audio_path), used to regenerate
+
+        Returns:
+        -------
+        str
+            Result ID
+        """
+        result_id = uuid.uuid4().hex[:12]
+        self._execute(
+            "INSERT INTO results (id, audio_id, output_type, title, content, source, word_count, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (result_id, audio_id, output_type, title, content,
+             json.dumps(source, ensure_ascii=False) if source is not None else None,
+             _count_words(content), time.time())
+        )
+        return result_id
+
+    def get_result(self, result_id):
+        """
+        Get a result with its content and source
+
+        Returns:
+        -------
+        dict or None
+            Result, or None if unknown
+        """
+        if not result_id:
+            return None
+        result = self._query_one("SELECT * FROM results WHERE id = ?", (result_id,))
+        if result is not None:
+            result["source"] = json.loads(result["source"]) if result["source"] else None
+        return result
+
+    def latest_result_id(self, output_type):
+        """
+        Get the ID of the newest result of an output type
+
+        Returns:
+        -------
+        str or None
+            Result ID, or None if there is none
+        """
+        row = self._query_one(
+            "SELECT id FROM results WHERE output_type = ? ORDER BY created_at DESC LIMIT 1", (output_type,)
+        )
+        return row["id"] if row is not None else None
+
+    def list_results(self, output_type, limit=50):
+        """
+        List result metadata of an output type, newest first (without content)
+        """
+        rows = self._query(
+            f"SELECT {_RESULT_COLUMNS} FROM results WHERE output_type = ? ORDER BY created_at DESC LIMIT ?",
+            (output_type, limit)
+        )
+        for row in rows:
+            row["created_at"] = _format_time(row["created_at"])
+        return rows
+
+    def count_results(self, output_type):
+        return self._query_one("SELECT COUNT(*) AS n FROM results WHERE output_type = ?", (output_type,))["n"]
+
+    # Quizzes
+
+    def add_quiz(self, data, num_questions, difficulty, material=None, audio_id=None, title=None):
+        """
+        Save a generated quiz
+
+        Returns:
+        -------
+        str
+            Quiz ID
+        """
+        quiz_id = str(uuid.uuid4())[:8]
+        self._execute(
+            "INSERT INTO quizzes (id, audio_id, title, material, difficulty, num_questions, data, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (quiz_id, audio_id, title, material, difficulty, num_questions,
+             json.dumps(data, ensure_ascii=False), time.time())
+        )
+        return quiz_id
+
+    def get_quiz(self, quiz_id):
+        """
+        Get a quiz with its questions and material
+
+        Returns:
+        -------
+        dict or None
+            Quiz (data is the parsed quiz JSON), or None if unknown
+        """
+        if not quiz_id:
+            return None
+        quiz = self._query_one("SELECT * FROM quizzes WHERE id = ?", (quiz_id,))
+        if quiz is not None:
+            quiz["data"] = json.loads(quiz["data"])
+            quiz["created_at"] = _format_time(quiz["created_at"])
+        return quiz
+
+    def list_quizzes(self, limit=50):
+        """
+        List quiz metadata, newest first (without questions)
+        """
+        rows = self._query(f"SELECT {_QUIZ_COLUMNS} FROM quizzes ORDER BY created_at DESC LIMIT ?", (limit,))
+        for row in rows:
+            row["created_at"] = _format_time(row["created_at"])
+        return rows
+
+    def count_quizzes(self):
+        return self._query_one("SELECT COUNT(*) AS n FROM quizzes")["n"]
+
+    # Dashboard
+
+    def recent_activity(self, limit=20):
+        """
+        List the newest uploads, generated results and quizzes
+
+        Returns:
+        -------
+        list
+            Dicts with activity, item and date, newest first
+        """
+        rows = self._query(
+            """
+            SELECT activity, item, created_at FROM (
+                SELECT 'Upload audio' AS activity, filename AS item, created_at
+                FROM audio_files
+                UNION ALL
+                SELECT CASE output_type WHEN 'module' THEN 'Generate Modul' ELSE 'Generate Ringkasan' END,
+                       COALESCE(title, id), created_at
+                FROM results
+                UNION ALL
+                SELECT 'Create Quiz', COALESCE(title, 'Quiz ' || id), created_at
+                FROM quizzes
+            )
+            ORDER BY created_at DESC
+            LIMIT ?
+            """,
+            (limit,)
+        )
+        return [{"activity": row["activity"], "item": row["item"], "date": _format_time(row["created_at"])}
+                for row in rows]
+
+# Shared by every session; the database file persists across restarts
+store = Store(DATABASE_PATH)
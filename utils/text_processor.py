@@ -196,4 +196,149 @@ def extract_keywords(text, max_keywords=10):
     
     # Sort by frequency and return top keywords
     keywords = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-    return [word for word, freq in keywords[:max_keywords]]
\ No newline at end of file
+    return [word for word, freq in keywords[:max_keywords]]
+
+def merge_overlapping_text(previous_text, next_text, max_overlap_words=60, min_match_words=3, max_edge_words=8):
+    """
+    Join two transcript pieces whose audio overlapped, dropping the repeated words
+    
+    The tail of previous_text and the head of next_text are compared
+    word by word (ignoring case and punctuation); the longest common run is
+    kept once if it sits at the edges of both pieces.
+    
+    Parameters:
+    ----------
+    previous_text : str
+        Earlier transcript piece
+    next_text : str
+        Later transcript piece
+    max_overlap_words : int
+        Number of words at each edge to compare
+    min_match_words : int
+        Shortest common run treated as a real overlap
+    max_edge_words : int
+        Words allowed after the run in previous_text and before it in
+        next_text (partially cut words at the segment edges)
+        
+    Returns:
+    -------
+    str
+        Merged text
+    """
+    # Word positions, so line breaks inside each piece are preserved
+    previous_spans = [m.span() for m in re.finditer(r'\S+', previous_text)]
+    next_spans = [m.span() for m in re.finditer(r'\S+', next_text)]
+    
+    if not previous_spans or not next_spans:
+        return (previous_text.strip() + ' ' + next_text.strip()).strip()
+    
+    def normalize(span, text):
+        return re.sub(r'[^\w]', '', text[span[0]:span[1]].lower())
+    
+    tail_start = max(0, len(previous_spans) - max_overlap_words)
+    tail = [normalize(span, previous_text) for span in previous_spans[tail_start:]]
+    head = [normalize(span, next_text) for span in next_spans[:max_overlap_words]]
+    
+    matcher = difflib.SequenceMatcher(None, tail, head, autojunk=False)
+    match = matcher.find_longest_match(0, len(tail), 0, len(head))
+    
+    trailing_words = len(tail) - (match.a + match.size)
+    if match.size < min_match_words or trailing_words > max_edge_words or match.b > max_edge_words:
+        return previous_text.rstrip() + ' ' + next_text.lstrip()
+    
+    # Keep previous text up to the end of the shared run, then continue after it
+    previous_end = previous_spans[tail_start + match.a + match.size - 1][1]
+    next_index = match.b + match.size
+    if next_index >= len(next_spans):
+        return previous_text[:previous_end]
+    
+    return previous_text[:previous_end] + ' ' + next_text[next_spans[next_index][0]:]
+
+def estimate_tokens(text):
+    """
+    Roughly estimate the number of model tokens in a text
+    
+    Uses the common approximation of about 4 characters per token, which is
+    close enough for budgeting without calling the tokenizer.
+    
+    Parameters:
+    ----------
+    text : str
+        Text to measure
+        
+    Returns:
+    -------
+    int
+        Estimated token count
+    """
+    return (len(text or "") + 3) // 4
+
+def _split_piece(piece, max_tokens, patterns=(r'(?<=[.!?])\s+', r'\s+')):
+    """
+    Split a piece of text that exceeds max_tokens into pieces that fit
+    
+    Tries each split pattern in turn (sentences, then words) and regroups
+    the parts so every group stays within the budget.
+    """
+    if estimate_tokens(piece) <= max_tokens or not patterns:
+        return [piece]
+    
+    parts = [p for p in re.split(patterns[0], piece) if p.strip()]
+    if len(parts) <= 1:
+        return _split_piece(piece, max_tokens, patterns[1:])
+    
+    pieces = []
+    group = []
+    for part in parts:
+        if estimate_tokens(part) > max_tokens:
+            if group:
+                pieces.append(' '.join(group))
+                group = []
+            pieces.extend(_split_piece(part, max_tokens, patterns[1:]))
+            continue
+        if group and estimate_tokens(' '.join(group + [part])) > max_tokens:
+            pieces.append(' '.join(group))
+            group = []
+        group.append(part)
+    if group:
+        pieces.append(' '.join(group))
+    
+    return pieces
+
+def chunk_text(text, max_tokens):
+    """
+    Split text into chunks of at most max_tokens, keeping paragraphs together
+    
+    Paragraphs are packed greedily into chunks; a paragraph larger than the
+    budget is split at sentence boundaries, and a sentence larger than the
+    budget at word boundaries.
+    
+    Parameters:
+    ----------
+    text : str
+        Text to split
+    max_tokens : int
+        Token budget per chunk
+        
+    Returns:
+    -------
+    list
+        List of text chunks
+    """
+    units = []
+    for paragraph in re.split(r'\n\s*\n', text):
+        paragraph = paragraph.strip()
+        if paragraph:
+            units.extend(_split_piece(paragraph, max_tokens))
+    
+    chunks = []
+    current = []
+    for unit in units:
+        if current and estimate_tokens('\n\n'.join(current + [unit])) > max_tokens:
+            chunks.append('\n\n'.join(current))
+            current = []
+        current.append(unit)
+    if current:
+        chunks.append('\n\n'.join(current))
+    
+    return chunks